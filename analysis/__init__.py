@@ -5,6 +5,7 @@ Analysis 模块 - 多投资理念分析
 from .investor_profiles import (
     InvestorProfile,
     InvestorProfileManager,
+    get_profile_manager,
     load_investor_profile,
     list_all_investors
 )
@@ -14,13 +15,23 @@ from .perspective_analyzer import (
     quick_analyze
 )
 
+from .llm_registry import (
+    get_llm,
+    get_analyzer,
+    aclose_llm_clients
+)
+
 __all__ = [
     'InvestorProfile',
     'InvestorProfileManager',
+    'get_profile_manager',
     'load_investor_profile',
     'list_all_investors',
     'PerspectiveAnalyzer',
     'quick_analyze',
+    'get_llm',
+    'get_analyzer',
+    'aclose_llm_clients',
 ]
 
 __version__ = '1.0.0'
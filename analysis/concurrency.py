@@ -0,0 +1,98 @@
+"""
+并发限制模块
+同一个并发上限同时约束同步调用（线程）和异步调用（任意事件循环中的协程）。
+asyncio.Semaphore 绑定首次等待时的事件循环，进程内存在多个事件循环
+（如 asyncio.run、测试、同步入口中的临时循环）时无法共享；
+同步和异步各用一个信号量又会让实际并发达到上限的两倍
+"""
+
+import asyncio
+import threading
+from collections import deque
+
+
+class ConcurrencyLimiter:
+    """
+    线程安全、与事件循环无关的并发限制器
+
+    同步代码使用 with limiter，异步代码使用 async with limiter，共享同一计数；
+    协程等待时挂起在所属事件循环的 Future 上，不占用线程
+    """
+
+    def __init__(self, limit: int):
+        """
+        Args:
+            limit: 最大并发数（至少为 1）
+        """
+        self.limit = max(1, limit)
+        self._semaphore = threading.BoundedSemaphore(self.limit)
+        self._waiters: deque = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """获取一个名额（阻塞当前线程）"""
+        self._semaphore.acquire()
+
+    async def aacquire(self):
+        """获取一个名额（挂起当前协程，不阻塞事件循环）"""
+        loop = asyncio.get_running_loop()
+        while not self._semaphore.acquire(blocking=False):
+            waiter = loop.create_future()
+            with self._lock:
+                self._waiters.append((loop, waiter))
+
+            # 入队前恰好有名额释放时不会被唤醒，入队后再试一次
+            if self._semaphore.acquire(blocking=False):
+                self._discard(loop, waiter)
+                return
+
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                self._discard(loop, waiter)
+                # 已被唤醒却被取消时，把唤醒让给下一个等待者
+                if waiter.done() and not waiter.cancelled():
+                    self._wake_next()
+                raise
+
+    def release(self):
+        """释放一个名额，并唤醒一个等待中的协程"""
+        self._semaphore.release()
+        self._wake_next()
+
+    def _discard(self, loop, waiter):
+        with self._lock:
+            try:
+                self._waiters.remove((loop, waiter))
+            except ValueError:
+                pass
+
+    def _wake_next(self):
+        with self._lock:
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                if waiter.done() or loop.is_closed():
+                    continue
+                loop.call_soon_threadsafe(self._wake, waiter)
+                return
+
+    def _wake(self, waiter):
+        # 在等待者所属的事件循环中执行；期间被取消则唤醒下一个
+        if waiter.done():
+            self._wake_next()
+        else:
+            waiter.set_result(None)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    async def __aenter__(self):
+        await self.aacquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
@@ -3,13 +3,337 @@
 支持 PDF、Word、Markdown 文档的文本提取
 """
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional, Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 import logging
+import mmap
+import multiprocessing
+import os
+import re
+import threading
+
+from analysis.concurrency import ConcurrencyLimiter
+from analysis.parse_cache import get_parse_cache, hash_file
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 页数不少于该值的 PDF 才按页并行解析（小文件启动进程的开销大于收益）
+DEFAULT_PARALLEL_MIN_PAGES = 40
+
+# 并行解析的进程数，默认不超过 4 个
+DEFAULT_PARSE_WORKERS = min(4, os.cpu_count() or 1)
+
+# 同时进行的流式解析数量（驱动 parse_stream 的线程池大小）
+DEFAULT_PARSE_CONCURRENCY = 4
+
+# 并行解析时单个任务的最大页数（越小首页产出越早）
+PARALLEL_PAGE_RANGE = 32
+
+# 解析档位：只提取文本 / 文本 + 疑似表格页的表格 / 文本 + 所有页的表格
+PROFILE_TEXT = "text"
+PROFILE_TABLES = "tables"
+PROFILE_FULL = "full"
+PARSE_PROFILES = (PROFILE_TEXT, PROFILE_TABLES, PROFILE_FULL)
+DEFAULT_PARSE_PROFILE = PROFILE_TABLES
+
+# 表格页判断：至少 TABLE_MIN_GRID_LINES 条横线、每条与至少 TABLE_MIN_GRID_LINES 条竖线相交
+# （即至少 2×2 个单元格）视为有框线表格，单个矩形（页框、文本框、页眉框）不算；
+# 共线判断的容差为 TABLE_RULING_TOLERANCE（pt）；
+# 不少于 TABLE_MIN_NUMERIC_ROWS 行、每行不少于 TABLE_MIN_NUMERIC_CELLS 个数值视为数字网格
+TABLE_MIN_GRID_LINES = 3
+TABLE_RULING_TOLERANCE = 3.0
+TABLE_MIN_NUMERIC_ROWS = 3
+TABLE_MIN_NUMERIC_CELLS = 3
+_NUMERIC_CELL = re.compile(r"(?<!\S)[-(（]?\d[\d,]*\.?\d*[%％]?[)）]?(?!\S)")
+
+# 无框线数字网格按文字对齐切分单元格
+_TEXT_TABLE_SETTINGS = {"vertical_strategy": "text", "horizontal_strategy": "text"}
+
+# 流式解析时 Word 的分页粒度，以及 Markdown / 纯文本内存映射读取的分块大小
+WORD_PARAGRAPHS_PER_PAGE = 50
+TEXT_CHUNK_BYTES = 256 * 1024
+
+# 送入分析工作流的材料长度上限（字符），超出部分截断
+DEFAULT_MAX_MATERIAL_CHARS = 2_000_000
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+_parse_executor: Optional[ThreadPoolExecutor] = None
+_parse_limiter: Optional[ConcurrencyLimiter] = None
+
+
+class DocumentLimitError(ValueError):
+    """文档超出解析限制（如页数上限）"""
+
+
+def get_parse_process_pool() -> ProcessPoolExecutor:
+    """
+    获取进程级共享的 PDF 解析进程池
+    
+    API 服务在启动时（lifespan）创建，脚本等其他调用方在首次使用时创建。
+    子进程以 spawn 方式启动：服务进程中已有 MongoDB 监控线程、LLM 和解析线程池，
+    fork 多线程进程可能让子进程卡在其他线程持有的锁上（日志、pymongo、malloc）；
+    子进程执行的 _extract_pdf_page_range 须为模块级函数
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=_parse_workers(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+
+def get_parse_executor() -> ThreadPoolExecutor:
+    """
+    获取驱动解析的有界线程池（延迟创建）
+    
+    异步接口通过它逐页推进 parse_stream（或整体执行 parse），线程数为
+    PARSE_MAX_CONCURRENCY；它只限制同时执行的解析步骤，不同文档的页面步骤会交错执行。
+    限制同时解析的文档数需在整个解析期间持有 get_parse_limiter() 的名额
+    """
+    global _parse_executor
+    with _process_pool_lock:
+        if _parse_executor is None:
+            _parse_executor = ThreadPoolExecutor(
+                max_workers=_parse_concurrency(),
+                thread_name_prefix="document-parse"
+            )
+        return _parse_executor
+
+
+def get_parse_limiter() -> ConcurrencyLimiter:
+    """
+    获取文档级解析并发限制器（延迟创建）
+    
+    上传和批量分析在解析一份文档的全过程中各占一个名额，
+    同时解析的文档数不超过 PARSE_MAX_CONCURRENCY（默认 4），超出的请求排队等待，
+    不会同时持有文件句柄、缓冲区和进程池页面任务
+    """
+    global _parse_limiter
+    with _process_pool_lock:
+        if _parse_limiter is None:
+            _parse_limiter = ConcurrencyLimiter(_parse_concurrency())
+        return _parse_limiter
+
+
+def _parse_concurrency() -> int:
+    """同时解析的文档数（环境变量 PARSE_MAX_CONCURRENCY）"""
+    return int(os.getenv("PARSE_MAX_CONCURRENCY", DEFAULT_PARSE_CONCURRENCY))
+
+
+def _parse_workers() -> int:
+    """并行解析进程数（环境变量 PDF_PARSE_WORKERS）"""
+    return int(os.getenv("PDF_PARSE_WORKERS", DEFAULT_PARSE_WORKERS))
+
+
+def get_max_material_chars() -> int:
+    """工作流材料长度上限（环境变量 MAX_MATERIAL_CHARS，0 表示不限制）"""
+    return int(os.getenv("MAX_MATERIAL_CHARS", DEFAULT_MAX_MATERIAL_CHARS))
+
+
+def shutdown_parse_process_pool():
+    """关闭共享的解析进程池和线程池（应用关闭时调用）"""
+    global _process_pool, _parse_executor
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+        if _parse_executor is not None:
+            _parse_executor.shutdown(wait=False, cancel_futures=True)
+            _parse_executor = None
+
+
+def _extract_pdf_page_range(
+    file_path: str,
+    start: int,
+    end: int,
+    profile: str = DEFAULT_PARSE_PROFILE
+) -> List[Tuple[int, Optional[str], Optional[list]]]:
+    """
+    提取 PDF 指定页码范围的文本和表格（在子进程中执行）
+    
+    每个子进程独立打开文件，只解析分配到的页
+    
+    Args:
+        file_path: PDF 文件路径
+        start: 起始页（含，从 0 开始）
+        end: 结束页（不含）
+        profile: 解析档位
+        
+    Returns:
+        [(页码, 页面文本, 页面表格), ...]
+    """
+    import pdfplumber
+    
+    with pdfplumber.open(file_path) as pdf:
+        return _extract_pages(pdf, start, end, profile)
+
+
+def _extract_pages(
+    pdf,
+    start: int,
+    end: int,
+    profile: str = DEFAULT_PARSE_PROFILE
+) -> List[Tuple[int, Optional[str], Optional[list]]]:
+    """从已打开的 PDF 中逐页提取文本和表格（表格按解析档位提取）"""
+    results = []
+    for i in range(start, end):
+        page = pdf.pages[i]
+        text = page.extract_text()
+        
+        tables = None
+        if profile == PROFILE_FULL:
+            tables = page.extract_tables()
+        elif profile == PROFILE_TABLES:
+            settings = _table_settings(page, text)
+            if settings is not None:
+                tables = page.extract_tables(settings)
+        
+        results.append((i, text, tables))
+        # 释放页面缓存的对象，避免长文档累积内存
+        page.flush_cache()
+    return results
+
+
+def _table_settings(page, text: Optional[str]) -> Optional[Dict[str, str]]:
+    """
+    廉价判断页面是否可能包含表格（避免对每页都调用 extract_tables）
+    
+    Returns:
+        表格提取参数：有框线时用默认的线段策略，无框线的数字网格按文字对齐；
+        判断为不含表格时返回 None
+    """
+    if _has_ruling_grid(page.edges):
+        return {}
+    
+    numeric_rows = 0
+    for line in (text or "").splitlines():
+        if len(_NUMERIC_CELL.findall(line)) >= TABLE_MIN_NUMERIC_CELLS:
+            numeric_rows += 1
+            if numeric_rows >= TABLE_MIN_NUMERIC_ROWS:
+                return _TEXT_TABLE_SETTINGS
+    return None
+
+
+def _has_ruling_grid(edges: List[Dict[str, Any]]) -> bool:
+    """
+    判断线段是否构成至少 2×2 个单元格的网格
+    
+    先把共线的线段按坐标合并为横线/竖线（逐格绘制的矩形也能连成整条线），
+    再统计与至少 TABLE_MIN_GRID_LINES 条竖线相交的横线数量
+    """
+    tolerance = TABLE_RULING_TOLERANCE
+    rows: Dict[int, List[Tuple[float, float]]] = {}
+    columns: Dict[int, List[Tuple[float, float]]] = {}
+    for edge in edges:
+        if edge["orientation"] == "h":
+            rows.setdefault(round(edge["top"] / tolerance), []).append((edge["x0"], edge["x1"]))
+        else:
+            columns.setdefault(round(edge["x0"] / tolerance), []).append((edge["top"], edge["bottom"]))
+    
+    if len(rows) < TABLE_MIN_GRID_LINES or len(columns) < TABLE_MIN_GRID_LINES:
+        return False
+    
+    def covers(spans: List[Tuple[float, float]], position: float) -> bool:
+        return any(start - tolerance <= position <= end + tolerance for start, end in spans)
+    
+    grid_rows = 0
+    for row, row_spans in rows.items():
+        y = row * tolerance
+        crossings = sum(
+            1 for column, column_spans in columns.items()
+            if covers(row_spans, column * tolerance) and covers(column_spans, y)
+        )
+        if crossings >= TABLE_MIN_GRID_LINES:
+            grid_rows += 1
+            if grid_rows >= TABLE_MIN_GRID_LINES:
+                return True
+    return False
+
+
+def _check_profile(profile: str) -> str:
+    """校验解析档位"""
+    if profile not in PARSE_PROFILES:
+        raise ValueError(f"不支持的解析档位: {profile}，可选: {', '.join(PARSE_PROFILES)}")
+    return profile
+
+
+def _word_tables(doc) -> List[List[List[str]]]:
+    """提取 Word 文档中的表格"""
+    tables = []
+    for table in doc.tables:
+        table_data = []
+        for row in table.rows:
+            row_data = [cell.text for cell in row.cells]
+            table_data.append(row_data)
+        tables.append(table_data)
+    return tables
+
+
+def _mapped_chunks(file, size: int) -> Iterator[bytes]:
+    """
+    内存映射文件并按 TEXT_CHUNK_BYTES 切块，块尾延伸到下一个换行
+    
+    换行字节不会出现在 UTF-8 多字节字符内部，按换行切分不会截断字符
+    """
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        start = 0
+        while start < size:
+            end = start + TEXT_CHUNK_BYTES
+            if end < size:
+                newline = mapped.find(b"\n", end - 1)
+                end = size if newline == -1 else newline + 1
+            else:
+                end = size
+            yield mapped[start:end]
+            start = end
+
+
+def _page_record(page: Tuple[int, Optional[str], Optional[list]]) -> Dict[str, Any]:
+    """(页码, 文本, 表格) 转换为流式解析的页面记录"""
+    index, text, tables = page
+    return {"page": index + 1, "text": text, "tables": tables or None}
+
+
+class MaterialBuffer:
+    """
+    按块拼接文档全文，超过长度上限的部分直接丢弃
+    
+    流式解析的页面逐块追加，内存中最多保留 max_chars 个字符
+    """
+    
+    def __init__(self, max_chars: Optional[int] = None):
+        """
+        Args:
+            max_chars: 长度上限（字符），None 或 0 表示不限制
+        """
+        self.max_chars = max_chars or None
+        self.total_chars = 0
+        self._parts: List[str] = []
+        self._size = 0
+    
+    @property
+    def truncated(self) -> bool:
+        """是否有内容因超过上限被丢弃"""
+        return self.total_chars > self._size
+    
+    def append(self, text: str):
+        """追加一块文本"""
+        self.total_chars += len(text)
+        if self.max_chars is not None:
+            text = text[:max(0, self.max_chars - self._size)]
+        if text:
+            self._parts.append(text)
+            self._size += len(text)
+    
+    def getvalue(self) -> str:
+        """拼接后的文本"""
+        return "".join(self._parts)
+
 
 class DocumentParser:
     """文档解析器 - 支持多种格式"""
@@ -17,11 +341,51 @@ class DocumentParser:
     SUPPORTED_FORMATS = {
         'pdf': ['.pdf'],
         'word': ['.doc', '.docx'],
-        'markdown': ['.md', '.markdown']
+        'markdown': ['.md', '.markdown'],
+        'text': ['.txt']
+    }
+    
+    # 流式解析时相邻页面在全文中的分隔符
+    PAGE_SEPARATORS = {
+        'pdf': '\n\n',
+        'word': '\n\n',
+        'markdown': '',
+        'text': ''
     }
     
-    def __init__(self):
-        """初始化文档解析器"""
+    def __init__(
+        self,
+        parallel: bool = True,
+        max_workers: Optional[int] = None,
+        parallel_min_pages: Optional[int] = None,
+        profile: str = DEFAULT_PARSE_PROFILE,
+        use_cache: bool = False,
+        max_pages: Optional[int] = None
+    ):
+        """
+        初始化文档解析器
+        
+        Args:
+            parallel: 大型 PDF 是否按页范围分配到进程池解析（进程池只有一个进程时
+                同样在子进程中解析，不占用调用线程）
+            max_workers: 并行解析时拆分的页范围数，默认与共享进程池大小一致
+            parallel_min_pages: 页数达到该值才并行解析，较小的文件串行解析
+                （默认读取环境变量 PDF_PARALLEL_MIN_PAGES）
+            profile: 默认解析档位
+                - text: 只提取文本
+                - tables: 提取文本，只对疑似含表格（有框线或数字网格）的页提取表格
+                - full: 提取文本和所有页的表格
+            use_cache: 是否使用按文件内容哈希索引的磁盘解析缓存（见 analysis.parse_cache）
+            max_pages: PDF 页数上限，超出时解析失败（DocumentLimitError），默认不限制
+        """
+        self.parallel = parallel
+        self.profile = _check_profile(profile)
+        self.use_cache = use_cache
+        self.max_pages = max_pages
+        self.max_workers = max_workers or _parse_workers()
+        self.parallel_min_pages = parallel_min_pages or int(
+            os.getenv("PDF_PARALLEL_MIN_PAGES", DEFAULT_PARALLEL_MIN_PAGES)
+        )
         self._check_dependencies()
     
     def _check_dependencies(self):
@@ -49,74 +413,234 @@ class DocumentParser:
         except ImportError:
             logger.warning("⚠️  Word 解析库未安装 (python-docx)")
         
-        # Markdown 无需额外依赖
+        # Markdown 和纯文本无需额外依赖
         self.available_parsers['markdown'] = 'builtin'
+        self.available_parsers['text'] = 'builtin'
     
-    def parse(self, file_path: Union[str, Path]) -> Dict[str, any]:
+    def parse(
+        self,
+        file_path: Union[str, Path],
+        profile: Optional[str] = None,
+        max_chars: Optional[int] = None
+    ) -> Dict[str, any]:
         """
         解析文档并提取文本
         
+        基于 parse_stream 逐页拼接全文；只需要部分页面或边解析边处理时
+        请直接使用 parse_stream / iter_pages
+        
         Args:
             file_path: 文档文件路径
+            profile: 解析档位（text/tables/full），默认使用实例的档位
+            max_chars: 全文长度上限，超出部分在逐页拼接时直接丢弃（表格和元数据不受影响）
             
         Returns:
             包含以下字段的字典:
             - content: 提取的文本内容
-            - format: 文档格式 (pdf/word/markdown)
+            - format: 文档格式 (pdf/word/markdown/text)
             - pages: 页数（如适用）
             - metadata: 元数据信息
+            - tables: 提取的表格（无表格时为 None）
+            - truncated: 全文是否因超过 max_chars 被截断
             - success: 是否成功解析
             - error: 错误信息（如失败）
         """
-        file_path = Path(file_path)
+        material = MaterialBuffer(max_chars)
+        tables = []
+        end = None
+        for event in self.parse_stream(file_path, profile):
+            if event["type"] == "page":
+                material.append(event["content"])
+                if event["tables"]:
+                    tables.extend(event["tables"])
+            else:
+                end = event
         
-        # 检查文件是否存在
-        if not file_path.exists():
+        if not end["success"]:
             return {
                 "success": False,
-                "error": f"文件不存在: {file_path}",
+                "error": end["error"],
                 "content": None,
-                "format": None
+                "format": end["format"]
             }
         
-        # 识别文件格式
+        result = {
+            "content": material.getvalue(),
+            "metadata": end["metadata"],
+            "tables": tables if tables else None,
+            "truncated": material.truncated,
+            "format": end["format"],
+            "success": True
+        }
+        if end["format"] == 'pdf':
+            result["pages"] = end["pages"]
+        return result
+    
+    def parse_stream(
+        self,
+        file_path: Union[str, Path],
+        profile: Optional[str] = None,
+        content_hash: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        流式解析文档，每解析完一页立即产出
+        
+        解析错误不会抛出，而是在结束事件中返回。启用缓存时，内容相同的文件
+        直接回放缓存的事件；未命中时边解析边写入缓存
+        
+        Args:
+            file_path: 文档文件路径
+            profile: 解析档位（text/tables/full），默认使用实例的档位
+            content_hash: 文件内容的 SHA-256（已知时传入，避免重复计算）
+            
+        Yields:
+            页面事件:
+            - type: "page"
+            - format: 文档格式
+            - page: 页码（从 1 开始）
+            - total_pages: 总页数（未知时为 None）
+            - text: 页面原始文本
+            - content: 该页在全文中的片段（已含分隔符，依次拼接即为 parse() 的 content）
+            - tables: 页面表格（无表格时为 None）
+            
+            最后产出一个结束事件:
+            - type: "end"
+            - success / error / format / pages / metadata
+            - content_hash: 文件内容哈希（启用缓存时）
+            - cached: 是否来自缓存
+        """
+        file_path = Path(file_path)
         file_format = self._identify_format(file_path)
-        if not file_format:
-            return {
-                "success": False,
-                "error": f"不支持的文件格式: {file_path.suffix}",
-                "content": None,
-                "format": None
-            }
+        profile = profile or self.profile
+        cache = get_parse_cache() if self.use_cache else None
+        
+        if cache is None or not file_format or profile not in PARSE_PROFILES or not file_path.exists():
+            yield from self._parse_events(file_path, file_format, profile, None)
+            return
+        
+        content_hash = content_hash or hash_file(file_path)
+        cached = cache.replay(content_hash, profile)
+        if cached is not None:
+            logger.info(f"✓ 命中解析缓存: {file_path.name} ({content_hash[:12]})")
+            yield from cached
+            return
+        
+        yield from cache.record(
+            content_hash,
+            profile,
+            self._parse_events(file_path, file_format, profile, content_hash)
+        )
+    
+    def _parse_events(
+        self,
+        file_path: Path,
+        file_format: Optional[str],
+        profile: str,
+        content_hash: Optional[str]
+    ) -> Iterator[Dict[str, Any]]:
+        """逐页解析并产出 parse_stream 的事件"""
+        metadata: Dict[str, Any] = {}
+        page_count = 0
         
-        # 根据格式调用相应的解析方法
         try:
-            if file_format == 'pdf':
-                result = self._parse_pdf(file_path)
-            elif file_format == 'word':
-                result = self._parse_word(file_path)
-            elif file_format == 'markdown':
-                result = self._parse_markdown(file_path)
-            else:
-                return {
-                    "success": False,
-                    "error": f"未实现的解析器: {file_format}",
-                    "content": None,
-                    "format": file_format
+            pages = self._iter_format_pages(file_path, file_format, metadata, profile)
+            separator = self.PAGE_SEPARATORS.get(file_format, "")
+            has_content = False
+            for page in pages:
+                page_count += 1
+                content = self._page_content(file_format, page)
+                if content and has_content:
+                    content = separator + content
+                has_content = has_content or bool(content)
+                yield {
+                    "type": "page",
+                    "format": file_format,
+                    "total_pages": metadata.get("pages"),
+                    "content": content,
+                    **page
                 }
-            
-            result['format'] = file_format
-            result['success'] = True
-            return result
-            
         except Exception as e:
             logger.error(f"解析文档失败 {file_path}: {str(e)}")
-            return {
+            yield {
+                "type": "end",
                 "success": False,
                 "error": str(e),
-                "content": None,
-                "format": file_format
+                "limit_exceeded": isinstance(e, DocumentLimitError),
+                "format": file_format,
+                "pages": page_count,
+                "metadata": metadata,
+                "content_hash": content_hash,
+                "cached": False
             }
+            return
+        
+        yield {
+            "type": "end",
+            "success": True,
+            "error": None,
+            "format": file_format,
+            "pages": page_count,
+            "metadata": metadata,
+            "content_hash": content_hash,
+            "cached": False
+        }
+    
+    def iter_pages(
+        self,
+        file_path: Union[str, Path],
+        profile: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        逐页产出文档的文本和表格
+        
+        PDF 按物理页产出；Word 按段落分块，Markdown / 纯文本按字节数分块（对齐到换行）产出
+        
+        Args:
+            file_path: 文档文件路径
+            profile: 解析档位（text/tables/full），默认使用实例的档位
+            
+        Yields:
+            {"page": 页码（从 1 开始）, "text": 页面文本, "tables": 页面表格或 None}
+            
+        Raises:
+            FileNotFoundError: 文件不存在
+            ValueError: 不支持的文件格式
+            ImportError: 缺少对应的解析库
+        """
+        file_path = Path(file_path)
+        yield from self._iter_format_pages(file_path, self._identify_format(file_path), {}, profile)
+    
+    def _iter_format_pages(
+        self,
+        file_path: Path,
+        file_format: Optional[str],
+        metadata: Dict[str, Any],
+        profile: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """按格式分派逐页解析，元数据写入传入的 metadata"""
+        profile = _check_profile(profile) if profile else self.profile
+        if not file_path.exists():
+            raise FileNotFoundError(f"文件不存在: {file_path}")
+        
+        if file_format == 'pdf':
+            return self._iter_pdf(file_path, metadata, profile)
+        elif file_format == 'word':
+            return self._iter_word(file_path, metadata, profile)
+        elif file_format in ('markdown', 'text'):
+            return self._iter_text(file_path, metadata)
+        elif file_format:
+            raise ValueError(f"未实现的解析器: {file_format}")
+        raise ValueError(f"不支持的文件格式: {file_path.suffix}")
+    
+    @staticmethod
+    def _page_content(file_format: str, page: Dict[str, Any]) -> str:
+        """页面在全文中的文本（PDF 页面带页码标题）"""
+        text = page["text"]
+        if not text:
+            return ""
+        if file_format == 'pdf':
+            return f"--- 第 {page['page']} 页 ---\n{text}"
+        return text
     
     def _identify_format(self, file_path: Path) -> Optional[str]:
         """识别文件格式"""
@@ -128,7 +652,7 @@ class DocumentParser:
         
         return None
     
-    def _parse_pdf(self, file_path: Path) -> Dict:
+    def _iter_pdf(self, file_path: Path, metadata: Dict[str, Any], profile: str) -> Iterator[Dict[str, Any]]:
         """解析 PDF 文档"""
         parser = self.available_parsers.get('pdf')
         
@@ -136,67 +660,101 @@ class DocumentParser:
             raise ImportError("PDF 解析库未安装，请运行: pip install pdfplumber")
         
         if parser == 'pdfplumber':
-            return self._parse_pdf_pdfplumber(file_path)
+            return self._iter_pdf_pdfplumber(file_path, metadata, profile)
         elif parser == 'pypdf2':
-            return self._parse_pdf_pypdf2(file_path)
+            return self._iter_pdf_pypdf2(file_path, metadata)
     
-    def _parse_pdf_pdfplumber(self, file_path: Path) -> Dict:
-        """使用 pdfplumber 解析 PDF"""
-        import pdfplumber
+    def _iter_pdf_pdfplumber(
+        self,
+        file_path: Path,
+        metadata: Dict[str, Any],
+        profile: str
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        使用 pdfplumber 逐页解析 PDF
         
-        text_content = []
-        tables = []
-        metadata = {}
+        页数达到 parallel_min_pages 时按页范围拆分到进程池并行解析，
+        按页码顺序产出；小文件串行解析，并行失败时从未产出的页开始串行续解析
+        """
+        import pdfplumber
         
         with pdfplumber.open(file_path) as pdf:
-            metadata = {
+            metadata.update({
                 'pages': len(pdf.pages),
-                'metadata': pdf.metadata
-            }
+                'metadata': pdf.metadata,
+                'profile': profile
+            })
             
-            for i, page in enumerate(pdf.pages):
-                # 提取文本
-                page_text = page.extract_text()
-                if page_text:
-                    text_content.append(f"--- 第 {i+1} 页 ---\n{page_text}")
-                
-                # 提取表格（可选）
-                page_tables = page.extract_tables()
-                if page_tables:
-                    tables.extend(page_tables)
-        
-        return {
-            "content": "\n\n".join(text_content),
-            "pages": metadata['pages'],
-            "metadata": metadata,
-            "tables": tables if tables else None
-        }
+            page_count = metadata['pages']
+            next_page = 0
+            
+            self._check_page_limit(page_count)
+            
+            if self.parallel and page_count >= self.parallel_min_pages:
+                metadata['parallel_workers'] = self.max_workers
+                try:
+                    for page in self._iter_pages_parallel(file_path, page_count, profile):
+                        next_page = page[0] + 1
+                        yield _page_record(page)
+                except Exception as e:
+                    logger.warning(f"⚠️  并行解析失败，从第 {next_page + 1} 页起改为串行解析: {str(e)}")
+                    metadata.pop('parallel_workers', None)
+            
+            for i in range(next_page, page_count):
+                yield _page_record(_extract_pages(pdf, i, i + 1, profile)[0])
     
-    def _parse_pdf_pypdf2(self, file_path: Path) -> Dict:
-        """使用 PyPDF2 解析 PDF（备用方案）"""
-        import PyPDF2
+    def _check_page_limit(self, page_count: int):
+        """页数超出上限时抛出 DocumentLimitError"""
+        if self.max_pages and page_count > self.max_pages:
+            raise DocumentLimitError(f"文档页数 {page_count} 超过上限 {self.max_pages}")
+    
+    def _iter_pages_parallel(
+        self,
+        file_path: Path,
+        page_count: int,
+        profile: str
+    ) -> Iterator[Tuple[int, Optional[str], Optional[list]]]:
+        """
+        将页码拆分为连续范围，在共享进程池中并行提取，按页码顺序产出
         
-        text_content = []
+        页范围不超过 PARALLEL_PAGE_RANGE 页，首个范围完成即可开始产出
+        """
+        chunk_size = min(-(-page_count // self.max_workers), PARALLEL_PAGE_RANGE)
+        ranges = [
+            (start, min(start + chunk_size, page_count))
+            for start in range(0, page_count, chunk_size)
+        ]
+        
+        pool = get_parse_process_pool()
+        futures = [
+            pool.submit(_extract_pdf_page_range, str(file_path), start, end, profile)
+            for start, end in ranges
+        ]
+        
+        # 页范围按顺序提交，逐个取结果即保持页码顺序
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # 调用方提前停止迭代或出错时，取消尚未开始的页范围
+            for future in futures:
+                future.cancel()
+    
+    def _iter_pdf_pypdf2(self, file_path: Path, metadata: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """使用 PyPDF2 逐页解析 PDF（备用方案）"""
+        import PyPDF2
         
         with open(file_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
-            num_pages = len(pdf_reader.pages)
+            metadata.update(dict(pdf_reader.metadata) if pdf_reader.metadata else {})
+            metadata['pages'] = len(pdf_reader.pages)
+            self._check_page_limit(metadata['pages'])
             
             for i, page in enumerate(pdf_reader.pages):
-                text = page.extract_text()
-                if text:
-                    text_content.append(f"--- 第 {i+1} 页 ---\n{text}")
-            
-            metadata = pdf_reader.metadata if pdf_reader.metadata else {}
-        
-        return {
-            "content": "\n\n".join(text_content),
-            "pages": num_pages,
-            "metadata": dict(metadata)
-        }
+                yield {"page": i + 1, "text": page.extract_text(), "tables": None}
     
-    def _parse_word(self, file_path: Path) -> Dict:
-        """解析 Word 文档"""
+    def _iter_word(self, file_path: Path, metadata: Dict[str, Any], profile: str) -> Iterator[Dict[str, Any]]:
+        """解析 Word 文档（每 WORD_PARAGRAPHS_PER_PAGE 个段落为一页，表格随第一页产出）"""
         if 'word' not in self.available_parsers:
             raise ImportError("Word 解析库未安装，请运行: pip install python-docx")
         
@@ -207,50 +765,101 @@ class DocumentParser:
         # 提取段落文本
         paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
         
-        # 提取表格（可选）
-        tables = []
-        for table in doc.tables:
-            table_data = []
-            for row in table.rows:
-                row_data = [cell.text for cell in row.cells]
-                table_data.append(row_data)
-            tables.append(table_data)
+        # 提取表格（text 档位跳过）
+        tables = [] if profile == PROFILE_TEXT else _word_tables(doc)
         
         # 元数据
-        metadata = {
+        metadata.update({
             'paragraphs': len(paragraphs),
-            'tables': len(tables),
+            'tables': len(doc.tables),
             'core_properties': {
                 'author': doc.core_properties.author,
                 'created': str(doc.core_properties.created),
                 'modified': str(doc.core_properties.modified),
                 'title': doc.core_properties.title
             }
-        }
+        })
         
-        return {
-            "content": "\n\n".join(paragraphs),
-            "metadata": metadata,
-            "tables": tables if tables else None
-        }
+        starts = range(0, len(paragraphs), WORD_PARAGRAPHS_PER_PAGE) or [0]
+        for page, start in enumerate(starts, start=1):
+            yield {
+                "page": page,
+                "text": "\n\n".join(paragraphs[start:start + WORD_PARAGRAPHS_PER_PAGE]),
+                "tables": (tables or None) if page == 1 else None
+            }
     
-    def _parse_markdown(self, file_path: Path) -> Dict:
-        """解析 Markdown 文档"""
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-        
-        # 统计基本信息
-        lines = content.split('\n')
-        metadata = {
-            'lines': len(lines),
-            'characters': len(content),
-            'headings': len([l for l in lines if l.startswith('#')])
-        }
+    def _iter_text(self, file_path: Path, metadata: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        内存映射读取 Markdown / 纯文本文档
         
-        return {
-            "content": content,
-            "metadata": metadata
-        }
+        按 TEXT_CHUNK_BYTES 切块（块尾对齐到换行）逐块解码产出，同一遍扫描中统计
+        行数、字符数和标题数，不构造整篇字符串或行列表；换行统一为 \\n（与文本模式读取一致）
+        """
+        # 与 content.split('\n') 的行数一致：n 个换行对应 n + 1 行
+        lines = 1
+        characters = 0
+        headings = 0
+        page = 0
+        
+        with open(file_path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            # 空文件无法映射
+            chunks = _mapped_chunks(file, size) if size else iter([b""])
+            for chunk in chunks:
+                text = chunk.decode('utf-8')
+                if '\r' in text:
+                    text = text.replace('\r\n', '\n').replace('\r', '\n')
+                
+                # 每块都从行首开始，块首的 # 单独计入
+                lines += text.count('\n')
+                characters += len(text)
+                headings += text.count('\n#') + text.startswith('#')
+                
+                page += 1
+                yield {"page": page, "text": text, "tables": None}
+        
+        metadata.update({
+            'lines': lines,
+            'characters': characters,
+            'headings': headings
+        })
+    
+    def extract_tables(
+        self,
+        file_path: Union[str, Path],
+        pages: Optional[List[int]] = None
+    ) -> List[list]:
+        """
+        按需提取表格
+        
+        以 text 档位解析后，在确实需要表格时再调用，只为指定页付出表格提取的开销
+        
+        Args:
+            file_path: 文档文件路径
+            pages: PDF 页码列表（从 1 开始），默认所有页；Word 文档忽略该参数
+            
+        Returns:
+            表格列表
+        """
+        file_path = Path(file_path)
+        file_format = self._identify_format(file_path)
+        
+        if file_format == 'word':
+            from docx import Document
+            return _word_tables(Document(file_path))
+        
+        if file_format != 'pdf' or self.available_parsers.get('pdf') != 'pdfplumber':
+            return []
+        
+        import pdfplumber
+        
+        tables = []
+        with pdfplumber.open(file_path) as pdf:
+            for number in pages or range(1, len(pdf.pages) + 1):
+                page = pdf.pages[number - 1]
+                tables.extend(page.extract_tables())
+                page.flush_cache()
+        return tables
     
     @classmethod
     def get_supported_formats(cls) -> list:
@@ -262,18 +871,26 @@ class DocumentParser:
 
 
 # 便捷函数
-def parse_document(file_path: Union[str, Path]) -> Dict:
+def parse_document(
+    file_path: Union[str, Path],
+    profile: Optional[str] = None,
+    use_cache: bool = True,
+    max_chars: Optional[int] = None
+) -> Dict:
     """
     便捷的文档解析函数
     
     Args:
         file_path: 文档路径
+        profile: 解析档位（text/tables/full）
+        use_cache: 是否使用磁盘解析缓存
+        max_chars: 全文长度上限
         
     Returns:
         解析结果字典
     """
-    parser = DocumentParser()
-    return parser.parse(file_path)
+    parser = DocumentParser(use_cache=use_cache)
+    return parser.parse(file_path, profile, max_chars)
 
 
 if __name__ == "__main__":
@@ -3,15 +3,49 @@ LangGraph 数据分析工作流
 整合文档解析、指标计算、AI 分析的完整流程
 """
 
-from typing import Dict, Any, TypedDict
+from typing import Dict, Any, AsyncGenerator, List, Optional, Tuple, TypedDict
 from typing_extensions import Annotated
+import asyncio
+import json
 import logging
+import operator
+import os
+import threading
+
+from analysis.concurrency import ConcurrencyLimiter
+from analysis.document_parser import get_max_material_chars
+from analysis.workflow_checkpoint import (
+    WorkflowCheckpointer,
+    checkpointed_node,
+    get_checkpointer,
+    material_hash,
+)
 
 logger = logging.getLogger(__name__)
 
+# 进程级工作流并发上限（所有批量请求共享），可通过 WORKFLOW_MAX_CONCURRENCY 覆盖
+DEFAULT_WORKFLOW_CONCURRENCY = 4
+_workflow_semaphore: Optional[ConcurrencyLimiter] = None
+_workflow_semaphore_lock = threading.Lock()
+
+
+def get_workflow_semaphore() -> ConcurrencyLimiter:
+    """获取进程级的工作流并发限制器（不绑定事件循环），限制同时执行的工作流数量"""
+    global _workflow_semaphore
+    with _workflow_semaphore_lock:
+        if _workflow_semaphore is None:
+            limit = int(os.getenv("WORKFLOW_MAX_CONCURRENCY", DEFAULT_WORKFLOW_CONCURRENCY))
+            _workflow_semaphore = ConcurrencyLimiter(limit)
+        return _workflow_semaphore
+
 # 检查 LangGraph 是否可用
 try:
     from langgraph.graph import StateGraph, END
+    from langchain_core.runnables import RunnableLambda
+    try:
+        from langgraph.types import Send
+    except ImportError:
+        from langgraph.constants import Send
     LANGGRAPH_AVAILABLE = True
 except ImportError:
     LANGGRAPH_AVAILABLE = False
@@ -24,15 +58,22 @@ class AnalysisState(TypedDict):
     # 输入
     document_id: str                    # 文档 ID（可选）
     material: str                        # 直接提供的材料（可选）
-    investor_id: str                     # 投资者 ID
+    tables: List[List[List[str]]]        # 文档解析出的表格（可选，用于表格指标提取）
+    investor_id: str                     # 投资者 ID（单一视角，或多视角时的首位投资者）
+    investor_ids: List[str]              # 投资者 ID 列表（每位投资者一个并行分析分支）
     llm_provider: str                    # LLM 提供商
     additional_context: str              # 额外上下文
+    use_cache: bool                      # 是否使用 LLM 响应缓存
+    material_hash: str                   # 材料内容哈希（检查点键）
+    resume: bool                         # 是否复用已成功节点的检查点
+    material_truncated: bool             # 材料是否因超过长度上限被截断
     
     # 中间结果
     parsed_data: Dict[str, Any]          # 解析后的数据
     calculated_metrics: Dict[str, Any]   # 计算的指标
-    analysis_result: str                 # AI 分析结果
-    investor_info: Dict[str, Any]        # 投资者信息
+    analyses: Annotated[List[Dict[str, Any]], operator.add]  # 各分支的分析结果（并行追加）
+    analysis_result: str                 # AI 分析结果（首位投资者）
+    investor_info: Dict[str, Any]        # 投资者信息（首位投资者）
     
     # 最终输出
     final_report: Dict[str, Any]         # 最终报告
@@ -40,47 +81,70 @@ class AnalysisState(TypedDict):
     # 元数据
     error: str                           # 错误信息
     completed_at: str                    # 完成时间
+    resumed_nodes: List[str]             # 从检查点恢复的顺序节点（分析分支在条目上标记 resumed）
 
 
 class DataAnalysisWorkflow:
     """数据分析工作流 - 基于 LangGraph"""
     
-    def __init__(self, llm_provider: str = "siliconflow"):
+    def __init__(
+        self,
+        llm_provider: str = "siliconflow",
+        checkpointer: Optional[WorkflowCheckpointer] = None
+    ):
         """
         初始化工作流
         
         Args:
             llm_provider: LLM 提供商（siliconflow/deepseek/qwen 等）
+            checkpointer: 节点检查点存储，默认使用全局实例（get_checkpointer）
         """
         if not LANGGRAPH_AVAILABLE:
             raise ImportError("需要安装 LangGraph: pip install langgraph")
         
         self.llm_provider = llm_provider
+        self.checkpointer = checkpointer if checkpointer is not None else get_checkpointer()
         self.workflow = self._build_workflow()
     
     def _build_workflow(self) -> StateGraph:
         """
         构建工作流图
         
-        流程: 解析 → 计算 → 分析 → 汇总
+        流程: 解析 → 计算 → 分析（每位投资者一个并行分支）→ 汇总
+        
+        解析和计算只执行一次，随后通过 Send 为 investor_ids 中的每位投资者
+        派发一个 analyze 分支，各分支结果经 analyses 的 reducer 合并后进入汇总
+        
+        解析和分析节点同时注册同步/异步实现：invoke 走同步版本，
+        ainvoke 走异步版本，LLM 等待直接在事件循环上完成。
+        计算和汇总是短时 CPU 操作，只有同步实现
+        
+        配置了检查点存储时，解析、计算、分析节点的成功输出按材料哈希保存，
+        重跑同一材料时直接复用，只重新执行失败的步骤；汇总总是重新生成
         """
-        from analysis.nodes.parse_node import parse_document_node_sync
+        from analysis.nodes.parse_node import parse_document_node, parse_document_node_sync
         from analysis.nodes.calculate_node import calculate_metrics_node
-        from analysis.nodes.analyze_node import llm_analyze_node
+        from analysis.nodes.analyze_node import llm_analyze_node, allm_analyze_node
         from analysis.nodes.summarize_node import summarize_node
         
         # 创建状态图
         workflow = StateGraph(AnalysisState)
         
         # 添加节点
-        workflow.add_node("parse", parse_document_node_sync)
-        workflow.add_node("calculate", calculate_metrics_node)
-        workflow.add_node("analyze", llm_analyze_node)
+        workflow.add_node(
+            "parse",
+            self._node("parse", parse_document_node_sync, parse_document_node)
+        )
+        workflow.add_node("calculate", self._node("calculate", calculate_metrics_node))
+        workflow.add_node(
+            "analyze",
+            self._node("analyze", llm_analyze_node, allm_analyze_node)
+        )
         workflow.add_node("summarize", summarize_node)
         
         # 定义边（流程连接）
         workflow.add_edge("parse", "calculate")
-        workflow.add_edge("calculate", "analyze")
+        workflow.add_conditional_edges("calculate", _fan_out_analyses, ["analyze"])
         workflow.add_edge("analyze", "summarize")
         workflow.add_edge("summarize", END)
         
@@ -93,12 +157,24 @@ class DataAnalysisWorkflow:
         logger.info("✓ LangGraph 工作流已构建")
         return app
     
+    def _node(self, name: str, func, afunc=None):
+        """构建节点（配置了检查点存储时包装检查点逻辑）"""
+        if self.checkpointer is None:
+            return RunnableLambda(func, afunc=afunc) if afunc else func
+        
+        run, arun = checkpointed_node(name, self.checkpointer, func, afunc)
+        return RunnableLambda(run, afunc=arun)
+    
     def run(
         self,
         material: str,
         investor_id: str = "buffett",
         document_id: str = None,
-        additional_context: str = None
+        additional_context: str = None,
+        use_cache: bool = True,
+        investor_ids: Optional[List[str]] = None,
+        resume: bool = False,
+        tables: Optional[List[List[List[str]]]] = None
     ) -> Dict[str, Any]:
         """
         执行完整的分析工作流（同步版本）
@@ -108,38 +184,30 @@ class DataAnalysisWorkflow:
             investor_id: 投资者 ID
             document_id: 文档 ID（可选）
             additional_context: 额外上下文
+            use_cache: 是否使用 LLM 响应缓存
+            investor_ids: 多个投资者 ID（可选），提供时并行分析并生成合并报告
+            resume: 是否复用已成功节点的检查点（仅重跑失败的步骤）
+            tables: 文档解析出的表格（可选），用于提取多期指标
             
         Returns:
             包含 final_report 的结果字典
         """
-        # 初始化状态
-        initial_state = {
-            "document_id": document_id,
-            "material": material,
-            "investor_id": investor_id,
-            "llm_provider": self.llm_provider,
-            "additional_context": additional_context,
-            "parsed_data": None,
-            "calculated_metrics": None,
-            "analysis_result": None,
-            "investor_info": None,
-            "final_report": None,
-            "error": None,
-            "completed_at": None
-        }
+        initial_state = self._initial_state(
+            material=material,
+            investor_id=investor_id,
+            document_id=document_id,
+            additional_context=additional_context,
+            use_cache=use_cache,
+            investor_ids=investor_ids,
+            resume=resume,
+            tables=tables
+        )
         
         try:
             # 执行工作流
-            logger.info(f"🚀 开始执行分析工作流 (投资者: {investor_id})")
+            logger.info(f"🚀 开始执行分析工作流 (投资者: {initial_state['investor_ids']})")
             result = self.workflow.invoke(initial_state)
-            
-            # 检查是否有错误
-            if result.get("error"):
-                logger.error(f"工作流执行出错: {result['error']}")
-            else:
-                logger.info("✅ 工作流执行完成")
-            
-            return result
+            return self._finish(result)
             
         except Exception as e:
             logger.error(f"工作流执行失败: {str(e)}")
@@ -154,34 +222,253 @@ class DataAnalysisWorkflow:
         material: str,
         investor_id: str = "buffett",
         document_id: str = None,
-        additional_context: str = None
+        additional_context: str = None,
+        use_cache: bool = True,
+        investor_ids: Optional[List[str]] = None,
+        resume: bool = False,
+        tables: Optional[List[List[List[str]]]] = None
     ) -> Dict[str, Any]:
         """
         执行完整的分析工作流（异步版本）
         
+        基于 ainvoke 原生异步执行，并发请求在事件循环上复用，不占用线程池
+        
         Args:
             material: 分析材料文本
             investor_id: 投资者 ID
             document_id: 文档 ID（可选）
             additional_context: 额外上下文
+            use_cache: 是否使用 LLM 响应缓存
+            investor_ids: 多个投资者 ID（可选），提供时并行分析并生成合并报告
+            resume: 是否复用已成功节点的检查点（仅重跑失败的步骤）
+            tables: 文档解析出的表格（可选），用于提取多期指标
             
         Returns:
             包含 final_report 的结果字典
         """
-        import asyncio
-        
-        # 在线程池中执行同步工作流
-        result = await asyncio.to_thread(
-            self.run,
+        initial_state = self._initial_state(
             material=material,
             investor_id=investor_id,
             document_id=document_id,
-            additional_context=additional_context
+            additional_context=additional_context,
+            use_cache=use_cache,
+            investor_ids=investor_ids,
+            resume=resume,
+            tables=tables
         )
         
+        try:
+            logger.info(f"🚀 开始执行分析工作流 (投资者: {initial_state['investor_ids']})")
+            result = await self.workflow.ainvoke(initial_state)
+            return self._finish(result)
+            
+        except Exception as e:
+            logger.error(f"工作流执行失败: {str(e)}")
+            return {
+                **initial_state,
+                "error": str(e),
+                "final_report": None
+            }
+    
+    async def run_batch(
+        self,
+        items: List[Dict[str, Any]],
+        investor_ids: Optional[List[str]] = None,
+        additional_context: str = None,
+        use_cache: bool = True,
+        resume: bool = False,
+        max_concurrency: Optional[int] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        批量执行工作流（N 份材料 × M 位投资者），按完成顺序逐条产出结果
+        
+        每份材料执行一次工作流，工作流内为每位投资者派发并行分析分支。
+        所有批量请求共享进程级并发上限（get_workflow_semaphore），
+        max_concurrency 可进一步限制本批次的并发；LLM 调用另受提供商信号量约束。
+        工作流输入（截断后的材料、表格、投资者和额外上下文）相同的条目只执行一次，
+        其余条目复用结果并标记 deduplicated
+        
+        Args:
+            items: 批量条目，每项包含 item_id，以及 material（材料文本，可附带 tables）
+                   或 loader（在并发槽位内调用的异步函数，返回材料文本，
+                   或 {"material": ..., "tables": ...}）
+            investor_ids: 投资者 ID 列表
+            additional_context: 额外上下文
+            use_cache: 是否使用 LLM 响应缓存
+            resume: 是否复用已成功节点的检查点
+            max_concurrency: 本批次的并发上限（可选）
+            
+        Yields:
+            每个条目的结果：index、item_id、material_hash、deduplicated、result
+            （result 为工作流结果，不含材料原文）；加载失败时 result 为 None，附带 error
+        """
+        investor_ids = list(investor_ids or ["buffett"])
+        global_semaphore = get_workflow_semaphore()
+        batch_semaphore = asyncio.Semaphore(max_concurrency or len(items) or 1)
+        inflight: Dict[str, asyncio.Future] = {}
+        
+        async def run_one(material: str, tables: Optional[List]) -> Dict[str, Any]:
+            async with batch_semaphore, global_semaphore:
+                result = await self.run_async(
+                    material=material,
+                    investor_ids=investor_ids,
+                    additional_context=additional_context,
+                    use_cache=use_cache,
+                    resume=resume,
+                    tables=tables
+                )
+            result.pop("material", None)
+            result.pop("tables", None)
+            return result
+        
+        async def process(index: int, item: Dict[str, Any]) -> Dict[str, Any]:
+            entry = {"index": index, "item_id": item.get("item_id", str(index))}
+            try:
+                material, tables = item.get("material"), item.get("tables")
+                if material is None:
+                    async with batch_semaphore:
+                        loaded = await item["loader"]()
+                    if isinstance(loaded, dict):
+                        material, tables = loaded.get("material") or "", loaded.get("tables")
+                    else:
+                        material = loaded
+            except Exception as e:
+                logger.error(f"批量条目加载失败 ({entry['item_id']}): {str(e)}")
+                return {**entry, "material_hash": None, "deduplicated": False,
+                        "result": None, "error": str(e)}
+            
+            # 与 _initial_state 相同的截断规则，超出上限部分不同的材料视为相同输入
+            digest = material_hash(_truncate_material(material, warn=False)[0])
+            key = material_hash(json.dumps(
+                [digest, tables, investor_ids, additional_context],
+                ensure_ascii=False, default=str
+            ))
+            shared = inflight.get(key)
+            if shared is not None:
+                result = await asyncio.shield(shared)
+                return {**entry, "material_hash": digest, "deduplicated": True,
+                        "result": result, "error": result.get("error")}
+            
+            shared = asyncio.get_running_loop().create_future()
+            inflight[key] = shared
+            try:
+                result = await run_one(material, tables)
+            except BaseException as e:
+                shared.set_exception(e)
+                # 重复条目会从 future 中取到异常，避免"未检索的异常"警告
+                shared.exception()
+                raise
+            shared.set_result(result)
+            return {**entry, "material_hash": digest, "deduplicated": False,
+                    "result": result, "error": result.get("error")}
+        
+        logger.info(f"🚀 开始批量工作流 ({len(items)} 份材料 × {len(investor_ids)} 位投资者)")
+        tasks = [asyncio.create_task(process(i, item)) for i, item in enumerate(items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # 客户端断开时取消尚未完成的条目
+            for task in tasks:
+                task.cancel()
+    
+    def _initial_state(
+        self,
+        material: str,
+        investor_id: str,
+        document_id: str,
+        additional_context: str,
+        use_cache: bool,
+        investor_ids: Optional[List[str]] = None,
+        resume: bool = False,
+        tables: Optional[List[List[List[str]]]] = None
+    ) -> Dict[str, Any]:
+        """构建工作流初始状态（超过长度上限的材料在此截断）"""
+        investor_ids = list(investor_ids or [investor_id])
+        material, truncated = _truncate_material(material)
+        
+        return {
+            "document_id": document_id,
+            "material": material,
+            "tables": tables,
+            "investor_id": investor_ids[0],
+            "investor_ids": investor_ids,
+            "llm_provider": self.llm_provider,
+            "additional_context": additional_context,
+            "use_cache": use_cache,
+            "material_hash": material_hash(material),
+            "resume": resume,
+            "material_truncated": truncated,
+            "parsed_data": None,
+            "calculated_metrics": None,
+            "analyses": [],
+            "analysis_result": None,
+            "investor_info": None,
+            "final_report": None,
+            "error": None,
+            "completed_at": None,
+            "resumed_nodes": []
+        }
+    
+    def _finish(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """记录工作流执行结果"""
+        if result.get("error"):
+            logger.error(f"工作流执行出错: {result['error']}")
+        else:
+            logger.info("✅ 工作流执行完成")
+        
+        resumed = list(result.get("resumed_nodes") or []) + [
+            f"analyze:{a['investor_id']}"
+            for a in result.get("analyses") or [] if a.get("resumed")
+        ]
+        if resumed:
+            logger.info(f"♻️  从检查点恢复的节点: {resumed}")
         return result
 
 
+def _truncate_material(material: Optional[str], warn: bool = True) -> Tuple[Optional[str], bool]:
+    """
+    按材料长度上限截断材料
+    
+    Args:
+        material: 材料文本
+        warn: 发生截断时是否记录警告
+    
+    Returns:
+        (截断后的材料, 是否发生截断)
+    """
+    max_chars = get_max_material_chars()
+    if not (material and max_chars and len(material) > max_chars):
+        return material, False
+    
+    if warn:
+        logger.warning(f"⚠️  材料长度 {len(material):,} 超过上限 {max_chars:,}，已截断")
+    return material[:max_chars], True
+
+
+# analyze 分支需要的状态字段（Send 只传递这些字段，不复制整个状态）
+_ANALYZE_BRANCH_KEYS = (
+    "material",
+    "parsed_data",
+    "calculated_metrics",
+    "llm_provider",
+    "additional_context",
+    "use_cache",
+    "material_hash",
+    "resume",
+)
+
+
+def _fan_out_analyses(state: Dict[str, Any]) -> List["Send"]:
+    """为每位投资者派发一个并行的 analyze 分支"""
+    investor_ids = state.get("investor_ids") or [state.get("investor_id", "buffett")]
+    branch_state = {key: state.get(key) for key in _ANALYZE_BRANCH_KEYS}
+    return [
+        Send("analyze", {**branch_state, "investor_id": investor_id})
+        for investor_id in investor_ids
+    ]
+
+
 # 便捷函数
 def create_workflow(llm_provider: str = "siliconflow") -> DataAnalysisWorkflow:
     """
@@ -4,6 +4,7 @@
 """
 
 import json
+import threading
 from typing import Dict, List, Optional
 from pathlib import Path
 from pydantic import BaseModel, Field
@@ -218,6 +219,20 @@ class InvestorProfileManager:
         print("\n" + "="*80)
 
 
+# 全局画像管理器实例
+_profile_manager = None
+_profile_manager_lock = threading.Lock()
+
+
+def get_profile_manager() -> InvestorProfileManager:
+    """获取进程共享的投资者画像管理器（单例模式，JSON 只加载一次）"""
+    global _profile_manager
+    with _profile_manager_lock:
+        if _profile_manager is None:
+            _profile_manager = InvestorProfileManager()
+    return _profile_manager
+
+
 # 便捷函数
 def load_investor_profile(investor_id: str) -> Optional[InvestorProfile]:
     """
@@ -229,8 +244,7 @@ def load_investor_profile(investor_id: str) -> Optional[InvestorProfile]:
     Returns:
         投资者画像对象
     """
-    manager = InvestorProfileManager()
-    return manager.get_profile(investor_id)
+    return get_profile_manager().get_profile(investor_id)
 
 
 def list_all_investors() -> List[str]:
@@ -240,8 +254,7 @@ def list_all_investors() -> List[str]:
     Returns:
         投资者名称列表
     """
-    manager = InvestorProfileManager()
-    return manager.get_profile_names()
+    return get_profile_manager().get_profile_names()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,216 @@
+"""
+LLM 响应缓存模块
+以 (provider, model, temperature, 系统提示词, 分析提示词) 的哈希为键缓存 LLM 输出，
+相同材料重复提交给同一投资者时直接返回缓存结果
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+
+class LLMResponseCache:
+    """LLM 响应缓存基类，子类实现 _get/_set（同步）和可选的 _aget/_aset（异步）"""
+
+    backend = "base"
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        llm_provider: str,
+        model: Optional[str],
+        temperature: float,
+        system_prompt: str,
+        analysis_prompt: str,
+    ) -> str:
+        """
+        生成内容寻址的缓存键
+
+        Returns:
+            SHA-256 十六进制摘要
+        """
+        payload = json.dumps(
+            [llm_provider, model, temperature, system_prompt, analysis_prompt],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存（同步），未命中返回 None"""
+        return self._record(self._get(key))
+
+    def set(self, key: str, value: str):
+        """写入缓存（同步）"""
+        self._set(key, value)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """读取缓存（异步），未命中返回 None"""
+        return self._record(await self._aget(key))
+
+    async def aset(self, key: str, value: str):
+        """写入缓存（异步）"""
+        await self._aset(key, value)
+
+    def stats(self) -> Dict:
+        """获取命中统计"""
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {
+                "backend": self.backend,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def _record(self, value: Optional[str]) -> Optional[str]:
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def _get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def _set(self, key: str, value: str):
+        raise NotImplementedError
+
+    async def _aget(self, key: str) -> Optional[str]:
+        return self._get(key)
+
+    async def _aset(self, key: str, value: str):
+        self._set(key, value)
+
+
+class InMemoryLLMCache(LLMResponseCache):
+    """进程内 LRU 缓存，支持 TTL 过期"""
+
+    backend = "memory"
+
+    def __init__(self, max_size: int = 512, ttl_seconds: int = 86400):
+        """
+        Args:
+            max_size: 最大缓存条目数，超出后淘汰最久未使用的条目
+            ttl_seconds: 缓存有效期（秒）
+        """
+        super().__init__()
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        stats = super().stats()
+        stats["size"] = len(self._entries)
+        stats["max_size"] = self.max_size
+        return stats
+
+
+class MongoLLMCache(LLMResponseCache):
+    """
+    MongoDB 缓存后端
+
+    通过 AnalysisRecordManager 读写缓存集合，过期由 TTL 索引自动清理
+    （索引在 AnalysisRecordManager.ensure_indexes 中创建）
+    """
+
+    backend = "mongodb"
+
+    def __init__(self, db_manager=None, ttl_seconds: int = 86400):
+        """
+        Args:
+            db_manager: AnalysisRecordManager 实例，默认使用全局实例
+            ttl_seconds: 缓存有效期（秒）
+        """
+        super().__init__()
+        if db_manager is None:
+            from storage.db_manager import get_record_manager
+            db_manager = get_record_manager()
+
+        self.db_manager = db_manager
+        self.ttl_seconds = ttl_seconds
+
+    def _expires_at(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+
+    def _get(self, key: str) -> Optional[str]:
+        return self.db_manager.get_cached_response_sync(key)
+
+    def _set(self, key: str, value: str):
+        self.db_manager.save_cached_response_sync(key, value, self._expires_at())
+
+    async def _aget(self, key: str) -> Optional[str]:
+        return await self.db_manager.get_cached_response(key)
+
+    async def _aset(self, key: str, value: str):
+        await self.db_manager.save_cached_response(key, value, self._expires_at())
+
+
+# 全局缓存实例
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    获取全局 LLM 响应缓存（单例模式）
+
+    由环境变量配置：
+    - LLM_CACHE_BACKEND: memory（默认）/ mongodb / none
+    - LLM_CACHE_TTL: 缓存有效期（秒），默认 86400
+    - LLM_CACHE_MAX_SIZE: 内存缓存最大条目数，默认 512
+
+    Returns:
+        缓存实例，禁用时返回 None
+    """
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            backend = os.getenv("LLM_CACHE_BACKEND", "memory").lower()
+            ttl_seconds = int(os.getenv("LLM_CACHE_TTL", "86400"))
+
+            if backend == "none":
+                return None
+            if backend == "mongodb":
+                try:
+                    _llm_cache = MongoLLMCache(ttl_seconds=ttl_seconds)
+                except Exception as e:
+                    print(f"⚠️  MongoDB 缓存初始化失败，改用内存缓存: {e}")
+
+            if _llm_cache is None:
+                _llm_cache = InMemoryLLMCache(
+                    max_size=int(os.getenv("LLM_CACHE_MAX_SIZE", "512")),
+                    ttl_seconds=ttl_seconds,
+                )
+        return _llm_cache
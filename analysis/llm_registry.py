@@ -0,0 +1,255 @@
+"""
+LLM 客户端注册表
+进程级共享 LLM 客户端、HTTP 连接池、投资者画像管理器和分析器实例，
+避免每次请求重复构建客户端、重新建立 TLS 连接和重新加载画像 JSON
+"""
+
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
+from langchain_openai import ChatOpenAI
+from langchain_community.chat_models import ChatZhipuAI
+from pydantic import SecretStr
+
+from .concurrency import ConcurrencyLimiter
+from .investor_profiles import get_profile_manager
+
+
+# OpenAI 兼容接口的提供商
+OPENAI_COMPATIBLE_PROVIDERS = ["deepseek", "qwen", "openai", "siliconflow"]
+
+# 各 LLM 提供商的默认并发上限（进程级共享）
+# 可通过环境变量 <PROVIDER>_MAX_CONCURRENCY 或 LLM_MAX_CONCURRENCY 覆盖
+DEFAULT_PROVIDER_CONCURRENCY = {
+    "deepseek": 5,
+    "qwen": 5,
+    "zhipu": 3,
+    "openai": 8,
+    "siliconflow": 5,
+}
+
+_registry_lock = threading.Lock()
+_llm_clients: Dict[Tuple, object] = {}
+_http_clients: Dict[str, Tuple[httpx.Client, httpx.AsyncClient]] = {}
+_analyzers: Dict[Tuple, object] = {}
+
+_provider_semaphores: Dict[str, ConcurrencyLimiter] = {}
+
+
+def get_provider_concurrency(llm_provider: str) -> int:
+    """
+    获取指定 LLM 提供商的并发上限
+
+    优先级：<PROVIDER>_MAX_CONCURRENCY > LLM_MAX_CONCURRENCY > 内置默认值
+
+    Args:
+        llm_provider: LLM提供商
+
+    Returns:
+        最大并发请求数（至少为 1）
+    """
+    provider = llm_provider.lower()
+    env_value = os.getenv(f"{provider.upper()}_MAX_CONCURRENCY") or os.getenv(
+        "LLM_MAX_CONCURRENCY"
+    )
+    if env_value:
+        try:
+            return max(1, int(env_value))
+        except ValueError:
+            print(f"⚠️  无效的并发配置: {env_value}，使用默认值")
+    return DEFAULT_PROVIDER_CONCURRENCY.get(provider, 4)
+
+
+def get_provider_semaphore(llm_provider: str) -> ConcurrencyLimiter:
+    """
+    获取提供商级别的并发限制器，所有分析器实例共享同一个并发上限
+
+    同步路径（with）和异步路径（async with，任意事件循环）共用同一计数
+    """
+    with _registry_lock:
+        semaphore = _provider_semaphores.get(llm_provider)
+        if semaphore is None:
+            semaphore = ConcurrencyLimiter(get_provider_concurrency(llm_provider))
+            _provider_semaphores[llm_provider] = semaphore
+        return semaphore
+
+
+def resolve_llm_config(
+    llm_provider: str,
+    api_key: Optional[str] = None,
+    model_name: Optional[str] = None,
+) -> Tuple[str, str, Optional[str]]:
+    """
+    解析提供商的 API 密钥、模型名称和接口地址
+
+    Args:
+        llm_provider: LLM提供商 (deepseek/qwen/zhipu/openai/siliconflow)
+        api_key: API密钥，如果不提供则从环境变量读取
+        model_name: 模型名称，如果不提供则使用默认模型
+
+    Returns:
+        (api_key, model, base_url)
+    """
+    llm_provider = llm_provider.lower()
+
+    # 初始化默认值
+    default_model = None
+    base_url = None
+
+    # 从环境变量获取API密钥
+    if api_key is None:
+        if llm_provider == "deepseek":
+            api_key = os.getenv("DEEPSEEK_API_KEY")
+            default_model = "deepseek-chat"
+            base_url = "https://api.deepseek.com"
+        elif llm_provider == "qwen":
+            api_key = os.getenv("QWEN_API_KEY")
+            default_model = "qwen-max"
+            base_url = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+        elif llm_provider == "zhipu":
+            api_key = os.getenv("ZHIPU_API_KEY")
+            default_model = "glm-4"
+            base_url = None
+        elif llm_provider == "openai":
+            api_key = os.getenv("OPENAI_API_KEY")
+            default_model = "gpt-4o-mini"
+            base_url = None
+        elif llm_provider == "siliconflow":
+            api_key = os.getenv("SILICONFLOW_API_KEY")
+            default_model = os.getenv(
+                "SILICONFLOW_MODEL", "deepseek-ai/DeepSeek-V3.1-Terminus"
+            )
+            base_url = os.getenv(
+                "SILICONFLOW_API_BASE_URL", "https://api.siliconflow.cn/v1"
+            )
+        else:
+            raise ValueError(f"不支持的LLM提供商: {llm_provider}")
+
+    if not api_key:
+        raise ValueError(f"未找到 {llm_provider.upper()} 的API密钥")
+
+    # 使用提供的模型名称或默认模型
+    model = model_name or default_model
+
+    if not model:
+        raise ValueError(f"未找到 {llm_provider.upper()} 的默认模型名称")
+
+    return api_key, model, base_url
+
+
+def _get_http_clients(llm_provider: str) -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """获取提供商共享的 HTTP 客户端（保持长连接，连接池大小与并发上限一致）"""
+    clients = _http_clients.get(llm_provider)
+    if clients is None:
+        pool_size = get_provider_concurrency(llm_provider)
+        limits = httpx.Limits(
+            max_connections=pool_size * 2,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=60,
+        )
+        clients = (httpx.Client(limits=limits), httpx.AsyncClient(limits=limits))
+        _http_clients[llm_provider] = clients
+    return clients
+
+
+def get_llm(
+    llm_provider: str,
+    model_name: Optional[str] = None,
+    temperature: float = 0.7,
+    api_key: Optional[str] = None,
+):
+    """
+    获取共享的 LLM 客户端
+
+    按 (provider, model, temperature) 缓存，同一配置在进程内只构建一次，
+    同一提供商的所有客户端共用一个 HTTP 连接池
+
+    Args:
+        llm_provider: LLM提供商
+        model_name: 模型名称，默认使用提供商默认模型
+        temperature: 温度参数
+        api_key: API密钥，默认从环境变量读取
+
+    Returns:
+        (LLM 客户端, 实际使用的模型名称)
+    """
+    llm_provider = llm_provider.lower()
+    api_key, model, base_url = resolve_llm_config(llm_provider, api_key, model_name)
+    cache_key = (llm_provider, model, temperature, api_key)
+
+    with _registry_lock:
+        llm = _llm_clients.get(cache_key)
+        if llm is not None:
+            return llm, model
+
+        # 创建LLM客户端
+        if llm_provider in OPENAI_COMPATIBLE_PROVIDERS:
+            http_client, http_async_client = _get_http_clients(llm_provider)
+            llm = ChatOpenAI(
+                model=model,
+                api_key=SecretStr(api_key),
+                base_url=base_url if llm_provider not in ["openai"] else None,
+                temperature=temperature,
+                http_client=http_client,
+                http_async_client=http_async_client,
+            )
+        elif llm_provider == "zhipu":
+            llm = ChatZhipuAI(
+                model=model, api_key=api_key, temperature=temperature
+            )
+        else:
+            raise ValueError(f"不支持的LLM提供商: {llm_provider}")
+
+        _llm_clients[cache_key] = llm
+        print(f"✓ 已初始化 {llm_provider.upper()} LLM: {model}")
+        return llm, model
+
+
+def get_analyzer(
+    llm_provider: str = "siliconflow",
+    model_name: Optional[str] = None,
+    temperature: float = 0.7,
+    enable_db: bool = True,
+):
+    """
+    获取共享的 PerspectiveAnalyzer 实例
+
+    Args:
+        llm_provider: LLM提供商
+        model_name: 模型名称
+        temperature: 温度参数
+        enable_db: 是否启用数据库保存功能
+
+    Returns:
+        PerspectiveAnalyzer 实例
+    """
+    from .perspective_analyzer import PerspectiveAnalyzer
+
+    cache_key = (llm_provider.lower(), model_name, temperature, enable_db)
+    analyzer = _analyzers.get(cache_key)
+    if analyzer is None:
+        analyzer = PerspectiveAnalyzer(
+            llm_provider=llm_provider,
+            model_name=model_name,
+            temperature=temperature,
+            enable_db=enable_db,
+        )
+        # 并发首次创建时保留先注册的实例
+        analyzer = _analyzers.setdefault(cache_key, analyzer)
+    return analyzer
+
+
+async def aclose_llm_clients():
+    """关闭所有共享的 HTTP 连接（应用关闭时调用）"""
+    with _registry_lock:
+        clients = list(_http_clients.values())
+        _http_clients.clear()
+        _llm_clients.clear()
+        _analyzers.clear()
+
+    for http_client, http_async_client in clients:
+        http_client.close()
+        await http_async_client.aclose()
+
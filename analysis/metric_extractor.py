@@ -0,0 +1,292 @@
+"""
+财务指标提取引擎
+将所有指标标签编译为一个交替正则，一次扫描全文即可找到全部指标，
+新增指标只需注册定义，不会增加全文扫描次数
+"""
+
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# 标签与数值之间的分隔符，以及数值本身（支持负数和千分位）
+_SEPARATOR = r"[：:=\s]*"
+_NUMBER = r"-?\d[\d,]*\.?\d*"
+_TRAILING_NUMBER = re.compile(_NUMBER + "$")
+
+
+@dataclass
+class MetricDefinition:
+    """指标定义"""
+    key: str                                          # 指标键（如 pe_ratio）
+    labels: List[str]                                 # 标签正则片段（如 "PE"、"市盈率"）
+    description: str = ""                             # 指标说明
+    unit: str = ""                                    # 单位（%、倍、元等）
+    flags: int = field(default=re.IGNORECASE, repr=False)  # 标签的匹配标志
+
+
+# 内置指标定义（标签按原有正则保持兼容，并补充常见中文别名）
+DEFAULT_METRICS = [
+    MetricDefinition("pe_ratio", ["PE", "市盈率"], "市盈率", "倍"),
+    MetricDefinition("pb_ratio", ["PB", "市净率"], "市净率", "倍"),
+    MetricDefinition("roe", ["ROE", "净资产收益率"], "净资产收益率", "%"),
+    MetricDefinition("revenue_growth", ["营收增长率?", "营业收入增长率?"], "营收增长率", "%"),
+    MetricDefinition("gross_margin", ["毛利率"], "毛利率", "%"),
+    MetricDefinition("dividend_yield", ["股息率"], "股息率", "%"),
+    MetricDefinition("market_cap", ["市值"], "市值"),
+    MetricDefinition("debt_ratio", ["资产负债率", "负债率"], "资产负债率", "%"),
+    MetricDefinition("free_cash_flow", ["自由现金流", "FCF"], "自由现金流"),
+    MetricDefinition("eps", ["EPS", "每股收益"], "每股收益", "元"),
+]
+
+
+class MetricExtractor:
+    """
+    单次扫描的指标提取器
+
+    所有已注册指标的标签合并为一个命名分组的交替正则，
+    finditer 一次遍历文本即可得到每个指标的全部出现位置
+    """
+
+    def __init__(self, definitions: Optional[List[MetricDefinition]] = None):
+        """
+        Args:
+            definitions: 初始指标定义，默认使用 DEFAULT_METRICS
+        """
+        self._definitions: Dict[str, MetricDefinition] = {}
+        self._pattern: Optional[re.Pattern] = None
+        self._label_pattern: Optional[re.Pattern] = None
+        self._group_keys: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        for definition in definitions if definitions is not None else DEFAULT_METRICS:
+            self.register(definition)
+
+    @property
+    def keys(self) -> List[str]:
+        """已注册的指标键（按注册顺序）"""
+        return list(self._definitions)
+
+    @property
+    def definitions(self) -> List[MetricDefinition]:
+        """已注册的指标定义（按注册顺序）"""
+        return list(self._definitions.values())
+
+    def register(self, definition: MetricDefinition):
+        """
+        注册（或覆盖）一个指标定义，下次提取时重新编译正则
+
+        Args:
+            definition: 指标定义
+        """
+        if not definition.labels:
+            raise ValueError(f"指标 {definition.key} 至少需要一个标签")
+
+        with self._lock:
+            self._definitions[definition.key] = definition
+            self._pattern = None
+
+    def unregister(self, key: str):
+        """移除指标定义"""
+        with self._lock:
+            self._definitions.pop(key, None)
+            self._pattern = None
+
+    def _compile(self) -> Tuple[re.Pattern, Dict[str, str]]:
+        """编译合并后的交替正则（已编译时直接返回），同时返回分组名到指标键的映射"""
+        pattern, group_keys = self._pattern, self._group_keys
+        if pattern is not None:
+            return pattern, group_keys
+
+        with self._lock:
+            if self._pattern is None:
+                # 标签按长度降序排列，避免短标签抢先匹配长标签的前缀（如 PE 与 PEG）
+                labels = []
+                for index, definition in enumerate(self._definitions.values()):
+                    for label in definition.labels:
+                        labels.append((index, definition, label))
+                labels.sort(key=lambda item: len(item[2]), reverse=True)
+
+                group_keys = {}
+                alternatives = []
+                label_alternatives = []
+                for position, (index, definition, label) in enumerate(labels):
+                    group = f"m{index}_{position}"
+                    group_keys[group] = definition.key
+                    if definition.flags & re.IGNORECASE:
+                        label = f"(?i:{label})"
+                    # 每个分支整体作为命名分组，lastgroup 即可定位匹配的指标
+                    alternatives.append(f"(?P<{group}>(?:{label}){_SEPARATOR}{_NUMBER})")
+                    label_alternatives.append(f"(?P<{group}>{label})")
+
+                self._group_keys = group_keys
+                self._label_pattern = re.compile(r"\s*(?:" + "|".join(label_alternatives) + ")")
+                self._pattern = re.compile("|".join(alternatives))
+            return self._pattern, self._group_keys
+
+    def scan(self, text: str) -> Iterator[Tuple[str, float, int]]:
+        """
+        单次扫描文本，依次产出每个指标出现的位置
+
+        Args:
+            text: 文本内容
+
+        Yields:
+            (指标键, 数值, 文本位置)
+        """
+        if not text or not self._definitions:
+            return
+
+        pattern, group_keys = self._compile()
+        for match in pattern.finditer(text):
+            value = _parse_number(_TRAILING_NUMBER.search(match.group()).group())
+            if value is not None:
+                yield group_keys[match.lastgroup], value, match.start()
+
+    def match_label(self, label: str) -> Optional[str]:
+        """
+        判断表格行标签对应的指标（标签以指标名称开头即视为匹配）
+
+        Args:
+            label: 表格行标签，如 "营业收入增长率(%)"
+
+        Returns:
+            指标键，不匹配时返回 None
+        """
+        if not label or not self._definitions:
+            return None
+
+        self._compile()
+        match = self._label_pattern.match(label)
+        return self._group_keys[match.lastgroup] if match else None
+
+    def extract(self, text: str) -> Dict[str, Optional[float]]:
+        """
+        提取每个指标的首个数值
+
+        全部指标都找到后提前结束扫描
+
+        Args:
+            text: 文本内容
+
+        Returns:
+            {指标键: 数值}，未找到的指标为 None
+        """
+        accumulator = MetricAccumulator(self)
+        accumulator.feed(text)
+        return accumulator.metrics
+
+    def extract_all(self, text: str) -> Dict[str, List[float]]:
+        """
+        提取每个指标的全部数值（按出现顺序）
+
+        Args:
+            text: 文本内容
+
+        Returns:
+            {指标键: [数值, ...]}，未找到的指标为空列表
+        """
+        values: Dict[str, List[float]] = {key: [] for key in self._definitions}
+        for key, value, _ in self.scan(text):
+            values[key].append(value)
+        return values
+
+
+class MetricAccumulator:
+    """
+    增量指标提取
+
+    按页依次喂入文本（如 DocumentParser.parse_stream 产出的页面），
+    保留每个指标首次出现的数值；全部指标找到后不再扫描后续页面
+    """
+
+    def __init__(self, extractor: Optional[MetricExtractor] = None):
+        """
+        Args:
+            extractor: 指标提取器，默认使用全局实例
+        """
+        self.extractor = extractor or get_metric_extractor()
+        self.metrics: Dict[str, Optional[float]] = dict.fromkeys(self.extractor.keys)
+        self._remaining = len(self.metrics)
+
+    @property
+    def complete(self) -> bool:
+        """是否所有指标都已找到"""
+        return self._remaining == 0
+
+    @property
+    def found(self) -> Dict[str, float]:
+        """已找到的指标"""
+        return {key: value for key, value in self.metrics.items() if value is not None}
+
+    def feed(self, text: str) -> Dict[str, float]:
+        """
+        扫描一段文本
+
+        Args:
+            text: 页面文本
+
+        Returns:
+            本段文本中新找到的指标
+        """
+        new_metrics = {}
+        if self.complete:
+            return new_metrics
+
+        for key, value, _ in self.extractor.scan(text):
+            if key in self.metrics and self.metrics[key] is None:
+                self.metrics[key] = new_metrics[key] = value
+                self._remaining -= 1
+                if self._remaining == 0:
+                    break
+
+        return new_metrics
+
+
+def _parse_number(raw: str) -> Optional[float]:
+    """解析数值字符串（去除千分位逗号）"""
+    try:
+        return float(raw.replace(",", "").rstrip("."))
+    except ValueError:
+        return None
+
+
+# 全局提取器实例
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def get_metric_extractor() -> MetricExtractor:
+    """
+    获取全局指标提取器（单例模式）
+
+    Returns:
+        MetricExtractor 实例
+    """
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            _extractor = MetricExtractor()
+        return _extractor
+
+
+def register_metric(
+    key: str,
+    labels: List[str],
+    description: str = "",
+    unit: str = "",
+    flags: int = re.IGNORECASE
+):
+    """
+    向全局提取器注册新指标
+
+    Args:
+        key: 指标键
+        labels: 标签正则片段列表
+        description: 指标说明
+        unit: 单位
+        flags: 标签的匹配标志（默认忽略大小写）
+    """
+    get_metric_extractor().register(
+        MetricDefinition(key, labels, description, unit, flags)
+    )
@@ -0,0 +1,237 @@
+"""
+多期指标序列模块
+从正文和表格中提取按报告期索引的指标序列，并以 NumPy 矩阵运算
+计算 CAGR、同比变化和波动率等趋势特征
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from analysis.metric_extractor import MetricExtractor, get_metric_extractor
+from analysis.table_metrics import extract_table_series, latest_values
+
+logger = logging.getLogger(__name__)
+
+# 检查 NumPy 是否可用
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logger.warning("⚠️  numpy 未安装，趋势计算不可用，请运行: pip install numpy")
+
+# 正文中指标前方的报告期（如 "2023年营收增长：15%"、"2023 ROE: 20%"）
+# 排除紧跟数值单位的数字（如 "市值：2000亿"），避免误认作年份
+_YEAR_PATTERN = re.compile(r"(?<![\d.])((?:19|20)\d{2})(?![\d.,%％亿万元倍])")
+_YEAR_LOOKBEHIND = 30
+
+def extract_text_series(
+    text: str,
+    extractor: Optional[MetricExtractor] = None
+) -> Dict[str, Dict[str, List]]:
+    """
+    从正文中提取多期指标序列
+
+    复用提取器的单次扫描结果，每个指标值向前查找最近的年份作为报告期；
+    只保留至少有两个不同报告期的指标
+
+    Args:
+        text: 文本内容
+        extractor: 指标提取器，默认使用全局实例
+
+    Returns:
+        {指标键: {"periods": [...], "values": [...]}}，报告期按时间升序
+    """
+    extractor = extractor or get_metric_extractor()
+    by_period: Dict[str, Dict[str, float]] = {}
+
+    for key, value, position in extractor.scan(text):
+        window = text[max(0, position - _YEAR_LOOKBEHIND):position + 1]
+        years = _YEAR_PATTERN.findall(window)
+        if not years:
+            continue
+        # 同一报告期只保留首次出现的数值
+        by_period.setdefault(key, {}).setdefault(years[-1], value)
+
+    return {
+        key: {"periods": sorted(values), "values": [values[p] for p in sorted(values)]}
+        for key, values in by_period.items()
+        if len(values) >= 2
+    }
+
+
+def build_metric_series(
+    text: str,
+    tables: Optional[List] = None,
+    extractor: Optional[MetricExtractor] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    合并表格和正文中的多期指标序列（表格优先）
+
+    Args:
+        text: 文本内容
+        tables: 文档解析出的表格
+        extractor: 指标提取器
+
+    Returns:
+        {指标键: {"periods": [...], "values": [...], "source": "table"/"text"}}
+    """
+    series = {
+        key: {**item, "source": "table"}
+        for key, item in extract_table_series(tables, extractor).items()
+    }
+    for key, item in extract_text_series(text, extractor).items():
+        series.setdefault(key, {**item, "source": "text"})
+    return series
+
+
+def extract_document_metrics(
+    text: str,
+    tables: Optional[List] = None,
+    extractor: Optional[MetricExtractor] = None
+) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """
+    提取一份文档的指标和多期序列（单文档节点与批量计算共用的合并规则）
+
+    先取正文中首次出现的数值，再用序列（表格优先，其次正文中的年份）
+    最近一期的数值覆盖
+
+    Args:
+        text: 文本内容
+        tables: 文档解析出的表格
+        extractor: 指标提取器，默认使用全局实例
+
+    Returns:
+        (指标字典, build_metric_series 的结果)
+    """
+    extractor = extractor or get_metric_extractor()
+    metrics = extractor.extract(text)
+    series = build_metric_series(text, tables, extractor)
+    metrics.update(latest_values(series))
+    return metrics, series
+
+
+def _period_years(periods: List[str]) -> "np.ndarray":
+    """报告期转换为年份（带季度的报告期折算为小数年）"""
+    years = []
+    for period in periods:
+        year = float(period[:4])
+        quarter = re.search(r"Q([1-4])", period)
+        if quarter:
+            year += (int(quarter.group(1)) - 1) / 4
+        years.append(year)
+    return np.array(years)
+
+
+def compute_trends(series: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    计算各指标的趋势特征
+
+    所有指标按报告期并集对齐为一个 (指标 × 报告期) 矩阵，缺失为 NaN，
+    CAGR 在矩阵上一次算出；同比和波动率按各指标自身的报告期计算，
+    不受同一批中其他指标报告期的影响
+
+    Args:
+        series: build_metric_series 的结果
+
+    Returns:
+        {指标键: {"periods", "values", "latest", "yoy", "cagr", "volatility"}}
+        - yoy: 该指标相邻报告期的变化率（%），与 periods[1:] 对应，缺失为 None
+        - cagr: 首末期的年复合增长率（%），首末期非正或跨度不足一年时为 None
+        - volatility: 同比变化率的标准差（%），少于两个同比值时为 None
+    """
+    if not NUMPY_AVAILABLE or not series:
+        return {}
+
+    keys = list(series)
+    periods = sorted({p for item in series.values() for p in item["periods"]})
+    column = {period: i for i, period in enumerate(periods)}
+
+    matrix = np.full((len(keys), len(periods)), np.nan)
+    for row, key in enumerate(keys):
+        item = series[key]
+        matrix[row, [column[p] for p in item["periods"]]] = item["values"]
+
+    valid = ~np.isnan(matrix)
+    years = _period_years(periods)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # CAGR：首个和最后一个有效报告期
+        first = valid.argmax(axis=1)
+        last = len(periods) - 1 - valid[:, ::-1].argmax(axis=1)
+        rows = np.arange(len(keys))
+        start, end = matrix[rows, first], matrix[rows, last]
+        span = years[last] - years[first]
+        cagr = (np.power(end / start, 1 / span) - 1) * 100
+        cagr[~((start > 0) & (end > 0) & (span >= 1)) | ~np.isfinite(cagr)] = np.nan
+
+    trends = {}
+    for row, key in enumerate(keys):
+        item = series[key]
+        yoy = _series_yoy(item["values"])
+        yoy_valid = yoy[~np.isnan(yoy)]
+        trends[key] = {
+            "periods": item["periods"],
+            "values": item["values"],
+            "latest": item["values"][-1] if item["values"] else None,
+            "yoy": _to_list(yoy),
+            "cagr": _to_float(cagr[row]),
+            "volatility": _to_float(np.std(yoy_valid)) if len(yoy_valid) >= 2 else None,
+        }
+    return trends
+
+
+def _series_yoy(values: List[Any]) -> "np.ndarray":
+    """单个指标相邻报告期的变化率（%），前后两期都有值时才计算"""
+    values = np.array(values, dtype=float)
+    if len(values) < 2:
+        return np.array([])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        yoy = np.diff(values) / np.abs(values[:-1]) * 100
+    yoy[~np.isfinite(yoy)] = np.nan
+    return yoy
+
+
+def _to_float(value) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+def _to_list(values) -> List[Optional[float]]:
+    return [_to_float(v) for v in values]
+
+
+def format_trend_table(trends: Dict[str, Dict[str, Any]]) -> str:
+    """
+    将趋势特征格式化为 Markdown 表格（供 LLM 阅读）
+
+    Args:
+        trends: compute_trends 的结果
+
+    Returns:
+        Markdown 表格，无趋势数据时返回空字符串
+    """
+    if not trends:
+        return ""
+
+    names = {d.key: d.description or d.key for d in get_metric_extractor().definitions}
+    periods = sorted({p for item in trends.values() for p in item["periods"]})
+    lines = [
+        "| 指标 | " + " | ".join(periods) + " | CAGR | 波动率 |",
+        "|" + "---|" * (len(periods) + 3),
+    ]
+    for key, item in trends.items():
+        values = dict(zip(item["periods"], item["values"]))
+        cells = [_format_number(values.get(p)) for p in periods]
+        cagr = f"{item['cagr']}%" if item["cagr"] is not None else "-"
+        volatility = f"{item['volatility']}%" if item["volatility"] is not None else "-"
+        lines.append(
+            f"| {names.get(key, key)} | " + " | ".join(cells) + f" | {cagr} | {volatility} |"
+        )
+    return "\n".join(lines)
+
+
+def _format_number(value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+    return f"{value:g}"
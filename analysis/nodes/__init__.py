@@ -1,3 +1,7 @@
 """
 LangGraph 工作流节点模块
+
+节点约定：每个节点只返回自己变更的字段，由 LangGraph 合并到状态中，
+不复制整个状态；文档全文只保存在 state["material"] 中，
+避免同一份文本在状态、检查点和 API 响应中重复出现
 """
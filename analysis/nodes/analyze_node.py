@@ -7,6 +7,8 @@ from typing import Dict, Any
 import logging
 from pathlib import Path
 
+from analysis.metric_series import format_trend_table
+
 logger = logging.getLogger(__name__)
 
 
@@ -14,83 +16,146 @@ def llm_analyze_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     LLM 分析节点 - 使用大语言模型进行投资分析
     
+    作为并行分支运行（每位投资者一个分支），只返回本分支的分析结果，
+    由 analyses 的 reducer 合并
+    
     Args:
-        state: 工作流状态，包含 parsed_data 和 calculated_metrics
+        state: 分支状态，包含 investor_id、material、parsed_data 和 calculated_metrics
         
     Returns:
-        更新后的状态，添加 analysis_result 字段
+        状态更新，{"analyses": [本投资者的分析结果]}
     """
-    from analysis.perspective_analyzer import PerspectiveAnalyzer
-    
-    parsed_data = state.get("parsed_data")
-    calculated_metrics = state.get("calculated_metrics")
     investor_id = state.get("investor_id", "buffett")
+    parsed_data = state.get("parsed_data")
     
     if not parsed_data:
         logger.error("缺少 parsed_data")
-        return {
-            **state,
-            "error": "缺少解析数据",
-            "analysis_result": None
-        }
+        return _analysis_error(investor_id, "缺少解析数据")
     
     try:
         # 构建分析材料
-        material = _build_analysis_material(parsed_data, calculated_metrics)
+        material = _build_analysis_material(
+            state.get("material") or "", state.get("calculated_metrics")
+        )
         
-        # 使用投资者视角分析
-        analyzer = PerspectiveAnalyzer(
-            llm_provider=state.get("llm_provider", "siliconflow"),
-            enable_db=False  # 工作流内部不直接保存到数据库
+        result = _get_analyzer(state).analyze_from_perspective(
+            material=material,
+            investor_id=investor_id,
+            additional_context=state.get("additional_context"),
+            use_cache=state.get("use_cache", True)
         )
         
-        result = analyzer.analyze_from_perspective(
+        return _analysis_update(investor_id, result)
+        
+    except Exception as e:
+        logger.error(f"LLM 分析失败: {str(e)}")
+        return _analysis_error(investor_id, f"分析失败: {str(e)}")
+
+
+async def allm_analyze_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    LLM 分析节点（异步版本，用于 ainvoke）
+    
+    通过 ainvoke 在事件循环上等待 LLM 响应，不占用线程池
+    
+    Args:
+        state: 分支状态，包含 investor_id、material、parsed_data 和 calculated_metrics
+        
+    Returns:
+        状态更新，{"analyses": [本投资者的分析结果]}
+    """
+    investor_id = state.get("investor_id", "buffett")
+    parsed_data = state.get("parsed_data")
+    
+    if not parsed_data:
+        logger.error("缺少 parsed_data")
+        return _analysis_error(investor_id, "缺少解析数据")
+    
+    try:
+        material = _build_analysis_material(
+            state.get("material") or "", state.get("calculated_metrics")
+        )
+        
+        result = await _get_analyzer(state).aanalyze_from_perspective(
             material=material,
             investor_id=investor_id,
-            additional_context=state.get("additional_context")
+            additional_context=state.get("additional_context"),
+            use_cache=state.get("use_cache", True)
         )
         
-        logger.info(f"✓ LLM 分析完成 (投资者: {result.get('investor_name', 'Unknown')})")
+        return _analysis_update(investor_id, result)
         
-        return {
-            **state,
-            "analysis_result": result.get("analysis", ""),
+    except Exception as e:
+        logger.error(f"LLM 分析失败: {str(e)}")
+        return _analysis_error(investor_id, f"分析失败: {str(e)}")
+
+
+def _get_analyzer(state: Dict[str, Any]):
+    """从注册表获取共享的分析器实例"""
+    from analysis.llm_registry import get_analyzer
+    
+    return get_analyzer(
+        llm_provider=state.get("llm_provider", "siliconflow"),
+        enable_db=False  # 工作流内部不直接保存到数据库
+    )
+
+
+def _analysis_update(investor_id: str, result: Dict) -> Dict[str, Any]:
+    """将分析器返回结果转换为状态更新"""
+    if not result.get("success", False):
+        return _analysis_error(investor_id, result.get("error", "分析失败"))
+    
+    logger.info(f"✓ LLM 分析完成 (投资者: {result.get('investor_name', 'Unknown')})")
+    
+    return {
+        "analyses": [{
+            "investor_id": investor_id,
+            "analysis": result.get("analysis", ""),
             "investor_info": {
                 "name": result.get("investor_name"),
                 "title": result.get("investor_title"),
                 "philosophy": result.get("investment_philosophy")
             },
             "error": None
-        }
-        
-    except Exception as e:
-        logger.error(f"LLM 分析失败: {str(e)}")
-        return {
-            **state,
-            "error": f"分析失败: {str(e)}",
-            "analysis_result": None
-        }
+        }]
+    }
+
+
+def _analysis_error(investor_id: str, error: str) -> Dict[str, Any]:
+    """构建失败分支的状态更新"""
+    return {
+        "analyses": [{
+            "investor_id": investor_id,
+            "analysis": None,
+            "investor_info": None,
+            "error": error
+        }]
+    }
 
 
-def _build_analysis_material(parsed_data: Dict, calculated_metrics: Dict) -> str:
+def _build_analysis_material(raw_text: str, calculated_metrics: Dict) -> str:
     """
     构建分析材料，整合文本和计算指标
     
+    有多期趋势数据时提供紧凑的趋势表，原文只保留开头的简短摘录
+    （用于识别公司和背景）；否则保留原文前 2000 字符
+    
     Args:
-        parsed_data: 解析后的数据
+        raw_text: 文档原文（state["material"]）
         calculated_metrics: 计算的指标
         
     Returns:
         格式化的分析材料
     """
     material_parts = []
+    trend_table = format_trend_table((calculated_metrics or {}).get("trends") or {})
+    excerpt_length = 500 if trend_table else 2000
     
     # 原始文本
-    raw_text = parsed_data.get("raw_text", "")
     if raw_text:
         material_parts.append("## 原始材料\n")
-        material_parts.append(raw_text[:2000])  # 限制长度
-        if len(raw_text) > 2000:
+        material_parts.append(raw_text[:excerpt_length])  # 限制长度
+        if len(raw_text) > excerpt_length:
             material_parts.append("\n...(内容过长，已截断)")
     
     # 计算指标
@@ -115,6 +180,10 @@ def _build_analysis_material(parsed_data: Dict, calculated_metrics: Dict) -> str
         if metrics.get("dividend_yield"):
             material_parts.append(f"\n- 股息率: {metrics['dividend_yield']}%")
         
+        if trend_table:
+            material_parts.append("\n\n## 多期趋势\n\n")
+            material_parts.append(trend_table)
+        
         if summary:
             material_parts.append(f"\n\n## 初步评估")
             material_parts.append(f"\n- 估值水平: {summary.get('valuation', 'N/A')}")
@@ -3,10 +3,17 @@
 计算财务指标和统计数据
 """
 
-from typing import Dict, Any
-import re
+from typing import Dict, Any, List, Optional, Union
 import logging
 
+from analysis.metric_extractor import MetricExtractor, get_metric_extractor
+from analysis.metric_series import compute_trends, extract_document_metrics
+from analysis.table_metrics import PANDAS_AVAILABLE
+
+if PANDAS_AVAILABLE:
+    import numpy as np
+    import pandas as pd
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,41 +28,46 @@ def calculate_metrics_node(state: Dict[str, Any]) -> Dict[str, Any]:
     - 营收增长率
     - 毛利率
     - 股息率
+    - 市值、资产负债率、自由现金流、EPS
+    
+    新指标通过 analysis.metric_extractor.register_metric 注册，不增加全文扫描次数
+    
+    多期数值从表格（按行标签）和正文（按指标前的年份）中提取为序列，保存在 series；
+    有序列的指标取最近一期的数值（而不是正文中首次出现的数值）；
+    trends 为各序列的 CAGR、同比变化和波动率
     
     Args:
-        state: 工作流状态，包含 parsed_data
+        state: 工作流状态，包含 material、parsed_data 和可选的 tables
         
     Returns:
-        更新后的状态，添加 calculated_metrics 字段
+        状态更新，包含 calculated_metrics 字段
     """
     parsed_data = state.get("parsed_data")
     
     if not parsed_data:
         logger.error("缺少 parsed_data")
         return {
-            **state,
             "error": "缺少解析数据",
             "calculated_metrics": None
         }
     
     try:
-        text = parsed_data.get("raw_text", "")
-        
-        # 提取财务指标
-        metrics = {
-            "pe_ratio": _extract_metric(text, r"PE[：:=\s]*(\d+\.?\d*)"),
-            "pb_ratio": _extract_metric(text, r"PB[：:=\s]*(\d+\.?\d*)"),
-            "roe": _extract_metric(text, r"ROE[：:=\s]*(\d+\.?\d*)%?"),
-            "revenue_growth": _extract_metric(text, r"营收增长[：:=\s]*(\d+\.?\d*)%?"),
-            "gross_margin": _extract_metric(text, r"毛利率[：:=\s]*(\d+\.?\d*)%?"),
-            "dividend_yield": _extract_metric(text, r"股息率[：:=\s]*(\d+\.?\d*)%?"),
-            "market_cap": _extract_metric(text, r"市值[：:=\s]*(\d+\.?\d*)"),
-        }
+        # 提取财务指标（所有已注册指标一次扫描完成），
+        # 多期序列（表格中标签与数值分离在不同单元格，正文正则无法匹配）最近一期的数值优先
+        metrics, series = extract_document_metrics(
+            state.get("material") or "", state.get("tables")
+        )
         
         # 计算衍生指标
-        if metrics["pe_ratio"] and metrics["revenue_growth"]:
+        if metrics.get("pe_ratio") and metrics.get("revenue_growth"):
             # PEG = PE / 增长率
             metrics["peg_ratio"] = round(metrics["pe_ratio"] / metrics["revenue_growth"], 2)
+        if metrics.get("pe_ratio") and metrics.get("roe"):
+            # PE/ROE：每单位盈利能力的估值，越低越便宜
+            metrics["pe_roe_ratio"] = round(metrics["pe_ratio"] / metrics["roe"], 2)
+        if metrics.get("pe_ratio"):
+            # 盈利收益率 = 1 / PE（百分比）
+            metrics["earnings_yield"] = round(100 / metrics["pe_ratio"], 2)
         
         # 统计提取到的指标数量
         extracted_count = sum(1 for v in metrics.values() if v is not None)
@@ -65,6 +77,8 @@ def calculate_metrics_node(state: Dict[str, Any]) -> Dict[str, Any]:
         # 添加汇总信息
         calculated_metrics = {
             "metrics": metrics,
+            "series": series,
+            "trends": compute_trends(series),
             "summary": {
                 "total_extracted": extracted_count,
                 "valuation": _assess_valuation(metrics),
@@ -73,7 +87,6 @@ def calculate_metrics_node(state: Dict[str, Any]) -> Dict[str, Any]:
         }
         
         return {
-            **state,
             "calculated_metrics": calculated_metrics,
             "error": None
         }
@@ -81,32 +94,11 @@ def calculate_metrics_node(state: Dict[str, Any]) -> Dict[str, Any]:
     except Exception as e:
         logger.error(f"指标计算失败: {str(e)}")
         return {
-            **state,
             "error": f"计算失败: {str(e)}",
             "calculated_metrics": None
         }
 
 
-def _extract_metric(text: str, pattern: str) -> float:
-    """
-    从文本中提取数值指标
-    
-    Args:
-        text: 文本内容
-        pattern: 正则表达式模式
-        
-    Returns:
-        提取的数值，如果未找到则返回 None
-    """
-    match = re.search(pattern, text, re.IGNORECASE)
-    if match:
-        try:
-            return float(match.group(1))
-        except (ValueError, IndexError):
-            return None
-    return None
-
-
 def _assess_valuation(metrics: Dict[str, float]) -> str:
     """
     评估估值水平
@@ -189,3 +181,127 @@ def _assess_quality(metrics: Dict[str, float]) -> str:
         return "一般"
     else:
         return "较差"
+
+
+# ==================== 批量计算（向量化） ====================
+
+# 估值/质量评分所用的列
+_VALUATION_COLUMNS = ["pe_ratio", "pb_ratio", "peg_ratio"]
+_QUALITY_COLUMNS = ["roe", "gross_margin"]
+
+
+def calculate_metrics_batch(
+    documents: List[Union[str, Dict[str, Any]]],
+    extractor: Optional[MetricExtractor] = None
+) -> "pd.DataFrame":
+    """
+    批量计算多份文档的财务指标，返回 DataFrame
+    
+    每份文档的指标提取与 calculate_metrics_node 使用同一合并规则
+    （extract_document_metrics）；衍生指标和估值/质量评估
+    在整张表上以 NumPy 数组运算完成，不逐行执行 Python 分支
+    
+    Args:
+        documents: 文档列表，每项为材料文本，或包含 material（可选 id、tables）的字典；
+                   也可以直接提供已知指标：{"id": ..., "metrics": {...}}
+        extractor: 指标提取器，默认使用全局实例
+        
+    Returns:
+        每份文档一行的 DataFrame（索引为 id），包含所有指标、衍生指标、
+        valuation_score/valuation、quality_score/quality 列
+    """
+    if not PANDAS_AVAILABLE:
+        raise ImportError("批量指标计算需要安装 pandas: pip install pandas")
+    
+    extractor = extractor or get_metric_extractor()
+    rows, index = [], []
+    
+    for position, document in enumerate(documents):
+        if isinstance(document, str):
+            document = {"material": document}
+        
+        metrics = document.get("metrics")
+        if metrics is None:
+            metrics, _ = extract_document_metrics(
+                document.get("material") or "", document.get("tables"), extractor
+            )
+        
+        rows.append(metrics)
+        index.append(document.get("id", position))
+    
+    frame = pd.DataFrame.from_records(rows, index=index, columns=extractor.keys)
+    return compute_metrics_frame(frame)
+
+
+def compute_metrics_frame(frame: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    在指标表上向量化计算衍生指标和评估结果
+    
+    衍生指标和评估规则与单文档的 calculate_metrics_node / _assess_valuation /
+    _assess_quality 一致：缺失值和 0 都视为无数据
+    
+    Args:
+        frame: 每行一家公司的指标表（列为指标键，缺失为 NaN/None）
+        
+    Returns:
+        新的 DataFrame，追加 peg_ratio、pe_roe_ratio、earnings_yield、
+        valuation_score、valuation、quality_score、quality 列
+    """
+    if not PANDAS_AVAILABLE:
+        raise ImportError("批量指标计算需要安装 pandas: pip install pandas")
+    
+    frame = frame.copy()
+    columns = set(frame.columns)
+    for column in _VALUATION_COLUMNS + _QUALITY_COLUMNS + ["revenue_growth"]:
+        if column not in columns:
+            frame[column] = np.nan
+    
+    values = {
+        column: frame[column].to_numpy(dtype=float, na_value=np.nan)
+        for column in ["pe_ratio", "pb_ratio", "roe", "revenue_growth", "gross_margin", "peg_ratio"]
+    }
+    present = {column: ~np.isnan(array) & (array != 0) for column, array in values.items()}
+    pe, roe, growth = values["pe_ratio"], values["roe"], values["revenue_growth"]
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 衍生指标
+        peg = np.where(
+            present["pe_ratio"] & present["revenue_growth"],
+            np.round(pe / growth, 2),
+            values["peg_ratio"]
+        )
+        frame["peg_ratio"] = peg
+        frame["pe_roe_ratio"] = np.where(
+            present["pe_ratio"] & present["roe"], np.round(pe / roe, 2), np.nan
+        )
+        frame["earnings_yield"] = np.where(present["pe_ratio"], np.round(100 / pe, 2), np.nan)
+    
+    # 估值评分：PE、PB、PEG 各贡献 +1/-1
+    peg_present = ~np.isnan(peg) & (peg != 0)
+    valuation_score = (
+        (present["pe_ratio"] & (pe < 15)).astype(int) - (present["pe_ratio"] & (pe > 30))
+        + (present["pb_ratio"] & (values["pb_ratio"] < 2)) - (present["pb_ratio"] & (values["pb_ratio"] > 5))
+        + (peg_present & (peg < 1)) - (peg_present & (peg > 2))
+    )
+    has_valuation = present["pe_ratio"] | present["pb_ratio"] | peg_present
+    frame["valuation_score"] = np.where(has_valuation, valuation_score, np.nan)
+    frame["valuation"] = np.select(
+        [~has_valuation, valuation_score >= 2, valuation_score <= -2],
+        ["数据不足", "低估", "高估"],
+        default="合理"
+    )
+    
+    # 质量评分：ROE ≥15 得 2 分、≥10 得 1 分，毛利率 ≥40 得 1 分
+    quality_score = (
+        np.where(present["roe"] & (roe >= 15), 2, np.where(present["roe"] & (roe >= 10), 1, 0))
+        + (present["gross_margin"] & (values["gross_margin"] >= 40))
+    )
+    has_quality = present["roe"] | present["gross_margin"]
+    frame["quality_score"] = np.where(has_quality, quality_score, np.nan)
+    frame["quality"] = np.select(
+        [~has_quality, quality_score >= 3, quality_score >= 2, quality_score >= 1],
+        ["数据不足", "优秀", "良好", "一般"],
+        default="较差"
+    )
+    
+    return frame
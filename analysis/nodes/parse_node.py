@@ -1,6 +1,8 @@
 """
 文档解析节点
 将文档 ID 转换为结构化文本数据
+
+文档全文只保存在 state["material"] 中，parsed_data 只记录格式、元数据和长度
 """
 
 from typing import Dict, Any
@@ -11,51 +13,55 @@ logger = logging.getLogger(__name__)
 
 async def parse_document_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
-    文档解析节点 - 从数据库读取文档并解析
+    文档解析节点 - 将待分析材料整理为结构化数据（异步版本，用于 ainvoke）
     
     Args:
-        state: 工作流状态，包含 document_id
+        state: 工作流状态，包含 material
         
     Returns:
-        更新后的状态，添加 parsed_data 字段
+        状态更新，包含 parsed_data 字段
     """
-    from storage.db_manager import AnalysisRecordManager
-    
-    document_id = state.get("document_id")
+    return _parse_material(state)
+
+
+def parse_document_node_sync(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    同步版本的文档解析节点（用于 invoke）
     
-    if not document_id:
-        logger.error("缺少 document_id")
-        return {
-            **state,
-            "error": "缺少 document_id",
-            "parsed_data": None
-        }
+    Args:
+        state: 工作流状态
+        
+    Returns:
+        状态更新，包含 parsed_data 字段
+    """
+    return _parse_material(state)
+
+
+def _parse_material(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    解析逻辑（同步、无 I/O），供同步和异步节点共用
     
-    try:
-        # 从数据库获取文档
-        db_manager = AnalysisRecordManager()
-        # 这里假设有一个获取文档的方法
-        # document = await db_manager.get_document(document_id)
+    Args:
+        state: 工作流状态
         
-        # 临时模拟数据（实际应从数据库读取）
-        document = {
-            "content": state.get("material", ""),
-            "format": "text",
-            "metadata": {}
-        }
+    Returns:
+        状态更新
+    """
+    try:
+        # 文档内容由调用方通过 material 传入
+        # （上传接口已完成文件解析，这里只做结构化整理，正文不再复制到 parsed_data）
+        content = state.get("material") or ""
         
         # 提取关键信息
         parsed_data = {
-            "raw_text": document.get("content", ""),
-            "format": document.get("format", "unknown"),
-            "metadata": document.get("metadata", {}),
-            "length": len(document.get("content", ""))
+            "format": "text",
+            "metadata": {},
+            "length": len(content)
         }
         
         logger.info(f"✓ 文档解析完成，长度: {parsed_data['length']} 字符")
         
         return {
-            **state,
             "parsed_data": parsed_data,
             "error": None
         }
@@ -63,29 +69,6 @@ async def parse_document_node(state: Dict[str, Any]) -> Dict[str, Any]:
     except Exception as e:
         logger.error(f"文档解析失败: {str(e)}")
         return {
-            **state,
             "error": f"解析失败: {str(e)}",
             "parsed_data": None
         }
-
-
-def parse_document_node_sync(state: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    同步版本的文档解析节点（用于 LangGraph）
-    
-    Args:
-        state: 工作流状态
-        
-    Returns:
-        更新后的状态
-    """
-    import asyncio
-    
-    # 在同步环境中运行异步函数
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    return loop.run_until_complete(parse_document_node(state))
@@ -3,10 +3,12 @@
 整合所有分析结果并生成最终报告
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, List
 from datetime import datetime
 import logging
 
+from analysis.metric_series import format_trend_table
+
 logger = logging.getLogger(__name__)
 
 
@@ -14,40 +16,62 @@ def summarize_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     结果汇总节点 - 整合所有分析结果
     
+    合并各投资者分支的分析，生成最终报告；多位投资者时生成合并报告，
+    并附带每位投资者的单独报告
+    
     Args:
         state: 工作流状态
         
     Returns:
-        更新后的状态，添加 final_report 字段
+        状态更新，包含 final_report 字段
+        （只返回变更的字段，避免重复写入 analyses）
     """
     try:
         # 收集所有结果
-        parsed_data = state.get("parsed_data", {})
-        calculated_metrics = state.get("calculated_metrics", {})
-        analysis_result = state.get("analysis_result", "")
-        investor_info = state.get("investor_info", {})
+        parsed_data = state.get("parsed_data") or {}
+        calculated_metrics = state.get("calculated_metrics") or {}
+        analyses = state.get("analyses") or []
+        succeeded = [a for a in analyses if not a.get("error")]
         
         # 构建最终报告
         report = _build_final_report(
             parsed_data=parsed_data,
             calculated_metrics=calculated_metrics,
-            analysis_result=analysis_result,
-            investor_info=investor_info
+            analyses=succeeded
         )
         
-        logger.info("✓ 结果汇总完成")
+        if len(analyses) > 1:
+            report["investor_reports"] = {
+                analysis["investor_id"]: _build_final_report(
+                    parsed_data=parsed_data,
+                    calculated_metrics=calculated_metrics,
+                    analyses=[analysis]
+                )["markdown"]
+                for analysis in succeeded
+            }
+        
+        # 全部分支失败时才视为工作流失败
+        error = None
+        if not succeeded:
+            error = "; ".join(
+                f"{a['investor_id']}: {a['error']}" for a in analyses
+            ) or "缺少分析结果"
+        
+        primary = succeeded[0] if succeeded else {}
+        
+        logger.info(f"✓ 结果汇总完成 ({len(succeeded)}/{len(analyses)} 位投资者)")
         
         return {
-            **state,
             "final_report": report,
+            "analysis_result": primary.get("analysis"),
+            "investor_info": primary.get("investor_info"),
             "completed_at": datetime.utcnow().isoformat(),
-            "error": None
+            "error": error
         }
         
     except Exception as e:
         logger.error(f"结果汇总失败: {str(e)}")
         return {
-            **state,
             "error": f"汇总失败: {str(e)}",
             "final_report": None
         }
@@ -56,8 +80,7 @@ def summarize_node(state: Dict[str, Any]) -> Dict[str, Any]:
 def _build_final_report(
     parsed_data: Dict,
     calculated_metrics: Dict,
-    analysis_result: str,
-    investor_info: Dict
+    analyses: List[Dict]
 ) -> Dict[str, Any]:
     """
     构建最终报告
@@ -67,6 +90,7 @@ def _build_final_report(
     """
     metrics = calculated_metrics.get("metrics", {}) if calculated_metrics else {}
     summary = calculated_metrics.get("summary", {}) if calculated_metrics else {}
+    trends = calculated_metrics.get("trends", {}) if calculated_metrics else {}
     
     # 构建 Markdown 格式的报告
     markdown_report = f"""# 投资分析报告
@@ -91,32 +115,54 @@ def _build_final_report(
         if metrics.get("gross_margin"):
             markdown_report += f"- **毛利率**: {metrics['gross_margin']}%\n"
     
+    if trends:
+        markdown_report += f"\n## 📉 多期趋势\n\n{format_trend_table(trends)}\n"
+    
     if summary:
         markdown_report += f"\n## 📈 初步评估\n\n"
         markdown_report += f"- **估值水平**: {summary.get('valuation', 'N/A')}\n"
         markdown_report += f"- **企业质量**: {summary.get('quality', 'N/A')}\n"
     
-    if investor_info:
-        markdown_report += f"\n## 👤 分析师视角\n\n"
-        markdown_report += f"**投资者**: {investor_info.get('name', 'Unknown')}\n"
-        markdown_report += f"**头衔**: {investor_info.get('title', 'N/A')}\n"
-        markdown_report += f"**投资哲学**: {investor_info.get('philosophy', 'N/A')}\n"
+    if len(analyses) == 1:
+        # 单一视角：保持原有报告结构
+        investor_info = analyses[0].get("investor_info") or {}
+        analysis_result = analyses[0].get("analysis")
+        
+        if investor_info:
+            markdown_report += f"\n## 👤 分析师视角\n\n"
+            markdown_report += f"**投资者**: {investor_info.get('name', 'Unknown')}\n"
+            markdown_report += f"**头衔**: {investor_info.get('title', 'N/A')}\n"
+            markdown_report += f"**投资哲学**: {investor_info.get('philosophy', 'N/A')}\n"
+        
+        if analysis_result:
+            markdown_report += f"\n## 🎯 深度分析\n\n{analysis_result}\n"
+    
+    elif analyses:
+        # 多视角：每位投资者一个章节
+        markdown_report += f"\n## 👥 多视角分析（{len(analyses)} 位投资者）\n"
+        for i, analysis in enumerate(analyses, 1):
+            investor_info = analysis.get("investor_info") or {}
+            markdown_report += f"\n### {i}. {investor_info.get('name', 'Unknown')}（{investor_info.get('title', 'N/A')}）\n\n"
+            markdown_report += f"**投资哲学**: {investor_info.get('philosophy', 'N/A')}\n\n"
+            markdown_report += f"{analysis.get('analysis', '')}\n"
     
-    if analysis_result:
-        markdown_report += f"\n## 🎯 深度分析\n\n{analysis_result}\n"
+    primary = analyses[0] if analyses else {}
     
     # 返回结构化数据
     return {
         "markdown": markdown_report,
         "structured_data": {
             "metrics": metrics,
+            "trends": trends,
             "summary": summary,
-            "investor": investor_info,
-            "analysis": analysis_result
+            "investor": primary.get("investor_info") or {},
+            "analysis": primary.get("analysis") or "",
+            "analyses": analyses
         },
         "metadata": {
             "generated_at": datetime.now().isoformat(),
-            "document_length": len(parsed_data.get("raw_text", "")),
-            "metrics_count": calculated_metrics.get("summary", {}).get("total_extracted", 0)
+            "document_length": parsed_data.get("length", 0),
+            "metrics_count": calculated_metrics.get("summary", {}).get("total_extracted", 0) if calculated_metrics else 0,
+            "investor_count": len(analyses)
         }
     }
@@ -0,0 +1,224 @@
+"""
+文档解析缓存模块
+以文件内容的 SHA-256 为键，将 DocumentParser.parse_stream 产出的事件序列
+以 gzip 压缩的 JSON Lines 保存到磁盘；内容相同的文件再次解析时直接回放，
+无需重新解析 PDF/Word
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 缓存格式版本，解析结果的结构变化时递增以使旧缓存失效
+PARSE_CACHE_VERSION = 1
+
+# 计算文件哈希时的读取块大小
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# text 档位可复用任意档位的缓存（回放时去掉表格），其余档位只复用同档位的缓存
+_COMPATIBLE_PROFILES = {
+    "text": ["text", "tables", "full"],
+    "tables": ["tables"],
+    "full": ["full"],
+}
+
+
+def hash_file(file_path: Union[str, Path]) -> str:
+    """
+    分块计算文件内容的 SHA-256
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        十六进制摘要
+    """
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ParseCache:
+    """
+    磁盘解析缓存
+
+    每个 (内容哈希, 解析档位) 对应一个 .jsonl.gz 文件，按哈希前两位分目录存放；
+    写入先落临时文件再原子替换，总大小超过上限时按最近访问时间淘汰
+    """
+
+    def __init__(self, cache_dir: Union[str, Path] = "data/parse_cache", max_size_mb: float = 2048):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_size_mb: 缓存总大小上限（MB）
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, content_hash: str, profile: str) -> Path:
+        return self.cache_dir / content_hash[:2] / f"{content_hash}.{profile}.v{PARSE_CACHE_VERSION}.jsonl.gz"
+
+    def lookup(self, content_hash: str, profile: str) -> Optional[Path]:
+        """查找可用于该档位的缓存文件，未命中返回 None"""
+        for candidate in _COMPATIBLE_PROFILES.get(profile, [profile]):
+            path = self._path(content_hash, candidate)
+            if path.exists():
+                return path
+        return None
+
+    def replay(self, content_hash: str, profile: str) -> Optional[Iterator[Dict[str, Any]]]:
+        """
+        回放缓存的解析事件
+
+        Args:
+            content_hash: 文件内容哈希
+            profile: 解析档位
+
+        Returns:
+            事件迭代器（与 parse_stream 的事件格式一致，结束事件带 cached=True），
+            未命中返回 None
+        """
+        path = self.lookup(content_hash, profile)
+        with self._lock:
+            if path is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        # 更新访问时间，淘汰时保留最近使用的缓存
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return self._read_events(path, strip_tables=profile == "text")
+
+    @staticmethod
+    def _read_events(path: Path, strip_tables: bool) -> Iterator[Dict[str, Any]]:
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                event = json.loads(line)
+                if event["type"] == "page" and strip_tables:
+                    event["tables"] = None
+                elif event["type"] == "end":
+                    event["cached"] = True
+                yield event
+
+    def record(
+        self,
+        content_hash: str,
+        profile: str,
+        events: Iterator[Dict[str, Any]]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        透传解析事件的同时写入缓存
+
+        只有解析成功完成时才提交缓存；解析失败或调用方提前停止迭代时丢弃临时文件
+
+        Args:
+            content_hash: 文件内容哈希
+            profile: 解析档位
+            events: parse_stream 的事件迭代器
+
+        Yields:
+            原样透传的事件
+        """
+        path = self._path(content_hash, profile)
+        temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        committed = False
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            file = gzip.open(temp_path, "wt", encoding="utf-8", compresslevel=6)
+        except OSError as e:
+            logger.warning(f"⚠️  无法写入解析缓存: {str(e)}")
+            yield from events
+            return
+
+        try:
+            with file:
+                for event in events:
+                    file.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+                    if event["type"] == "end" and event["success"]:
+                        committed = True
+                    yield event
+        finally:
+            if committed:
+                os.replace(temp_path, path)
+                self._prune()
+            else:
+                temp_path.unlink(missing_ok=True)
+
+    def _prune(self):
+        """缓存超过大小上限时，按最近访问时间删除最旧的文件"""
+        files = []
+        total = 0
+        for path in self.cache_dir.glob("*/*.jsonl.gz"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_size_bytes:
+            return
+
+        for _, size, path in sorted(files):
+            path.unlink(missing_ok=True)
+            total -= size
+            if total <= self.max_size_bytes:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        """获取命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+# 全局缓存实例
+_parse_cache: Optional[ParseCache] = None
+_parse_cache_initialized = False
+_parse_cache_lock = threading.Lock()
+
+
+def get_parse_cache() -> Optional[ParseCache]:
+    """
+    获取全局解析缓存（单例模式）
+
+    环境变量:
+        PARSE_CACHE_BACKEND: disk（默认）或 none
+        PARSE_CACHE_DIR: 缓存目录，默认 data/parse_cache
+        PARSE_CACHE_MAX_MB: 缓存总大小上限，默认 2048
+
+    Returns:
+        ParseCache 实例，禁用时返回 None
+    """
+    global _parse_cache, _parse_cache_initialized
+    with _parse_cache_lock:
+        if not _parse_cache_initialized:
+            backend = os.getenv("PARSE_CACHE_BACKEND", "disk").lower()
+            if backend == "disk":
+                _parse_cache = ParseCache(
+                    cache_dir=os.getenv("PARSE_CACHE_DIR", "data/parse_cache"),
+                    max_size_mb=float(os.getenv("PARSE_CACHE_MAX_MB", "2048"))
+                )
+            _parse_cache_initialized = True
+        return _parse_cache
@@ -3,8 +3,9 @@
 支持从不同投资大师的视角分析投资材料
 """
 
-import os
-from typing import Dict, List, Optional
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
 from pathlib import Path
 
 # 加载环境变量
@@ -16,17 +17,19 @@ try:
 except ImportError:
     print("⚠️  python-dotenv 未安装，将直接使用系统环境变量")
 
-
-from langchain_openai import ChatOpenAI
-from langchain_community.chat_models import ChatZhipuAI
 from langchain_core.messages import HumanMessage, SystemMessage
-from pydantic import SecretStr
 
-from .investor_profiles import InvestorProfile, InvestorProfileManager
+from .investor_profiles import InvestorProfile, get_profile_manager
+from .llm_cache import LLMResponseCache, get_llm_cache
+from .llm_registry import (
+    get_llm,
+    get_provider_concurrency,
+    get_provider_semaphore,
+)
 
 # 导入数据库管理器
 try:
-    from storage.db_manager import AnalysisRecordManager
+    from storage.db_manager import get_record_manager
     DB_MANAGER_AVAILABLE = True
 except ImportError:
     DB_MANAGER_AVAILABLE = False
@@ -43,6 +46,9 @@ class PerspectiveAnalyzer:
         model_name: Optional[str] = None,
         temperature: float = 0.7,
         enable_db: bool = True,
+        max_concurrency: Optional[int] = None,
+        enable_cache: bool = True,
+        cache: Optional[LLMResponseCache] = None,
     ):
         """
         初始化多视角分析器
@@ -53,93 +59,97 @@ class PerspectiveAnalyzer:
             model_name: 模型名称，如果不提供则使用默认模型
             temperature: 温度参数，控制输出的随机性
             enable_db: 是否启用数据库保存功能
+            max_concurrency: 多视角分析时的并发数，默认使用提供商并发上限
+            enable_cache: 是否启用 LLM 响应缓存
+            cache: 自定义缓存后端，默认使用全局缓存（见 get_llm_cache）
         """
 
         self.llm_provider = llm_provider.lower()
         self.temperature = temperature
+        self.max_concurrency = max(
+            1, max_concurrency or get_provider_concurrency(self.llm_provider)
+        )
 
-        # 加载投资者画像管理器
-        self.profile_manager = InvestorProfileManager()
+        # 共享的投资者画像管理器
+        self.profile_manager = get_profile_manager()
+
+        # 从注册表获取共享的LLM客户端
+        self.llm, self.model_name = get_llm(
+            self.llm_provider,
+            model_name=model_name,
+            temperature=self.temperature,
+            api_key=api_key,
+        )
 
-        # 初始化LLM客户端
-        self.llm = self._init_llm(api_key, model_name)
+        # 初始化 LLM 响应缓存
+        self.cache = None
+        if enable_cache:
+            self.cache = cache or get_llm_cache()
         
         # 初始化数据库管理器
         self.db_manager = None
         if enable_db and DB_MANAGER_AVAILABLE:
             try:
-                self.db_manager = AnalysisRecordManager()
+                self.db_manager = get_record_manager()
             except Exception as e:
                 print(f"⚠️  数据库管理器初始化失败: {e}")
                 self.db_manager = None
 
-    def _init_llm(self, api_key: Optional[str], model_name: Optional[str]):
-        """初始化LLM客户端"""
-
-        # 初始化默认值
-        default_model = None
-        base_url = None
-
-        # 从环境变量获取API密钥
-        if api_key is None:
-            if self.llm_provider == "deepseek":
-                api_key = os.getenv("DEEPSEEK_API_KEY")
-                default_model = "deepseek-chat"
-                base_url = "https://api.deepseek.com"
-            elif self.llm_provider == "qwen":
-                api_key = os.getenv("QWEN_API_KEY")
-                default_model = "qwen-max"
-                base_url = "https://dashscope.aliyuncs.com/compatible-mode/v1"
-            elif self.llm_provider == "zhipu":
-                api_key = os.getenv("ZHIPU_API_KEY")
-                default_model = "glm-4"
-                base_url = None
-            elif self.llm_provider == "openai":
-                api_key = os.getenv("OPENAI_API_KEY")
-                default_model = "gpt-4o-mini"
-                base_url = None
-            elif self.llm_provider == "siliconflow":
-                api_key = os.getenv("SILICONFLOW_API_KEY")
-                default_model = os.getenv(
-                    "SILICONFLOW_MODEL", "deepseek-ai/DeepSeek-V3.1-Terminus"
-                )
-                base_url = os.getenv(
-                    "SILICONFLOW_API_BASE_URL", "https://api.siliconflow.cn/v1"
-                )
-            else:
-                raise ValueError(f"不支持的LLM提供商: {self.llm_provider}")
+    def _cache_key(self, messages: List) -> str:
+        """根据模型配置和提示词生成缓存键"""
+        return self.cache.make_key(
+            self.llm_provider,
+            self.model_name,
+            self.temperature,
+            messages[0].content,
+            messages[1].content,
+        )
 
-        if not api_key:
-            raise ValueError(f"未找到 {self.llm_provider.upper()} 的API密钥")
+    def _invoke_llm(self, messages: List, use_cache: bool = True) -> Tuple[str, bool]:
+        """
+        调用LLM，受提供商级并发上限约束
 
-        # 使用提供的模型名称或默认模型
-        model = model_name or default_model
-        
-        if not model:
-            raise ValueError(f"未找到 {self.llm_provider.upper()} 的默认模型名称")
-        if not api_key:
-            raise ValueError(f"未找到 {self.llm_provider.upper()} 的API密钥")
-
-        # 创建LLM客户端
-        if self.llm_provider in ["deepseek", "qwen", "openai", "siliconflow"]:
-            llm = ChatOpenAI(
-                model=model,
-                api_key=SecretStr(api_key),
-                base_url=base_url if self.llm_provider not in ["openai"] else None,
-                temperature=self.temperature,
-            )
-        elif self.llm_provider == "zhipu":
-            llm = ChatZhipuAI(
-                model=model, api_key=api_key, temperature=self.temperature
-            )
-        else:
-            raise ValueError(f"不支持的LLM提供商: {self.llm_provider}")
+        Returns:
+            (响应文本, 是否命中缓存)
+        """
+        cache_key = None
+        if use_cache and self.cache:
+            cache_key = self._cache_key(messages)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached, True
+
+        with get_provider_semaphore(self.llm_provider):
+            response = self.llm.invoke(messages)
+
+        if cache_key:
+            self.cache.set(cache_key, response.content)
+        return response.content, False
+
+    async def _ainvoke_llm(
+        self, messages: List, use_cache: bool = True
+    ) -> Tuple[str, bool]:
+        """调用LLM（异步版本），返回 (响应文本, 是否命中缓存)"""
+        cache_key = None
+        if use_cache and self.cache:
+            cache_key = self._cache_key(messages)
+            cached = await self.cache.aget(cache_key)
+            if cached is not None:
+                return cached, True
 
-        print(f"✓ 已初始化 {self.llm_provider.upper()} LLM: {model}")
-        return llm
+        async with get_provider_semaphore(self.llm_provider):
+            response = await self.llm.ainvoke(messages)
+
+        if cache_key:
+            await self.cache.aset(cache_key, response.content)
+        return response.content, False
 
     def analyze_from_perspective(
-        self, material: str, investor_id: str, additional_context: Optional[str] = None
+        self,
+        material: str,
+        investor_id: str,
+        additional_context: Optional[str] = None,
+        use_cache: bool = True,
     ) -> Dict:
         """
         从特定投资者的视角分析材料
@@ -148,64 +158,33 @@ class PerspectiveAnalyzer:
             material: 要分析的投资材料（新闻、财报、数据等）
             investor_id: 投资者ID
             additional_context: 额外的上下文信息
+            use_cache: 是否使用 LLM 响应缓存，False 时强制重新请求
 
         Returns:
             分析结果字典
         """
-        # 获取投资者画像
-        profile = self.profile_manager.get_profile(investor_id)
-        if not profile:
-            raise ValueError(f"未找到投资者画像: {investor_id}")
+        profile = self._get_profile(investor_id)
 
         print(f"\n🎯 从 {profile.name} 的视角分析...")
 
-        # 构建提示词
-        system_prompt = profile.get_system_prompt()
-
-        # 构建分析材料
-        full_material = material
-        if additional_context:
-            full_material = f"{material}\n\n额外上下文：\n{additional_context}"
-
-        analysis_prompt = profile.get_analysis_prompt(full_material)
+        messages = self._build_messages(profile, material, additional_context)
 
         # 调用LLM
         try:
-            messages = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=analysis_prompt),
-            ]
+            analysis_result, cache_hit = self._invoke_llm(messages, use_cache)
 
-            response = self.llm.invoke(messages)
-            analysis_result = response.content
-
-            result = {
-                "investor_id": investor_id,
-                "investor_name": profile.name,
-                "investor_title": profile.title,
-                "analysis": analysis_result,
-                "investment_philosophy": profile.investment_philosophy,
-                "risk_tolerance": profile.risk_tolerance,
-                "holding_period": profile.holding_period,
-                "success": True,
-            }
+            result = self._build_result(profile, analysis_result, cache_hit)
             
-            # 保存到数据库
-            if self.db_manager:
+            # 保存到数据库（缓存命中的结果已有记录，不重复写入）
+            if self.db_manager and not cache_hit:
                 try:
-                    self.db_manager.save_analysis(
+                    self.db_manager.save_analysis_sync(
                         material=material,
                         investor_id=investor_id,
                         investor_name=profile.name,
                         analysis_result=analysis_result,
                         additional_context=additional_context,
-                        metadata={
-                            "investor_title": profile.title,
-                            "risk_tolerance": profile.risk_tolerance,
-                            "holding_period": profile.holding_period,
-                            "llm_provider": self.llm_provider,
-                            "temperature": self.temperature
-                        }
+                        metadata=self._build_record_metadata(profile)
                     )
                 except Exception as e:
                     print(f"⚠️  保存分析记录时出错: {e}")
@@ -222,40 +201,222 @@ class PerspectiveAnalyzer:
                 "error": str(e),
             }
 
+    async def aanalyze_from_perspective(
+        self,
+        material: str,
+        investor_id: str,
+        additional_context: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> Dict:
+        """
+        从特定投资者的视角分析材料（异步版本，基于 llm.ainvoke）
+
+        Args:
+            material: 要分析的投资材料
+            investor_id: 投资者ID
+            additional_context: 额外的上下文信息
+            use_cache: 是否使用 LLM 响应缓存
+
+        Returns:
+            分析结果字典
+        """
+        profile = self._get_profile(investor_id)
+
+        print(f"\n🎯 从 {profile.name} 的视角分析...")
+
+        messages = self._build_messages(profile, material, additional_context)
+
+        try:
+            analysis_result, cache_hit = await self._ainvoke_llm(messages, use_cache)
+
+        except Exception as e:
+            print(f"✗ 分析时出错: {e}")
+            return {
+                "investor_id": investor_id,
+                "investor_name": profile.name,
+                "analysis": f"分析失败: {str(e)}",
+                "success": False,
+                "error": str(e),
+            }
+
+        if self.db_manager and not cache_hit:
+            try:
+                await self.db_manager.save_analysis(
+                    material=material,
+                    investor_id=investor_id,
+                    investor_name=profile.name,
+                    analysis_result=analysis_result,
+                    additional_context=additional_context,
+                    metadata=self._build_record_metadata(profile)
+                )
+            except Exception as e:
+                print(f"⚠️  保存分析记录时出错: {e}")
+
+        return self._build_result(profile, analysis_result, cache_hit)
+
+    async def astream_from_perspective(
+        self,
+        material: str,
+        investor_id: str,
+        additional_context: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> AsyncGenerator[str, None]:
+        """
+        从特定投资者的视角流式分析材料
+
+        基于 llm.astream，LLM 每产生一段文本就立即返回；
+        流结束后将完整分析结果保存到数据库。命中缓存时一次性返回缓存内容
+
+        Args:
+            material: 要分析的投资材料
+            investor_id: 投资者ID
+            additional_context: 额外的上下文信息
+            use_cache: 是否使用 LLM 响应缓存
+
+        Yields:
+            LLM 生成的文本片段
+        """
+        profile = self._get_profile(investor_id)
+
+        print(f"\n🎯 从 {profile.name} 的视角流式分析...")
+
+        messages = self._build_messages(profile, material, additional_context)
+
+        cache_key = None
+        cached = None
+        if use_cache and self.cache:
+            cache_key = self._cache_key(messages)
+            cached = await self.cache.aget(cache_key)
+
+        chunks: List[str] = []
+        if cached is not None:
+            chunks.append(cached)
+            yield cached
+        else:
+            async with get_provider_semaphore(self.llm_provider):
+                async for chunk in self.llm.astream(messages):
+                    text = chunk.content
+                    if text:
+                        chunks.append(text)
+                        yield text
+
+            if cache_key:
+                await self.cache.aset(cache_key, "".join(chunks))
+
+        # 流结束后保存完整分析结果（缓存命中时已有记录）
+        if self.db_manager and cached is None:
+            try:
+                await self.db_manager.save_analysis(
+                    material=material,
+                    investor_id=investor_id,
+                    investor_name=profile.name,
+                    analysis_result="".join(chunks),
+                    additional_context=additional_context,
+                    metadata=self._build_record_metadata(profile)
+                )
+            except Exception as e:
+                print(f"⚠️  保存分析记录时出错: {e}")
+
+    def _get_profile(self, investor_id: str) -> InvestorProfile:
+        """获取投资者画像，不存在时抛出 ValueError"""
+        profile = self.profile_manager.get_profile(investor_id)
+        if not profile:
+            raise ValueError(f"未找到投资者画像: {investor_id}")
+        return profile
+
+    def _build_messages(
+        self,
+        profile: InvestorProfile,
+        material: str,
+        additional_context: Optional[str] = None,
+    ) -> List:
+        """构建发送给LLM的消息列表"""
+        full_material = material
+        if additional_context:
+            full_material = f"{material}\n\n额外上下文：\n{additional_context}"
+
+        return [
+            SystemMessage(content=profile.get_system_prompt()),
+            HumanMessage(content=profile.get_analysis_prompt(full_material)),
+        ]
+
+    def _build_result(
+        self, profile: InvestorProfile, analysis_result: str, cache_hit: bool = False
+    ) -> Dict:
+        """构建单一视角分析结果字典"""
+        return {
+            "investor_id": profile.id,
+            "investor_name": profile.name,
+            "investor_title": profile.title,
+            "analysis": analysis_result,
+            "investment_philosophy": profile.investment_philosophy,
+            "risk_tolerance": profile.risk_tolerance,
+            "holding_period": profile.holding_period,
+            "success": True,
+            "metadata": {
+                "llm_provider": self.llm_provider,
+                "model": self.model_name,
+                "cache_hit": cache_hit,
+            },
+        }
+
+    def _build_record_metadata(self, profile: InvestorProfile) -> Dict:
+        """构建保存到数据库的分析记录元数据"""
+        return {
+            "investor_title": profile.title,
+            "risk_tolerance": profile.risk_tolerance,
+            "holding_period": profile.holding_period,
+            "llm_provider": self.llm_provider,
+            "temperature": self.temperature
+        }
+
     def analyze_from_multiple_perspectives(
         self,
         material: str,
         investor_ids: List[str],
         additional_context: Optional[str] = None,
+        concurrent: bool = True,
+        use_cache: bool = True,
     ) -> List[Dict]:
         """
         从多个投资者的视角分析同一材料
 
+        并发模式下使用有界线程池同时请求LLM，结果顺序与 investor_ids 一致
+
         Args:
             material: 要分析的投资材料
             investor_ids: 投资者ID列表
             additional_context: 额外的上下文信息
+            concurrent: 是否并发执行，False 时逐个串行分析
+            use_cache: 是否使用 LLM 响应缓存
 
         Returns:
             多个分析结果的列表
         """
-        results = []
-
-        for investor_id in investor_ids:
-            result = self.analyze_from_perspective(
+        def analyze(investor_id: str) -> Dict:
+            return self.analyze_from_perspective(
                 material=material,
                 investor_id=investor_id,
                 additional_context=additional_context,
+                use_cache=use_cache,
             )
-            results.append(result)
 
-        return results
+        if not concurrent or len(investor_ids) <= 1:
+            return [analyze(investor_id) for investor_id in investor_ids]
+
+        max_workers = min(self.max_concurrency, len(investor_ids))
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="perspective"
+        ) as executor:
+            # executor.map 按输入顺序返回结果
+            return list(executor.map(analyze, investor_ids))
 
     def compare_perspectives(
         self,
         material: str,
         investor_ids: List[str],
         additional_context: Optional[str] = None,
+        use_cache: bool = True,
     ) -> Dict:
         """
         对比不同投资者对同一材料的分析
@@ -264,53 +425,23 @@ class PerspectiveAnalyzer:
             material: 要分析的投资材料
             investor_ids: 投资者ID列表
             additional_context: 额外的上下文信息
+            use_cache: 是否使用 LLM 响应缓存
 
         Returns:
             包含所有分析和对比总结的字典
         """
         # 获取所有分析
         analyses = self.analyze_from_multiple_perspectives(
-            material, investor_ids, additional_context
+            material, investor_ids, additional_context, use_cache=use_cache
         )
 
         # 生成对比总结
         print("\n📊 生成多视角对比总结...")
 
-        comparison_prompt = f"""
-请对比以下{len(analyses)}位投资大师对同一投资材料的分析，总结：
-
-1. **共识观点**：哪些方面他们的看法一致？
-2. **分歧观点**：哪些方面存在明显分歧？
-3. **互补视角**：不同视角提供了哪些互补的洞察？
-4. **综合建议**：综合考虑各方观点后的投资建议
-
-各位投资大师的分析：
-
-"""
-
-        for i, analysis in enumerate(analyses, 1):
-            separator = '=' * 60
-            comparison_prompt += f"""
-{separator}
-{i}. {analysis['investor_name']}（{analysis['investor_title']}）
-风险承受度：{analysis.get('risk_tolerance', 'N/A')}
-持有期偏好：{analysis.get('holding_period', 'N/A')}
-
-分析内容：
-{analysis['analysis']}
-
-"""
-
         try:
-            messages = [
-                SystemMessage(
-                    content="你是一位资深的投资分析师，擅长综合不同投资理念。"
-                ),
-                HumanMessage(content=comparison_prompt),
-            ]
-
-            response = self.llm.invoke(messages)
-            comparison_summary = response.content
+            comparison_summary, _ = self._invoke_llm(
+                self._build_comparison_messages(analyses), use_cache
+            )
 
         except Exception as e:
             comparison_summary = f"生成对比总结时出错: {str(e)}"
@@ -337,6 +468,125 @@ class PerspectiveAnalyzer:
         
         return result
 
+    async def astream_compare_perspectives(
+        self,
+        material: str,
+        investor_ids: List[str],
+        additional_context: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> AsyncGenerator[Dict, None]:
+        """
+        流式多视角对比分析
+
+        所有投资者并发分析，按完成顺序逐个返回；全部完成后流式返回对比总结。
+        事件格式：
+        - {"event": "analysis", "investor_id": ..., "data": 单一视角分析结果}
+        - {"event": "summary", "data": 对比总结文本片段}
+        - {"event": "done", "record_id": 对比记录ID}
+
+        Args:
+            material: 要分析的投资材料
+            investor_ids: 投资者ID列表
+            additional_context: 额外的上下文信息
+            use_cache: 是否使用 LLM 响应缓存（对比总结仍实时流式生成）
+
+        Yields:
+            事件字典
+        """
+        # 提前校验，避免启动部分请求后才发现画像不存在
+        for investor_id in investor_ids:
+            self._get_profile(investor_id)
+
+        tasks = [
+            asyncio.create_task(
+                self.aanalyze_from_perspective(
+                    material, investor_id, additional_context, use_cache
+                )
+            )
+            for investor_id in investor_ids
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                yield {
+                    "event": "analysis",
+                    "investor_id": result["investor_id"],
+                    "data": result,
+                }
+        finally:
+            # 客户端断开时取消仍在进行的请求
+            for task in tasks:
+                task.cancel()
+
+        # 对比总结使用与输入一致的顺序
+        analyses = [task.result() for task in tasks]
+
+        print("\n📊 流式生成多视角对比总结...")
+
+        chunks: List[str] = []
+        try:
+            async with get_provider_semaphore(self.llm_provider):
+                async for chunk in self.llm.astream(
+                    self._build_comparison_messages(analyses)
+                ):
+                    text = chunk.content
+                    if text:
+                        chunks.append(text)
+                        yield {"event": "summary", "data": text}
+        except Exception as e:
+            error_text = f"生成对比总结时出错: {str(e)}"
+            chunks.append(error_text)
+            yield {"event": "summary", "data": error_text}
+
+        record_id = None
+        if self.db_manager:
+            try:
+                record_id = await self.db_manager.save_comparison(
+                    material=material,
+                    investor_ids=investor_ids,
+                    analyses=analyses,
+                    comparison_summary="".join(chunks),
+                    additional_context=additional_context
+                )
+            except Exception as e:
+                print(f"⚠️  保存对比分析记录时出错: {e}")
+
+        yield {"event": "done", "record_id": record_id}
+
+    def _build_comparison_messages(self, analyses: List[Dict]) -> List:
+        """构建多视角对比总结的消息列表"""
+        comparison_prompt = f"""
+请对比以下{len(analyses)}位投资大师对同一投资材料的分析，总结：
+
+1. **共识观点**：哪些方面他们的看法一致？
+2. **分歧观点**：哪些方面存在明显分歧？
+3. **互补视角**：不同视角提供了哪些互补的洞察？
+4. **综合建议**：综合考虑各方观点后的投资建议
+
+各位投资大师的分析：
+
+"""
+
+        for i, analysis in enumerate(analyses, 1):
+            separator = '=' * 60
+            comparison_prompt += f"""
+{separator}
+{i}. {analysis['investor_name']}（{analysis.get('investor_title', 'N/A')}）
+风险承受度：{analysis.get('risk_tolerance', 'N/A')}
+持有期偏好：{analysis.get('holding_period', 'N/A')}
+
+分析内容：
+{analysis['analysis']}
+
+"""
+
+        return [
+            SystemMessage(
+                content="你是一位资深的投资分析师，擅长综合不同投资理念。"
+            ),
+            HumanMessage(content=comparison_prompt),
+        ]
+
     def get_available_investors(self) -> List[Dict]:
         """
         获取所有可用的投资者列表
@@ -0,0 +1,141 @@
+"""
+表格指标提取模块
+将 PDF/Word 解析得到的表格载入 pandas DataFrame，按行标签定位指标，
+并以列向量方式读取各期数值，得到多期指标序列
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+import logging
+
+from analysis.metric_extractor import MetricExtractor, get_metric_extractor
+
+logger = logging.getLogger(__name__)
+
+# 检查 pandas 是否可用
+try:
+    import numpy as np
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+    logger.warning("⚠️  pandas 未安装，表格指标提取不可用，请运行: pip install pandas")
+
+# 表头中的报告期（如 2023、2023年、2023Q3、2023-06-30）
+_PERIOD_PATTERN = re.compile(
+    r"((?:19|20)\d{2})(?:\s*年)?(?:\s*[-/.]?\s*(Q[1-4]|\d{1,2}[-/.]\d{1,2}))?",
+    re.IGNORECASE
+)
+
+# 数值单元格清洗规则：去掉千分位、百分号、单位和空白，会计格式的括号表示负数
+_CELL_REPLACEMENTS = {
+    r"[,，%％\s倍元亿万]": "",
+    r"^\((.*)\)$": r"-\1",
+    r"^（(.*)）$": r"-\1",
+    r"^[-—–]+$": "",
+}
+
+
+def tables_to_frames(tables: Optional[List[List[List[Any]]]]) -> List["pd.DataFrame"]:
+    """
+    将解析器返回的表格（行列表）转换为 DataFrame
+
+    Args:
+        tables: 表格列表，每个表格为行列表，每行为单元格列表
+
+    Returns:
+        DataFrame 列表（单元格统一为去除首尾空白的字符串），跳过空表
+    """
+    frames = []
+    for table in tables or []:
+        rows = [row for row in table if row and any(cell for cell in row)]
+        if len(rows) < 2:
+            continue
+
+        frame = pd.DataFrame(rows).fillna("").astype(str)
+        frames.append(frame.apply(lambda column: column.str.strip()))
+    return frames
+
+
+def _detect_periods(header: "pd.Series") -> Dict[int, str]:
+    """
+    从表头识别报告期
+
+    Returns:
+        {列位置: 报告期}，不含报告期的列（如"单位"、"备注"）被忽略
+    """
+    periods = {}
+    for position, cell in enumerate(header, start=1):
+        match = _PERIOD_PATTERN.search(cell)
+        if match:
+            periods[position] = "".join(part for part in match.groups() if part).upper()
+    return periods
+
+
+def extract_table_series(
+    tables: Optional[List[List[List[Any]]]],
+    extractor: Optional[MetricExtractor] = None
+) -> Dict[str, Dict[str, List]]:
+    """
+    从表格中提取多期指标序列
+
+    每个表格以第一列为行标签、第一行为报告期表头；行标签通过提取器的指标
+    标签匹配，数值列整体向量化转换（pd.to_numeric），同一指标取首个出现的表格
+
+    Args:
+        tables: 解析器返回的表格
+        extractor: 指标提取器，默认使用全局实例（与正文提取共用指标定义）
+
+    Returns:
+        {指标键: {"periods": [...], "values": [...]}}，报告期按时间升序
+    """
+    if not PANDAS_AVAILABLE or not tables:
+        return {}
+
+    extractor = extractor or get_metric_extractor()
+    series: Dict[str, Dict[str, List]] = {}
+
+    for frame in tables_to_frames(tables):
+        period_columns = _detect_periods(frame.iloc[0, 1:])
+        if not period_columns:
+            continue
+        periods = list(period_columns.values())
+        body = frame.iloc[1:]
+
+        # 行标签只对去重后的标签做匹配，再映射回所有行
+        labels = body.iloc[:, 0]
+        label_keys = {label: extractor.match_label(label) for label in labels.unique()}
+        keys = labels.map(label_keys)
+        matched = body[keys.notna() & ~keys.isin(list(series))]
+        if matched.empty:
+            continue
+
+        # 所有数值单元格一次性清洗并转换为浮点矩阵
+        values = (
+            matched.iloc[:, list(period_columns)]
+            .replace(_CELL_REPLACEMENTS, regex=True)
+            .apply(pd.to_numeric, errors="coerce")
+            .to_numpy(dtype=float)
+        )
+        order = np.argsort(periods, kind="stable")
+        sorted_periods = [periods[i] for i in order]
+
+        for key, row in zip(keys[matched.index], values[:, order]):
+            if key in series or np.isnan(row).all():
+                continue
+            valid = ~np.isnan(row)
+            series[key] = {
+                "periods": [p for p, ok in zip(sorted_periods, valid) if ok],
+                "values": row[valid].tolist(),
+            }
+
+    return series
+
+
+def latest_values(series: Dict[str, Dict[str, List]]) -> Dict[str, float]:
+    """取每个指标最近一期的数值"""
+    return {
+        key: item["values"][-1]
+        for key, item in series.items()
+        if item["values"]
+    }
@@ -0,0 +1,283 @@
+"""
+工作流检查点模块
+按 (材料哈希, 节点, 变体) 保存各节点的成功输出，
+工作流重跑时跳过已成功的节点，只重新执行失败的步骤
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+# 各节点需要保存的输出字段
+CHECKPOINT_KEYS = {
+    "parse": ["parsed_data"],
+    "calculate": ["calculated_metrics"],
+    "analyze": ["analyses"],
+}
+
+
+def material_hash(material: Optional[str]) -> str:
+    """计算材料内容的 SHA-256 哈希"""
+    return hashlib.sha256((material or "").encode("utf-8")).hexdigest()
+
+
+def checkpoint_variant(node: str, state: Dict[str, Any]) -> str:
+    """
+    节点输出的变体标识
+
+    解析只依赖材料本身；计算还取决于是否提供了表格；
+    分析还依赖投资者、LLM 提供商、额外上下文和计算出的指标
+    （指标随表格变化，同一材料带或不带表格的分析不能互相复用）
+    """
+    if node == "calculate":
+        return "tables" if state.get("tables") else ""
+    if node != "analyze":
+        return ""
+    context_hash = material_hash(state.get("additional_context"))[:16]
+    metrics_hash = material_hash(
+        json.dumps(state.get("calculated_metrics"), sort_keys=True, default=str)
+    )[:16]
+    return f"{state.get('investor_id')}:{state.get('llm_provider')}:{context_hash}:{metrics_hash}"
+
+
+def node_succeeded(node: str, update: Dict[str, Any]) -> bool:
+    """判断节点输出是否成功（只有成功的输出才写入检查点）"""
+    if node == "analyze":
+        analyses = update.get("analyses") or []
+        return bool(analyses) and all(not a.get("error") for a in analyses)
+    return not update.get("error") and all(update.get(key) for key in CHECKPOINT_KEYS[node])
+
+
+class WorkflowCheckpointer:
+    """检查点存储基类，子类实现 _get/_save（同步）和可选的 _aget/_asave（异步）"""
+
+    backend = "base"
+
+    def get(self, material_hash: str, node: str, variant: str = "") -> Optional[Dict]:
+        """读取节点输出（同步），不存在返回 None"""
+        return self._get(material_hash, node, variant)
+
+    def save(self, material_hash: str, node: str, variant: str, output: Dict):
+        """保存节点输出（同步）"""
+        self._save(material_hash, node, variant, output)
+
+    async def aget(self, material_hash: str, node: str, variant: str = "") -> Optional[Dict]:
+        """读取节点输出（异步），不存在返回 None"""
+        return await self._aget(material_hash, node, variant)
+
+    async def asave(self, material_hash: str, node: str, variant: str, output: Dict):
+        """保存节点输出（异步）"""
+        await self._asave(material_hash, node, variant, output)
+
+    def _get(self, material_hash: str, node: str, variant: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def _save(self, material_hash: str, node: str, variant: str, output: Dict):
+        raise NotImplementedError
+
+    async def _aget(self, material_hash: str, node: str, variant: str) -> Optional[Dict]:
+        return self._get(material_hash, node, variant)
+
+    async def _asave(self, material_hash: str, node: str, variant: str, output: Dict):
+        self._save(material_hash, node, variant, output)
+
+
+class InMemoryCheckpointer(WorkflowCheckpointer):
+    """进程内检查点存储（LRU 淘汰，支持 TTL 过期）"""
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: int = 86400):
+        """
+        Args:
+            max_entries: 最大保存的节点输出数量
+            ttl_seconds: 检查点有效期（秒）
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, material_hash: str, node: str, variant: str) -> Optional[Dict]:
+        key = (material_hash, node, variant)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            output, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return output
+
+    def _save(self, material_hash: str, node: str, variant: str, output: Dict):
+        with self._lock:
+            self._entries[(material_hash, node, variant)] = (output, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end((material_hash, node, variant))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class MongoCheckpointer(WorkflowCheckpointer):
+    """
+    MongoDB 检查点存储，使用 DocumentManager 的 workflow_checkpoints 集合
+
+    过期由 TTL 索引自动清理（索引在 DocumentManager.ensure_indexes 中创建）
+    """
+
+    backend = "mongodb"
+
+    def __init__(self, document_manager=None, ttl_seconds: int = 86400):
+        """
+        Args:
+            document_manager: DocumentManager 实例，默认使用全局实例
+            ttl_seconds: 检查点有效期（秒）
+        """
+        if document_manager is None:
+            from storage.document_manager import get_document_manager
+            document_manager = get_document_manager()
+
+        self.document_manager = document_manager
+        self.ttl_seconds = ttl_seconds
+
+    def _expires_at(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+
+    def _get(self, material_hash: str, node: str, variant: str) -> Optional[Dict]:
+        return self.document_manager.get_checkpoint_sync(material_hash, node, variant)
+
+    def _save(self, material_hash: str, node: str, variant: str, output: Dict):
+        self.document_manager.save_checkpoint_sync(
+            material_hash, node, variant, output, self._expires_at()
+        )
+
+    async def _aget(self, material_hash: str, node: str, variant: str) -> Optional[Dict]:
+        return await self.document_manager.get_checkpoint(material_hash, node, variant)
+
+    async def _asave(self, material_hash: str, node: str, variant: str, output: Dict):
+        await self.document_manager.save_checkpoint(
+            material_hash, node, variant, output, self._expires_at()
+        )
+
+
+def checkpointed_node(
+    node: str,
+    checkpointer: WorkflowCheckpointer,
+    func: Callable,
+    afunc: Optional[Callable] = None,
+):
+    """
+    为工作流节点加上检查点逻辑
+
+    state["resume"] 为真时先查找检查点，命中则直接返回保存的输出
+    （分析节点在 use_cache 为假时不复用检查点，保证绕过缓存的请求重新调用 LLM）；
+    未命中时执行节点，成功后写入检查点
+
+    Args:
+        node: 节点名称（须在 CHECKPOINT_KEYS 中）
+        checkpointer: 检查点存储
+        func: 节点的同步实现
+        afunc: 节点的异步实现，缺省时在线程池中执行同步实现
+
+    Returns:
+        (同步包装函数, 异步包装函数)
+    """
+    keys = CHECKPOINT_KEYS[node]
+
+    def restore(state: Dict[str, Any], output: Dict) -> Dict[str, Any]:
+        if node == "analyze":
+            # 并行的分析分支只能写入 analyses（带 reducer），在条目上标记复用
+            return {"analyses": [{**entry, "resumed": True} for entry in output["analyses"]]}
+        return {
+            **output,
+            "error": None,
+            "resumed_nodes": list(state.get("resumed_nodes") or []) + [node],
+        }
+
+    def extract(update: Dict[str, Any]) -> Dict:
+        return {key: update[key] for key in keys}
+
+    def should_restore(state: Dict[str, Any]) -> bool:
+        if not state.get("resume"):
+            return False
+        return node != "analyze" or state.get("use_cache", True)
+
+    def run(state: Dict[str, Any]) -> Dict[str, Any]:
+        variant = checkpoint_variant(node, state)
+        if should_restore(state):
+            output = checkpointer.get(state["material_hash"], node, variant)
+            if output is not None:
+                return restore(state, output)
+
+        update = func(state)
+        if node_succeeded(node, update):
+            try:
+                checkpointer.save(state["material_hash"], node, variant, extract(update))
+            except Exception as e:
+                print(f"⚠️  保存检查点失败 ({node}): {e}")
+        return update
+
+    async def arun(state: Dict[str, Any]) -> Dict[str, Any]:
+        variant = checkpoint_variant(node, state)
+        if should_restore(state):
+            output = await checkpointer.aget(state["material_hash"], node, variant)
+            if output is not None:
+                return restore(state, output)
+
+        if afunc is not None:
+            update = await afunc(state)
+        else:
+            update = await asyncio.to_thread(func, state)
+
+        if node_succeeded(node, update):
+            try:
+                await checkpointer.asave(state["material_hash"], node, variant, extract(update))
+            except Exception as e:
+                print(f"⚠️  保存检查点失败 ({node}): {e}")
+        return update
+
+    return run, arun
+
+
+# 全局检查点实例
+_checkpointer = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> Optional[WorkflowCheckpointer]:
+    """
+    获取全局工作流检查点存储（单例模式）
+
+    由环境变量配置：
+    - WORKFLOW_CHECKPOINT_BACKEND: memory（默认）/ mongodb / none
+    - WORKFLOW_CHECKPOINT_TTL: 检查点有效期（秒），默认 86400
+
+    Returns:
+        检查点存储实例，禁用时返回 None
+    """
+    global _checkpointer
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            backend = os.getenv("WORKFLOW_CHECKPOINT_BACKEND", "memory").lower()
+            ttl_seconds = int(os.getenv("WORKFLOW_CHECKPOINT_TTL", "86400"))
+
+            if backend == "none":
+                return None
+            if backend == "mongodb":
+                try:
+                    _checkpointer = MongoCheckpointer(ttl_seconds=ttl_seconds)
+                except Exception as e:
+                    print(f"⚠️  MongoDB 检查点初始化失败，改用内存存储: {e}")
+
+            if _checkpointer is None:
+                _checkpointer = InMemoryCheckpointer(ttl_seconds=ttl_seconds)
+        return _checkpointer
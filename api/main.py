@@ -2,6 +2,8 @@
 FastAPI 主应用入口
 提供 RESTful API 接口，支持流式输出
 """
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -9,10 +11,30 @@ import uvicorn
 from dotenv import load_dotenv
 
 from api.routers import analysis, records, investors, documents
+from analysis.document_parser import get_parse_process_pool, shutdown_parse_process_pool
+from analysis.llm_registry import aclose_llm_clients
+from storage.db_manager import MOTOR_AVAILABLE, close_mongo_clients
 
 # 加载环境变量
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动时创建 MongoDB 索引和解析进程池，关闭时写入缓冲中的记录并释放共享的 MongoDB 客户端、LLM 连接池和解析进程池"""
+    if MOTOR_AVAILABLE:
+        from storage.document_manager import ensure_mongo_indexes
+        await ensure_mongo_indexes()
+    get_parse_process_pool()
+    yield
+    await aclose_llm_clients()
+    shutdown_parse_process_pool()
+    if MOTOR_AVAILABLE:
+        from storage.document_manager import flush_document_writes
+        await flush_document_writes()
+    close_mongo_clients()
+
+
 # 创建 FastAPI 应用
 app = FastAPI(
     title="Muhe Opportunity Radar API",
@@ -20,7 +42,8 @@ app = FastAPI(
     version="2.1.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    lifespan=lifespan
 )
 
 # CORS 配置 - 允许前端跨域访问
@@ -1,13 +1,17 @@
 """API 请求模型定义"""
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 
+# 文档解析档位：text 只提取文本，tables 只对疑似表格页提取表格，full 提取所有页的表格
+ParseProfile = Literal["text", "tables", "full"]
+
 
 class AnalysisRequest(BaseModel):
     """单一视角分析请求"""
     material: str = Field(..., description="分析材料文本", min_length=10)
     investor_id: str = Field(..., description="投资者ID (如: buffett, graham)")
     additional_context: Optional[str] = Field(None, description="额外上下文信息")
+    bypass_cache: bool = Field(False, description="跳过 LLM 响应缓存，强制重新分析")
     
     model_config = {
         "json_schema_extra": {
@@ -30,6 +34,7 @@ class ComparisonRequest(BaseModel):
         max_length=10
     )
     additional_context: Optional[str] = Field(None, description="额外上下文信息")
+    bypass_cache: bool = Field(False, description="跳过 LLM 响应缓存，强制重新分析")
     
     model_config = {
         "json_schema_extra": {
@@ -63,7 +68,15 @@ class WorkflowAnalysisRequest(BaseModel):
     """工作流分析请求"""
     material: str = Field(..., description="分析材料文本", min_length=10)
     investor_id: str = Field("buffett", description="投资者ID")
+    investor_ids: Optional[List[str]] = Field(
+        None,
+        description="多个投资者ID（可选），提供时并行分析并生成合并报告",
+        min_length=1,
+        max_length=10
+    )
     additional_context: Optional[str] = Field(None, description="额外上下文信息")
+    bypass_cache: bool = Field(False, description="跳过 LLM 响应缓存，强制重新分析")
+    resume: bool = Field(False, description="重试失败的工作流时设为 true：复用已成功节点的检查点，仅重跑失败的步骤")
     use_workflow: bool = Field(True, description="是否使用 LangGraph 工作流")
     
     model_config = {
@@ -81,7 +94,20 @@ class DocumentAnalysisRequest(BaseModel):
     """文档分析请求（上传后）"""
     document_id: str = Field(..., description="已上传的文档ID")
     investor_id: str = Field("buffett", description="投资者ID")
+    investor_ids: Optional[List[str]] = Field(
+        None,
+        description="多个投资者ID（可选），提供时并行分析并生成合并报告",
+        min_length=1,
+        max_length=10
+    )
     additional_context: Optional[str] = Field(None, description="额外上下文信息")
+    bypass_cache: bool = Field(False, description="跳过 LLM 响应缓存，强制重新分析")
+    resume: bool = Field(False, description="重试失败的工作流时设为 true：复用已成功节点的检查点，仅重跑失败的步骤")
+    parse_profile: ParseProfile = Field("tables", description="文档解析档位（text/tables/full）")
+    durable: bool = Field(
+        True,
+        description="直接写入文档、指标和报告并确认成功后再返回（写入失败时返回错误）；设为 false 时由写缓冲在后台批量写入"
+    )
     
     model_config = {
         "json_schema_extra": {
@@ -92,3 +118,52 @@ class DocumentAnalysisRequest(BaseModel):
         }
     }
 
+
+
+class BatchWorkflowRequest(BaseModel):
+    """批量工作流分析请求（N 份材料/文档 × M 位投资者）"""
+    materials: List[str] = Field(
+        default_factory=list,
+        description="分析材料文本列表",
+        max_length=500
+    )
+    document_ids: List[str] = Field(
+        default_factory=list,
+        description="已上传的文档ID列表",
+        max_length=500
+    )
+    investor_ids: List[str] = Field(
+        ["buffett"],
+        description="投资者ID列表，每份材料对每位投资者各生成一份分析",
+        min_length=1,
+        max_length=10
+    )
+    additional_context: Optional[str] = Field(None, description="额外上下文信息")
+    bypass_cache: bool = Field(False, description="跳过 LLM 响应缓存，强制重新分析")
+    resume: bool = Field(False, description="重试失败的工作流时设为 true：复用已成功节点的检查点，仅重跑失败的步骤")
+    max_concurrency: Optional[int] = Field(
+        None,
+        description="本批次同时执行的工作流数量上限（另受服务端全局上限约束）",
+        ge=1,
+        le=32
+    )
+    parse_profile: ParseProfile = Field("tables", description="文档条目的解析档位（text/tables/full）")
+    durable: bool = Field(
+        True,
+        description="每个条目的结果写入数据库并确认成功后再产出（写入失败记为条目错误）；设为 false 时由写缓冲在后台批量写入"
+    )
+    stream_format: Literal["ndjson", "sse"] = Field(
+        "ndjson",
+        description="结果流格式：ndjson（每行一个 JSON）或 sse"
+    )
+    
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "document_ids": ["doc_12345", "doc_67890"],
+                "investor_ids": ["buffett", "graham"],
+                "max_concurrency": 4,
+                "stream_format": "ndjson"
+            }
+        }
+    }
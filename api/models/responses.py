@@ -27,7 +27,7 @@ class RecordItem(BaseModel):
     """历史记录项"""
     record_id: str
     type: str = Field(..., description="记录类型: single 或 comparison")
-    material: str
+    material: str = Field(..., description="材料预览（前200字，完整内容见记录详情）")
     investor_name: Optional[str] = None
     investor_names: Optional[List[str]] = None
     created_at: datetime
@@ -39,6 +39,7 @@ class RecordListResponse(BaseModel):
     records: List[RecordItem]
     total: int = Field(..., description="总记录数")
     page: int = Field(1, description="当前页码")
+    next_cursor: Optional[str] = Field(None, description="下一页游标，没有更多记录时为空")
 
 
 class StatisticsResponse(BaseModel):
@@ -1,7 +1,9 @@
 """分析相关 API 路由"""
+import json
+
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
 from api.models.requests import AnalysisRequest, ComparisonRequest
 from api.models.responses import AnalysisResponse, ComparisonResponse
@@ -10,6 +12,18 @@ from api.services import get_analysis_service
 router = APIRouter()
 
 
+def _format_sse(data: str, event: Optional[str] = None) -> str:
+    """
+    格式化 SSE 消息
+
+    多行文本按规范拆成多个 data 行，客户端会以换行符重新拼接，
+    避免 LLM 输出中的空行提前截断事件
+    """
+    lines = [f"event: {event}"] if event else []
+    lines.extend(f"data: {line}" for line in data.split("\n"))
+    return "\n".join(lines) + "\n\n"
+
+
 @router.post("/analyze", response_model=AnalysisResponse)
 async def analyze_single(request: AnalysisRequest):
     """
@@ -24,7 +38,8 @@ async def analyze_single(request: AnalysisRequest):
         result = await service.analyze_single(
             material=request.material,
             investor_id=request.investor_id,
-            additional_context=request.additional_context
+            additional_context=request.additional_context,
+            use_cache=not request.bypass_cache
         )
         
         return AnalysisResponse(
@@ -55,10 +70,10 @@ async def analyze_single_stream(request: AnalysisRequest):
             async for chunk in service.analyze_single_stream(
                 material=request.material,
                 investor_id=request.investor_id,
-                additional_context=request.additional_context
+                additional_context=request.additional_context,
+                use_cache=not request.bypass_cache
             ):
-                # SSE 格式: data: {content}\n\n
-                yield f"data: {chunk}\n\n"
+                yield _format_sse(chunk)
             
             # 发送结束信号
             yield "data: [DONE]\n\n"
@@ -92,7 +107,8 @@ async def compare_perspectives(request: ComparisonRequest):
         result = await service.compare_perspectives(
             material=request.material,
             investor_ids=request.investor_ids,
-            additional_context=request.additional_context
+            additional_context=request.additional_context,
+            use_cache=not request.bypass_cache
         )
         
         return ComparisonResponse(
@@ -113,18 +129,27 @@ async def compare_perspectives_stream(request: ComparisonRequest):
     """
     多视角对比流式分析接口
     
-    返回 SSE (Server-Sent Events) 流式响应
+    返回 SSE (Server-Sent Events) 流式响应，事件类型：
+    - **analysis**: 单个投资者分析完成（按完成顺序，含 investor_id）
+    - **summary**: 对比总结的文本片段
+    - **done**: 全部完成（含 record_id）
+    - **error**: 出错信息
     """
     try:
         service = get_analysis_service()
         
         async def event_generator() -> AsyncGenerator[str, None]:
-            async for chunk in service.compare_perspectives_stream(
+            async for event in service.compare_perspectives_stream(
                 material=request.material,
                 investor_ids=request.investor_ids,
-                additional_context=request.additional_context
+                additional_context=request.additional_context,
+                use_cache=not request.bypass_cache
             ):
-                yield f"data: {chunk}\n\n"
+                event_type = event.pop("event")
+                yield _format_sse(
+                    json.dumps(event, ensure_ascii=False, default=str),
+                    event=event_type
+                )
             
             yield "data: [DONE]\n\n"
         
@@ -141,3 +166,14 @@ async def compare_perspectives_stream(request: ComparisonRequest):
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"流式对比分析失败: {str(e)}")
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    获取 LLM 响应缓存统计
+    
+    返回缓存后端、命中次数、未命中次数和命中率
+    """
+    service = get_analysis_service()
+    return service.get_cache_stats()
@@ -3,18 +3,41 @@
 处理文档上传、解析和分析
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from typing import Optional, Dict, Any, List
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import AsyncGenerator, BinaryIO, Iterator, Optional, Dict, Any, List, Tuple
+from datetime import datetime, timedelta
 
+import asyncio
+import hashlib
+import json
+import logging
 import shutil
+import time
 import uuid
 from pathlib import Path
 import os
 
-from api.models.requests import WorkflowAnalysisRequest, DocumentAnalysisRequest
+from api.models.requests import (
+    WorkflowAnalysisRequest,
+    DocumentAnalysisRequest,
+    BatchWorkflowRequest
+)
 from api.models.responses import DocumentUploadResponse, WorkflowAnalysisResponse
 from api.services.workflow_service import WorkflowService
-from analysis.document_parser import DocumentParser
+from analysis.document_parser import (
+    DocumentParser,
+    PARSE_PROFILES,
+    PROFILE_TABLES,
+    PROFILE_TEXT,
+    MaterialBuffer,
+    get_max_material_chars,
+    get_parse_executor,
+    get_parse_limiter
+)
+from analysis.metric_extractor import MetricAccumulator
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/documents")
 
@@ -22,21 +45,73 @@ router = APIRouter(prefix="/documents")
 UPLOAD_DIR = Path("data/uploads")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+# 按内容哈希去重的文件存储目录（文档文件是指向其中文件的硬链接）
+BLOB_DIR = UPLOAD_DIR / "blobs"
+BLOB_DIR.mkdir(parents=True, exist_ok=True)
+
+# 保存上传文件时的读取块大小
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# 上传响应中的内容预览长度
+PREVIEW_LENGTH = 200
+
+# 单个上传文件的大小上限（MB）和 PDF 页数上限
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "100"))
+MAX_DOCUMENT_PAGES = int(os.getenv("MAX_DOCUMENT_PAGES", "2000"))
+
+# 非流式上传的延迟预算（秒），超出后转为后台任务并返回 202 和 job_id
+UPLOAD_LATENCY_BUDGET = float(os.getenv("UPLOAD_LATENCY_BUDGET_SECONDS", "10"))
+
+# 后台上传任务记录的保留时长（秒），以及处理中进度写入数据库的最小间隔（秒）
+UPLOAD_JOB_TTL = 3600
+UPLOAD_JOB_PROGRESS_INTERVAL = 2.0
+
 # 初始化服务
 workflow_service = WorkflowService()
-document_parser = DocumentParser()
+# PDF 一律在解析进程池中解析，不与事件循环争用 GIL
+document_parser = DocumentParser(use_cache=True, parallel_min_pages=1, max_pages=MAX_DOCUMENT_PAGES)
 
+# 本进程发起的上传任务（job_id → 任务状态）和运行中的后台任务；
+# 任务状态同时写入 MongoDB 的 upload_jobs 集合，其他工作进程和重启后仍可查询
+_upload_jobs: Dict[str, Dict[str, Any]] = {}
+_upload_tasks: set = set()
 
-@router.post("/upload", response_model=DocumentUploadResponse)
+
+@router.post(
+    "/upload",
+    response_model=DocumentUploadResponse,
+    responses={
+        202: {"description": "解析超过延迟预算，已转为后台任务（返回 job_id）"},
+        413: {"description": "文件大小或页数超过上限"}
+    }
+)
 async def upload_document(
+    request: Request,
     file: UploadFile = File(..., description="上传的文档文件"),
     investor_id: Optional[str] = Form("buffett", description="投资者ID"),
-    auto_analyze: Optional[bool] = Form(False, description="是否自动分析")
+    auto_analyze: Optional[bool] = Form(False, description="是否自动分析"),
+    stream: Optional[bool] = Form(False, description="是否以 NDJSON 流式返回解析进度"),
+    profile: Optional[str] = Form(
+        None,
+        description="解析档位（text/tables/full），默认只预览时为 text，自动分析时为 tables"
+    )
 ):
     """
     上传文档并可选地进行分析
     
     支持格式: PDF (.pdf), Word (.doc, .docx), Markdown (.md, .markdown)
+    
+    文档逐页解析，指标提取随页面同步进行；不自动分析时不保留全文。
+    只预览时默认跳过表格提取（text 档位），自动分析时只对疑似表格页提取表格（tables 档位）。
+    stream=true 时以 NDJSON 流式返回，事件类型：
+    - **preview**: 内容预览（前 200 字解析出来后立即返回，通常在第一页之后）
+    - **progress**: 每页解析完成（含 page、total_pages、metrics_found）
+    - **done**: 上传完成（与非流式响应体相同）
+    - **error**: 上传或解析失败
+    
+    非流式上传在延迟预算（UPLOAD_LATENCY_BUDGET_SECONDS）内未完成时返回 202 和 job_id，
+    之后通过 GET /documents/jobs/{job_id} 查询结果。文件超过 MAX_UPLOAD_MB
+    或 PDF 超过 MAX_DOCUMENT_PAGES 页时返回 413。
     """
     # 验证文件格式
     file_ext = Path(file.filename).suffix.lower()
@@ -48,42 +123,276 @@ async def upload_document(
             detail=f"不支持的文件格式: {file_ext}，支持的格式: {', '.join(supported_formats)}"
         )
     
+    profile = profile or (PROFILE_TABLES if auto_analyze else PROFILE_TEXT)
+    if profile not in PARSE_PROFILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的解析档位: {profile}，可选: {', '.join(PARSE_PROFILES)}"
+        )
+    
+    max_bytes = int(MAX_UPLOAD_MB * 1024 * 1024)
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"文件大小超过上限 {MAX_UPLOAD_MB:g} MB")
+    
     try:
         # 生成唯一文件ID和保存路径
         document_id = str(uuid.uuid4())
         file_path = UPLOAD_DIR / f"{document_id}{file_ext}"
         
-        # 保存文件
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # 分块异步保存文件（同时计算内容哈希，内容相同的文件只存一份）
+        content_hash, deduplicated = await _save_upload(file, file_path, max_bytes)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        # 清理可能已保存的文件（连同不再被引用的去重文件）
+        if 'file_path' in locals() and file_path.exists():
+            _remove_upload_file(file_path)
         
-        # 获取文件大小
-        file_size = os.path.getsize(file_path)
+        raise HTTPException(
+            status_code=500,
+            detail=f"文件上传失败: {str(e)}"
+        )
+    
+    events = _upload_events(
+        document_id=document_id,
+        filename=file.filename,
+        file_path=file_path,
+        content_hash=content_hash,
+        deduplicated=deduplicated,
+        investor_id=investor_id,
+        auto_analyze=auto_analyze,
+        profile=profile
+    )
+    
+    if stream:
+        async def event_generator() -> AsyncGenerator[str, None]:
+            async for event in events:
+                if event["event"] == "done":
+                    event = {"event": "done", **event["response"].model_dump()}
+                yield _format_stream_event(event, "ndjson")
         
-        # 解析文档
-        parse_result = document_parser.parse(file_path)
+        return StreamingResponse(
+            event_generator(),
+            media_type="application/x-ndjson",
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no"  # 禁用 Nginx 缓冲
+            }
+        )
+    
+    # 后台任务执行解析，在延迟预算内完成则直接返回结果
+    job = _create_upload_job(document_id, events)
+    try:
+        await asyncio.wait_for(asyncio.shield(job["task"]), timeout=UPLOAD_LATENCY_BUDGET)
+    except asyncio.TimeoutError:
+        return JSONResponse(
+            status_code=202,
+            content={
+                "success": True,
+                "job_id": job["job_id"],
+                "document_id": document_id,
+                "status": job["status"],
+                "status_url": str(request.url_for("get_upload_job", job_id=job["job_id"]))
+            }
+        )
+    
+    if job["status"] == "failed":
+        raise HTTPException(status_code=job["status_code"], detail=job["error"])
+    return job["result"]
+
+
+@router.get("/jobs/{job_id}", response_model=Dict[str, Any])
+async def get_upload_job(job_id: str):
+    """
+    查询后台上传任务
+    
+    status 为 processing / completed / failed；完成时 result 与上传接口的响应体相同。
+    本进程发起的任务直接读取内存中的状态，其他工作进程发起的任务从 MongoDB 读取
+    （处理中的进度按 UPLOAD_JOB_PROGRESS_INTERVAL 间隔同步）；
+    任务所在进程重启后，未完成的任务停留在 processing，直到记录过期
+    """
+    job = _upload_jobs.get(job_id)
+    if job is not None:
+        return _job_record(job)
+    
+    from storage.document_manager import get_document_manager
+    
+    job = await get_document_manager().get_upload_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"任务未找到: {job_id}")
+    return job
+
+
+def _job_record(job: Dict[str, Any]) -> Dict[str, Any]:
+    """任务状态（不含后台任务句柄）"""
+    return {key: value for key, value in job.items() if key != "task"}
+
+
+def _persist_upload_job(job: Dict[str, Any], previous: Optional[asyncio.Task] = None) -> asyncio.Task:
+    """
+    在后台把任务状态的当前快照写入 MongoDB
+    
+    写入不阻塞解析；每次写入等待上一次完成，保证数据库中的状态不会被旧快照覆盖。
+    写入失败只影响其他进程的查询，不影响任务本身
+    
+    Args:
+        job: 任务记录
+        previous: 上一次写入的任务
+        
+    Returns:
+        本次写入的任务
+    """
+    from storage.document_manager import get_document_manager
+    
+    record = _job_record(job)
+    expires_at = datetime.utcnow() + timedelta(seconds=UPLOAD_JOB_TTL)
+    
+    async def write():
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        await get_document_manager().save_upload_job(record, expires_at)
+    
+    task = asyncio.create_task(write())
+    _upload_tasks.add(task)
+    task.add_done_callback(_upload_tasks.discard)
+    return task
+
+
+def _create_upload_job(document_id: str, events: AsyncGenerator[Dict[str, Any], None]) -> Dict[str, Any]:
+    """创建上传任务记录并在后台消费上传事件（同时清理本进程中过期的任务记录）"""
+    now = time.time()
+    for job_id, job in list(_upload_jobs.items()):
+        if job["finished_at"] and now - job["finished_at"] > UPLOAD_JOB_TTL:
+            del _upload_jobs[job_id]
+    
+    job = {
+        "job_id": str(uuid.uuid4()),
+        "document_id": document_id,
+        "status": "processing",
+        "progress": None,
+        "result": None,
+        "error": None,
+        "status_code": None,
+        "created_at": now,
+        "finished_at": None
+    }
+    job["task"] = asyncio.create_task(_run_upload_job(events, job))
+    _upload_jobs[job["job_id"]] = job
+    _upload_tasks.add(job["task"])
+    job["task"].add_done_callback(_upload_tasks.discard)
+    return job
+
+
+async def _run_upload_job(events: AsyncGenerator[Dict[str, Any], None], job: Dict[str, Any]):
+    """消费上传事件，把进度和结果写入任务记录（并同步到 MongoDB）"""
+    persist = _persist_upload_job(job)
+    persisted_at = time.monotonic()
+    async for event in events:
+        if event["event"] == "progress":
+            job["progress"] = {"page": event["page"], "total_pages": event["total_pages"]}
+            if time.monotonic() - persisted_at >= UPLOAD_JOB_PROGRESS_INTERVAL:
+                persisted_at = time.monotonic()
+                persist = _persist_upload_job(job, persist)
+        elif event["event"] == "done":
+            job["status"] = "completed"
+            job["result"] = event["response"].model_dump(mode="json")
+        elif event["event"] == "error":
+            job["status"] = "failed"
+            job["status_code"] = event["status_code"]
+            job["error"] = event["error"]
+    job["finished_at"] = time.time()
+    _persist_upload_job(job, persist)
+
+
+async def _upload_events(
+    document_id: str,
+    filename: str,
+    file_path: Path,
+    content_hash: str,
+    deduplicated: bool,
+    investor_id: str,
+    auto_analyze: bool,
+    profile: str
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    逐页解析已保存的上传文件，产出预览、进度和完成事件
+    
+    只保留预览所需的前几页文本；自动分析时才按块拼接全文（不超过材料长度上限）。
+    相同内容已解析过时直接回放解析缓存
+    """
+    file_size = os.path.getsize(file_path)
+    accumulator = MetricAccumulator()
+    preview_text = ""
+    preview_sent = False
+    material = MaterialBuffer(get_max_material_chars()) if auto_analyze else None
+    tables = []
+    end = None
+    
+    def preview_event(file_format: str) -> Dict[str, Any]:
+        return {
+            "event": "preview",
+            "document_id": document_id,
+            "filename": filename,
+            "format": file_format,
+            "size": file_size,
+            "content_preview": _content_preview(preview_text)
+        }
+    
+    try:
+        # 整个文档解析期间占用一个解析名额（与批量解析共享 PARSE_MAX_CONCURRENCY）
+        async with get_parse_limiter():
+            async for event in _iterate_in_thread(document_parser.parse_stream(file_path, profile, content_hash)):
+                if event["type"] == "end":
+                    end = event
+                    break
+                
+                if len(preview_text) <= PREVIEW_LENGTH:
+                    preview_text += event["content"]
+                accumulator.feed(event["text"] or "")
+                if auto_analyze:
+                    material.append(event["content"])
+                    tables.extend(event["tables"] or [])
+                
+                if not preview_sent and len(preview_text) > PREVIEW_LENGTH:
+                    preview_sent = True
+                    yield preview_event(event["format"])
+                
+                yield {
+                    "event": "progress",
+                    "page": event["page"],
+                    "total_pages": event["total_pages"],
+                    "metrics_found": len(accumulator.found)
+                }
         
-        if not parse_result.get("success"):
+        if not end["success"]:
             # 解析失败，删除文件
-            file_path.unlink()
-            raise HTTPException(
-                status_code=400,
-                detail=f"文档解析失败: {parse_result.get('error', '未知错误')}"
-            )
+            _remove_upload_file(file_path, content_hash)
+            yield {
+                "event": "error",
+                "status_code": 413 if end.get("limit_exceeded") else 400,
+                "error": f"文档解析失败: {end.get('error') or '未知错误'}"
+            }
+            return
         
-        # 提取内容预览
-        content = parse_result.get("content", "")
-        content_preview = content[:200] + "..." if len(content) > 200 else content
+        if not preview_sent:
+            yield preview_event(end["format"])
         
         # 构建响应
         response = DocumentUploadResponse(
             success=True,
             document_id=document_id,
-            filename=file.filename,
-            format=parse_result.get("format", "unknown"),
+            filename=filename,
+            format=end.get("format") or "unknown",
             size=file_size,
-            content_preview=content_preview,
-            metadata=parse_result.get("metadata"),
+            content_preview=_content_preview(preview_text),
+            metadata={
+                **end["metadata"],
+                "extracted_metrics": accumulator.found,
+                "content_hash": content_hash,
+                "deduplicated": deduplicated,
+                "parse_cached": end.get("cached", False)
+            },
             error=None
         )
         
@@ -91,32 +400,141 @@ async def upload_document(
         if auto_analyze:
             try:
                 analysis_result = await workflow_service.analyze_with_workflow(
-                    material=content,
-                    investor_id=investor_id
+                    material=material.getvalue(),
+                    investor_id=investor_id,
+                    tables=tables or None
                 )
                 
                 # 将分析结果添加到响应的 metadata
-                response.metadata = response.metadata or {}
                 response.metadata["analysis"] = analysis_result
                 
             except Exception as e:
                 # 分析失败不影响上传成功
-                response.metadata = response.metadata or {}
                 response.metadata["analysis_error"] = str(e)
         
-        return response
+        yield {"event": "done", "response": response}
         
-    except HTTPException:
-        raise
     except Exception as e:
-        # 清理可能已保存的文件
-        if 'file_path' in locals() and file_path.exists():
-            file_path.unlink()
+        # 清理已保存的文件
+        if file_path.exists():
+            _remove_upload_file(file_path, content_hash)
         
-        raise HTTPException(
-            status_code=500,
-            detail=f"文件上传失败: {str(e)}"
-        )
+        yield {
+            "event": "error",
+            "status_code": 500,
+            "error": f"文件上传失败: {str(e)}"
+        }
+
+
+async def _save_upload(file: UploadFile, file_path: Path, max_bytes: int) -> Tuple[str, bool]:
+    """
+    分块异步保存上传文件，同时计算 SHA-256 并按内容去重
+    
+    读取在事件循环中异步进行，写盘和哈希在线程中执行；超过大小上限时中止（413）。
+    内容相同的文件只在 BLOB_DIR 中保存一份，文档路径为指向它的硬链接
+    （文件系统不支持硬链接时退化为复制）
+    
+    Returns:
+        (内容哈希, 是否与已有文件重复)
+    """
+    hasher = hashlib.sha256()
+    temp_path = BLOB_DIR / f".{file_path.name}.part"
+    size = 0
+    try:
+        with open(temp_path, "wb") as buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"文件大小超过上限 {MAX_UPLOAD_MB:g} MB")
+                await asyncio.to_thread(_write_chunk, buffer, hasher, chunk)
+        
+        return await asyncio.to_thread(_commit_upload, temp_path, file_path, hasher.hexdigest())
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+def _write_chunk(buffer: BinaryIO, hasher, chunk: bytes):
+    hasher.update(chunk)
+    buffer.write(chunk)
+
+
+def _commit_upload(temp_path: Path, file_path: Path, content_hash: str) -> Tuple[str, bool]:
+    """将临时文件移入去重存储（已存在则丢弃），并链接到文档路径"""
+    blob_path = BLOB_DIR / f"{content_hash}{file_path.suffix}"
+    deduplicated = blob_path.exists()
+    if not deduplicated:
+        os.replace(temp_path, blob_path)
+    
+    try:
+        os.link(blob_path, file_path)
+    except OSError:
+        shutil.copyfile(blob_path, file_path)
+    return content_hash, deduplicated
+
+
+def _remove_upload_file(file_path: Path, content_hash: Optional[str] = None):
+    """
+    删除文档文件；对应的去重文件不再被任何文档引用时一并删除
+    
+    Args:
+        file_path: 文档文件路径
+        content_hash: 上传时计算的内容哈希；未知时按 inode 查找文档文件链接的去重文件
+                      （不重新读取和哈希文件内容）
+    """
+    inode = file_path.stat().st_ino
+    if content_hash:
+        blob_path = BLOB_DIR / f"{content_hash}{file_path.suffix}"
+    else:
+        blob_path = _find_blob(file_path.suffix, inode)
+    file_path.unlink()
+    
+    try:
+        # 只清理与文档文件为同一硬链接的去重文件（复制而来的文件不影响去重文件）
+        if blob_path is not None and blob_path.exists():
+            blob_stat = blob_path.stat()
+            if blob_stat.st_ino == inode and blob_stat.st_nlink == 1:
+                blob_path.unlink()
+    except OSError as e:
+        logger.warning(f"⚠️  清理去重文件失败 {blob_path.name}: {str(e)}")
+
+
+def _find_blob(suffix: str, inode: int) -> Optional[Path]:
+    """按 inode 查找文档文件链接的去重文件（目录项自带 inode，无需逐个 stat）"""
+    with os.scandir(BLOB_DIR) as entries:
+        for entry in entries:
+            if entry.name.endswith(suffix) and entry.inode() == inode:
+                return Path(entry.path)
+    return None
+
+
+def _content_preview(text: str) -> str:
+    """内容预览（前 PREVIEW_LENGTH 字）"""
+    return text[:PREVIEW_LENGTH] + "..." if len(text) > PREVIEW_LENGTH else text
+
+
+async def _iterate_in_thread(iterator: Iterator) -> AsyncGenerator[Any, None]:
+    """
+    在有界解析线程池中逐项推进同步迭代器，解析期间不阻塞事件循环
+    
+    请求被取消时 next() 可能仍在线程中执行，此时关闭生成器会抛出
+    "generator already executing"；关闭操作挂在该次 next() 完成之后执行
+    """
+    executor = get_parse_executor()
+    done = object()
+    pending = None
+    try:
+        while True:
+            pending = executor.submit(next, iterator, done)
+            item = await asyncio.wrap_future(pending)
+            if item is done:
+                return
+            yield item
+    finally:
+        if pending is None:
+            iterator.close()
+        else:
+            # 已完成时立即在当前线程关闭，否则在解析线程中 next() 返回后关闭
+            pending.add_done_callback(lambda _: iterator.close())
 
 
 @router.post("/analyze-workflow", response_model=WorkflowAnalysisResponse)
@@ -130,7 +548,10 @@ async def analyze_with_workflow(request: WorkflowAnalysisRequest):
         result = await workflow_service.analyze_with_workflow(
             material=request.material,
             investor_id=request.investor_id,
-            additional_context=request.additional_context
+            additional_context=request.additional_context,
+            use_cache=not request.bypass_cache,
+            investor_ids=request.investor_ids,
+            resume=request.resume
         )
         
         return WorkflowAnalysisResponse(
@@ -140,6 +561,8 @@ async def analyze_with_workflow(request: WorkflowAnalysisRequest):
             error=result.get("error"),
             metadata={
                 "investor_id": request.investor_id,
+                "investor_ids": result.get("investor_ids"),
+                "resumed_nodes": result.get("resumed_nodes"),
                 "completed_at": result.get("completed_at")
             }
         )
@@ -172,8 +595,14 @@ async def analyze_document(request: DocumentAnalysisRequest):
     try:
         result = await workflow_service.parse_and_analyze_document(
             file_path=str(file_path),
+            document_id=request.document_id,
             investor_id=request.investor_id,
-            additional_context=request.additional_context
+            additional_context=request.additional_context,
+            use_cache=not request.bypass_cache,
+            investor_ids=request.investor_ids,
+            resume=request.resume,
+            parse_profile=request.parse_profile,
+            durable=request.durable
         )
         
         return WorkflowAnalysisResponse(
@@ -194,6 +623,63 @@ async def analyze_document(request: DocumentAnalysisRequest):
         )
 
 
+@router.post("/analyze-batch")
+async def analyze_batch(request: BatchWorkflowRequest):
+    """
+    批量工作流分析（N 份材料/文档 × M 位投资者）
+    
+    所有条目在服务端全局并发上限内调度，内容相同的材料只分析一次。
+    结果按完成顺序流式返回（NDJSON 每行一个 JSON，或 SSE），条目类型：
+    - **item**: 单个条目完成（含 index、item_id、success、final_report、deduplicated）
+    - **done**: 全部完成（含 total、succeeded、failed、deduplicated 统计）
+    - **error**: 批次执行出错
+    """
+    if not request.materials and not request.document_ids:
+        raise HTTPException(status_code=400, detail="materials 和 document_ids 不能同时为空")
+    
+    # 文档 ID 对应的上传文件（不存在的文档在结果流中单独报错，不影响整批）
+    document_files = {}
+    for document_id in dict.fromkeys(request.document_ids):
+        matches = list(UPLOAD_DIR.glob(f"{document_id}.*"))
+        document_files[document_id] = str(matches[0]) if matches else None
+    
+    async def event_generator() -> AsyncGenerator[str, None]:
+        try:
+            async for event in workflow_service.analyze_batch(
+                materials=request.materials,
+                document_files=document_files,
+                investor_ids=request.investor_ids,
+                additional_context=request.additional_context,
+                use_cache=not request.bypass_cache,
+                resume=request.resume,
+                max_concurrency=request.max_concurrency,
+                parse_profile=request.parse_profile,
+                durable=request.durable
+            ):
+                yield _format_stream_event(event, request.stream_format)
+        except Exception as e:
+            yield _format_stream_event({"event": "error", "error": str(e)}, request.stream_format)
+    
+    media_type = "text/event-stream" if request.stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        event_generator(),
+        media_type=media_type,
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # 禁用 Nginx 缓冲
+        }
+    )
+
+
+def _format_stream_event(event: Dict[str, Any], stream_format: str) -> str:
+    """按 NDJSON 或 SSE 格式序列化流式事件"""
+    if stream_format == "sse":
+        event = dict(event)
+        event_type = event.pop("event")
+        return f"event: {event_type}\ndata: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+    return json.dumps(event, ensure_ascii=False, default=str) + "\n"
+
+
 @router.get("")
 async def list_documents():
     """列出所有已上传的文档"""
@@ -219,6 +705,32 @@ async def list_documents():
     }
 
 
+@router.get("/parsed", response_model=Dict[str, Any])
+async def list_parsed_documents(
+    limit: int = Query(50, ge=1, le=200, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="分页游标（上一页返回的 next_cursor）"),
+    format: Optional[str] = Query(None, description="按格式筛选（pdf/word/markdown/text）")
+):
+    """列出已解析入库的文档（摘要字段，按上传时间倒序游标分页）"""
+    from storage.document_manager import get_document_manager
+    from storage.pagination import InvalidCursorError, next_page_cursor
+    
+    doc_manager = get_document_manager()
+    try:
+        documents = await doc_manager.list_documents(
+            limit=limit,
+            cursor=cursor,
+            format_filter=format
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "documents": documents,
+        "next_cursor": next_page_cursor(documents, limit)
+    }
+
+
 @router.delete("/{document_id}")
 async def delete_document(document_id: str):
     """删除指定文档"""
@@ -232,7 +744,7 @@ async def delete_document(document_id: str):
     
     try:
         for file_path in document_files:
-            file_path.unlink()
+            _remove_upload_file(file_path)
         
         return {
             "success": True,
@@ -255,7 +767,8 @@ async def get_supported_formats():
         "parser_info": {
             "pdf": "支持 PDF 文档（财报、研究报告）",
             "word": "支持 Word 文档（.doc, .docx）",
-            "markdown": "支持 Markdown 文档（.md）"
+            "markdown": "支持 Markdown 文档（.md）",
+            "text": "支持纯文本文档（.txt）"
         }
     }
 
@@ -263,9 +776,9 @@ async def get_supported_formats():
 @router.get("/{document_id}/markdown", response_model=Dict[str, Any])
 async def get_document_markdown(document_id: str):
     """获取文档的 Markdown 内容"""
-    from storage.document_manager import DocumentManager
+    from storage.document_manager import get_document_manager
     
-    doc_manager = DocumentManager()
+    doc_manager = get_document_manager()
     markdown_content = await doc_manager.get_document_markdown(document_id)
     
     if not markdown_content:
@@ -280,9 +793,9 @@ async def get_document_markdown(document_id: str):
 @router.get("/{document_id}/metrics", response_model=Dict[str, Any])
 async def get_document_metrics(document_id: str):
     """获取文档的财务指标"""
-    from storage.document_manager import DocumentManager
+    from storage.document_manager import get_document_manager
     
-    doc_manager = DocumentManager()
+    doc_manager = get_document_manager()
     metrics = await doc_manager.get_metrics(document_id)
     
     if not metrics:
@@ -297,23 +810,44 @@ async def get_document_metrics(document_id: str):
 @router.get("/{document_id}/reports", response_model=List[Dict[str, Any]])
 async def get_document_reports(
     document_id: str,
-    investor_id: Optional[str] = None
+    response: Response,
+    investor_id: Optional[str] = None,
+    summary: bool = Query(False, description="只返回报告摘要（report_preview），不含报告全文"),
+    limit: int = Query(50, ge=1, le=200, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="分页游标（上一页响应头 X-Next-Cursor 的值）")
 ):
-    """获取文档的分析报告列表"""
-    from storage.document_manager import DocumentManager
+    """
+    获取文档的分析报告列表
     
-    doc_manager = DocumentManager()
-    reports = await doc_manager.list_reports(document_id, investor_id)
+    响应体保持为报告数组，下一页游标通过响应头 X-Next-Cursor 返回（没有更多报告时不返回）
+    """
+    from storage.document_manager import get_document_manager
+    from storage.pagination import InvalidCursorError, next_page_cursor
+    
+    doc_manager = get_document_manager()
+    try:
+        reports = await doc_manager.list_reports(
+            limit=limit,
+            cursor=cursor,
+            document_filter=document_id,
+            investor_filter=investor_id,
+            summary=summary
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
+    next_cursor = next_page_cursor(reports, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return reports
 
 
 @router.get("/{document_id}/full", response_model=Dict[str, Any])
 async def get_document_full_info(document_id: str):
     """获取文档的完整信息（包含 markdown、指标、报告）"""
-    from storage.document_manager import DocumentManager
+    from storage.document_manager import get_document_manager
     
-    doc_manager = DocumentManager()
+    doc_manager = get_document_manager()
     full_info = await doc_manager.get_document_full_info(document_id)
     
     if not full_info:
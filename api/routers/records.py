@@ -4,6 +4,7 @@ from typing import Optional
 
 from api.models.responses import RecordListResponse, StatisticsResponse, RecordItem
 from api.services import get_record_service
+from storage.pagination import InvalidCursorError, next_page_cursor
 
 router = APIRouter()
 
@@ -11,19 +12,22 @@ router = APIRouter()
 @router.get("/records", response_model=RecordListResponse)
 async def get_recent_records(
     limit: int = Query(20, ge=1, le=100, description="返回记录数量"),
-    investor_filter: Optional[str] = Query(None, description="按投资者筛选")
+    investor_filter: Optional[str] = Query(None, description="按投资者筛选"),
+    cursor: Optional[str] = Query(None, description="分页游标（上一页返回的 next_cursor）")
 ):
     """
     获取最近分析记录
     
     - **limit**: 返回记录数量 (1-100)
     - **investor_filter**: 可选的投资者ID筛选
+    - **cursor**: 分页游标，为空时返回最新一页
     """
     try:
         service = get_record_service()
         records = await service.get_recent_records(
             limit=limit,
-            investor_filter=investor_filter
+            investor_filter=investor_filter,
+            cursor=cursor
         )
         
         # 转换为响应模型
@@ -32,8 +36,11 @@ async def get_recent_records(
         return RecordListResponse(
             records=record_items,
             total=len(record_items),
-            page=1
+            page=1,
+            next_cursor=next_page_cursor(records, limit, id_field="record_id")
         )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取记录失败: {str(e)}")
 
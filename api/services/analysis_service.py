@@ -7,22 +7,23 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from typing import AsyncGenerator, Dict, Any, List
-from analysis.perspective_analyzer import PerspectiveAnalyzer
-from storage.db_manager import AnalysisRecordManager
+from analysis.llm_registry import get_analyzer
+from storage.db_manager import get_record_manager
 
 
 class AnalysisService:
     """分析服务类 - 封装 PerspectiveAnalyzer 为异步接口"""
     
     def __init__(self, llm_provider: str = "siliconflow"):
-        self.analyzer = PerspectiveAnalyzer(llm_provider=llm_provider)
-        self.record_manager = AnalysisRecordManager()
+        self.analyzer = get_analyzer(llm_provider=llm_provider)
+        self.record_manager = get_record_manager()
     
     async def analyze_single_stream(
         self,
         material: str,
         investor_id: str,
-        additional_context: str = None
+        additional_context: str = None,
+        use_cache: bool = True
     ) -> AsyncGenerator[str, None]:
         """
         单一视角流式分析（异步非阻塞）
@@ -30,23 +31,14 @@ class AnalysisService:
         yields: 流式文本片段
         """
         try:
-            # 在线程池中执行分析，避免阻塞主事件循环
-            result = await asyncio.to_thread(
-                self.analyzer.analyze_from_perspective,
+            # 直接消费 LLM 的异步流，provider 产生的文本片段立即返回
+            async for chunk in self.analyzer.astream_from_perspective(
                 material=material,
                 investor_id=investor_id,
-                additional_context=additional_context
-            )
-            
-            # 模拟流式输出 - 每次返回一个字符
-            analysis_text = result['analysis']
-            chunk_size = 50  # 每次返回50个字符
-            
-            for i in range(0, len(analysis_text), chunk_size):
-                chunk = analysis_text[i:i + chunk_size]
+                additional_context=additional_context,
+                use_cache=use_cache
+            ):
                 yield chunk
-                # 添加小延迟，模拟流式效果
-                await asyncio.sleep(0.01)
                 
         except Exception as e:
             yield f"\n\n❌ 分析出错: {str(e)}"
@@ -55,7 +47,8 @@ class AnalysisService:
         self,
         material: str,
         investor_id: str,
-        additional_context: str = None
+        additional_context: str = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         单一视角完整分析（异步非阻塞）
@@ -68,7 +61,8 @@ class AnalysisService:
             self.analyzer.analyze_from_perspective,
             material=material,
             investor_id=investor_id,
-            additional_context=additional_context
+            additional_context=additional_context,
+            use_cache=use_cache
         )
         
         # 结果已包含 record_id（在 analyze_from_perspective 中已保存）
@@ -78,49 +72,34 @@ class AnalysisService:
         self,
         material: str,
         investor_ids: List[str],
-        additional_context: str = None
-    ) -> AsyncGenerator[str, None]:
+        additional_context: str = None,
+        use_cache: bool = True
+    ) -> AsyncGenerator[Dict[str, Any], None]:
         """
         多视角对比流式分析（异步非阻塞）
         
-        yields: 流式文本片段
+        各投资者并发分析，完成一个返回一个，随后流式返回对比总结
+        
+        yields: 事件字典（analysis / summary / done / error）
         """
         try:
-            # 在线程池中执行，避免阻塞
-            result = await asyncio.to_thread(
-                self.analyzer.compare_perspectives,
+            async for event in self.analyzer.astream_compare_perspectives(
                 material=material,
                 investor_ids=investor_ids,
-                additional_context=additional_context
-            )
-            
-            # 格式化输出
-            output = "# 多视角对比分析\n\n"
-            
-            # 各投资者分析
-            for analysis in result['analyses']:
-                output += f"## {analysis['investor_name']} ({analysis['investor_title']})\n\n"
-                output += f"{analysis['analysis']}\n\n"
-                output += "---\n\n"
-            
-            # 综合对比
-            output += "## 🔍 综合对比总结\n\n"
-            output += result['comparison_summary']
-            
-            # 模拟流式输出
-            chunk_size = 80
-            for i in range(0, len(output), chunk_size):
-                chunk = output[i:i + chunk_size]
-                yield chunk
+                additional_context=additional_context,
+                use_cache=use_cache
+            ):
+                yield event
                 
         except Exception as e:
-            yield f"\n\n❌ 对比分析出错: {str(e)}"
+            yield {"event": "error", "data": f"对比分析出错: {str(e)}"}
     
     async def compare_perspectives(
         self,
         material: str,
         investor_ids: List[str],
-        additional_context: str = None
+        additional_context: str = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         多视角对比完整分析（异步非阻塞）
@@ -133,10 +112,17 @@ class AnalysisService:
             self.analyzer.compare_perspectives,
             material=material,
             investor_ids=investor_ids,
-            additional_context=additional_context
+            additional_context=additional_context,
+            use_cache=use_cache
         )
         
         return result
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取 LLM 响应缓存的命中统计"""
+        if not self.analyzer.cache:
+            return {"backend": "disabled", "hits": 0, "misses": 0, "hit_rate": 0.0}
+        return self.analyzer.cache.stats()
 
 
 # 全局服务实例
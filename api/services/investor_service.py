@@ -5,14 +5,14 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from typing import List, Dict, Any
-from analysis.investor_profiles import InvestorProfileManager
+from analysis.investor_profiles import get_profile_manager
 
 
 class InvestorService:
     """投资者服务类"""
     
     def __init__(self):
-        self.manager = InvestorProfileManager()
+        self.manager = get_profile_manager()
     
     async def get_all_investors(self) -> List[Dict[str, Any]]:
         """获取所有投资者列表"""
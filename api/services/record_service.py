@@ -6,52 +6,31 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from typing import List, Dict, Any, Optional
-from storage.db_manager import AnalysisRecordManager
+from storage.db_manager import PREVIEW_LENGTH, get_record_manager
 
 
 class RecordService:
     """历史记录服务类"""
     
     def __init__(self):
-        self.manager = AnalysisRecordManager()
+        self.manager = get_record_manager()
     
     async def get_recent_records(
         self,
         limit: int = 20,
-        investor_filter: Optional[str] = None
+        investor_filter: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """获取最近记录（异步）"""
+        """获取最近记录（异步，只查询摘要字段，按游标分页）"""
         # 直接调用异步方法，不需要 asyncio.to_thread
         records = await self.manager.get_recent_analyses(
             limit=limit,
-            investor_id=investor_filter
+            investor_id=investor_filter,
+            summary=True,
+            cursor=cursor
         )
         
-        # 格式化记录，添加预览
-        formatted_records = []
-        for record in records:
-            formatted = {
-                "record_id": str(record.get("_id", "")),
-                "type": record.get("type", "single"),
-                "material": record.get("material", ""),
-                "created_at": record.get("created_at"),
-            }
-            
-            # 根据类型添加不同字段
-            if record.get("type") == "comparison":
-                formatted["investor_names"] = [
-                    a.get("investor_name") for a in record.get("analyses", [])
-                ]
-                # 预览第一个分析结果
-                preview = record.get("analyses", [{}])[0].get("analysis", "")[:200]
-            else:
-                formatted["investor_name"] = record.get("investor_name", "")
-                preview = record.get("analysis_result", "")[:200]
-            
-            formatted["preview"] = preview + "..." if len(preview) == 200 else preview
-            formatted_records.append(formatted)
-        
-        return formatted_records
+        return [self._format_record(record) for record in records]
     
     async def get_record_detail(self, record_id: str) -> Optional[Dict[str, Any]]:
         """获取记录详情（异步）"""
@@ -63,11 +42,12 @@ class RecordService:
         limit: int = 20,
         investor_filter: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """搜索记录（异步）"""
+        """搜索记录（异步，只查询摘要字段）"""
         # 直接调用异步方法
         records = await self.manager.search_analyses(
             keyword=keyword,
-            limit=limit
+            limit=limit,
+            summary=True
         )
         
         # 如果有投资者过滤，进一步筛选
@@ -78,29 +58,29 @@ class RecordService:
                    investor_filter in [a.get("investor_id") for a in r.get("analyses", [])]
             ]
         
-        # 格式化输出（复用 get_recent_records 的逻辑）
-        formatted_records = []
-        for record in records:
-            formatted = {
-                "record_id": str(record.get("_id", "")),
-                "type": record.get("type", "single"),
-                "material": record.get("material", ""),
-                "created_at": record.get("created_at"),
-            }
-            
-            if record.get("type") == "comparison":
-                formatted["investor_names"] = [
-                    a.get("investor_name") for a in record.get("analyses", [])
-                ]
-                preview = record.get("analyses", [{}])[0].get("analysis", "")[:200]
-            else:
-                formatted["investor_name"] = record.get("investor_name", "")
-                preview = record.get("analysis_result", "")[:200]
-            
-            formatted["preview"] = preview + "..." if len(preview) == 200 else preview
-            formatted_records.append(formatted)
+        return [self._format_record(record) for record in records]
+    
+    @staticmethod
+    def _format_record(record: Dict[str, Any]) -> Dict[str, Any]:
+        """将摘要记录格式化为列表项（材料和分析结果均为保存时截取的预览）"""
+        formatted = {
+            "record_id": str(record.get("_id", "")),
+            "type": record.get("type", "single"),
+            "material": record.get("material_preview", ""),
+            "created_at": record.get("created_at"),
+        }
+        
+        # 根据类型添加不同字段
+        if record.get("type") == "comparison":
+            formatted["investor_names"] = [
+                a.get("investor_name") for a in record.get("analyses", [])
+            ]
+        else:
+            formatted["investor_name"] = record.get("investor_name", "")
         
-        return formatted_records
+        preview = record.get("preview", "")
+        formatted["preview"] = preview + "..." if len(preview) == PREVIEW_LENGTH else preview
+        return formatted
     
     async def get_statistics(self) -> Dict[str, Any]:
         """获取统计信息（异步）"""
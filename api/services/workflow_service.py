@@ -4,7 +4,7 @@
 """
 
 import asyncio
-from typing import Dict, Any
+from typing import Dict, Any, AsyncGenerator, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -35,7 +35,11 @@ class WorkflowService:
         material: str,
         investor_id: str = "buffett",
         document_id: str = None,
-        additional_context: str = None
+        additional_context: str = None,
+        use_cache: bool = True,
+        investor_ids: Optional[List[str]] = None,
+        resume: bool = False,
+        tables: Optional[List] = None
     ) -> Dict[str, Any]:
         """
         使用工作流进行分析（异步）
@@ -45,6 +49,10 @@ class WorkflowService:
             investor_id: 投资者 ID
             document_id: 文档 ID（可选）
             additional_context: 额外上下文
+            use_cache: 是否使用 LLM 响应缓存
+            investor_ids: 多个投资者 ID（可选），并行分析并生成合并报告
+            resume: 是否复用已成功节点的检查点（仅重跑失败的步骤）
+            tables: 文档解析出的表格（可选），用于提取多期指标
             
         Returns:
             工作流执行结果
@@ -56,9 +64,17 @@ class WorkflowService:
             material=material,
             investor_id=investor_id,
             document_id=document_id,
-            additional_context=additional_context
+            additional_context=additional_context,
+            use_cache=use_cache,
+            investor_ids=investor_ids,
+            resume=resume,
+            tables=tables
         )
         
+        # 调用方已持有材料原文和表格，结果中不再回传，避免响应体重复携带全文
+        result.pop("material", None)
+        result.pop("tables", None)
+        
         return result
     
     async def parse_and_analyze_document(
@@ -66,28 +82,44 @@ class WorkflowService:
         file_path: str,
         document_id: str,
         investor_id: str = "buffett",
-        additional_context: str = None
+        additional_context: str = None,
+        use_cache: bool = True,
+        investor_ids: Optional[List[str]] = None,
+        resume: bool = False,
+        parse_profile: Optional[str] = None,
+        durable: bool = True
     ) -> Dict[str, Any]:
         """
         解析文档并进行工作流分析
         
+        durable 时文档、指标和报告直接写入数据库，任一写入失败都作为错误返回；
+        否则放入 DocumentManager 的写缓冲，按集合批量写入
+        
         Args:
             file_path: 文档文件路径
             document_id: 文档ID
             investor_id: 投资者 ID
             additional_context: 额外上下文
+            use_cache: 是否使用 LLM 响应缓存
+            investor_ids: 多个投资者 ID（可选），并行分析并生成合并报告
+            resume: 是否复用已成功节点的检查点（仅重跑失败的步骤）
+            parse_profile: 文档解析档位（text/tables/full）
+            durable: 是否直接写入数据库并确认成功后再返回；为 False 时由写缓冲在后台写入
             
         Returns:
             分析结果
         """
-        from analysis.document_parser import parse_document
-        from storage.document_manager import DocumentManager
-        from pathlib import Path
+        from analysis.document_parser import get_parse_executor, get_parse_limiter, parse_document
+        from storage.document_manager import get_document_manager
         
-        doc_manager = DocumentManager()
+        doc_manager = get_document_manager()
         
-        # 1. 解析文档
-        parse_result = await asyncio.to_thread(parse_document, file_path)
+        # 1. 解析文档（保存完整全文；材料长度上限只在工作流构建初始状态时应用），
+        #    与上传和批量分析共用解析名额和解析线程池
+        async with get_parse_limiter():
+            parse_result = await asyncio.get_running_loop().run_in_executor(
+                get_parse_executor(), parse_document, file_path, parse_profile
+            )
         
         if not parse_result.get("success"):
             return {
@@ -96,18 +128,10 @@ class WorkflowService:
                 "final_report": None
             }
         
-        # 2. 保存文档到数据库
-        try:
-            await doc_manager.save_document(
-                document_id=document_id,
-                filename=Path(file_path).name,
-                content=parse_result.get("content", ""),
-                format=parse_result.get("format", "unknown"),
-                markdown_content=parse_result.get("content", ""),  # 原样保存，后续可转换
-                metadata=parse_result.get("metadata", {})
-            )
-        except Exception as e:
-            logger.error(f"保存文档失败: {str(e)}")
+        # 2. 保存文档到数据库（非 durable 时放入写缓冲，分析期间由定时刷新写入）
+        save_error = await self._save_parsed_document(
+            doc_manager, document_id, file_path, parse_result, wait=durable
+        )
         
         # 3. 使用工作流分析
         material = parse_result.get("content", "")
@@ -116,34 +140,22 @@ class WorkflowService:
             material=material,
             investor_id=investor_id,
             document_id=document_id,
-            additional_context=additional_context
+            additional_context=additional_context,
+            use_cache=use_cache,
+            investor_ids=investor_ids,
+            resume=resume,
+            tables=parse_result.get("tables")
         )
         
-        # 4. 保存指标和报告
-        try:
-            if workflow_result.get("calculated_metrics"):
-                await doc_manager.save_metrics(
-                    document_id=document_id,
-                    metrics=workflow_result["calculated_metrics"].get("metrics", {}),
-                    summary=workflow_result["calculated_metrics"].get("summary", {})
-                )
-            
-            if workflow_result.get("final_report"):
-                investor_info = workflow_result.get("investor_info", {})
-                await doc_manager.save_report(
-                    document_id=document_id,
-                    investor_id=investor_id,
-                    investor_name=investor_info.get("name", "未知"),
-                    report_markdown=workflow_result["final_report"].get("markdown", ""),
-                    structured_data=workflow_result["final_report"].get("structured_data", {}),
-                    metadata=workflow_result["final_report"].get("metadata", {})
-                )
-        except Exception as e:
-            logger.error(f"保存分析结果失败: {str(e)}")
+        # 4. 保存指标和报告（durable 时直接写入，否则与文档一起批量写入）
+        save_error = save_error or await self._save_workflow_results(
+            doc_manager, document_id, workflow_result, wait=durable
+        )
         
-        # 5. 整合结果
+        # 5. 整合结果（durable 时写入失败也视为失败）
+        error = workflow_result.get("error") or (save_error if durable else None)
         return {
-            "success": not workflow_result.get("error"),
+            "success": not error,
             "document_info": {
                 "format": parse_result.get("format"),
                 "pages": parse_result.get("pages"),
@@ -151,5 +163,223 @@ class WorkflowService:
             },
             "workflow_result": workflow_result,
             "final_report": workflow_result.get("final_report"),
-            "error": workflow_result.get("error")
+            "error": error
         }
+    
+    async def analyze_batch(
+        self,
+        materials: List[str],
+        document_files: Dict[str, Optional[str]],
+        investor_ids: List[str],
+        additional_context: str = None,
+        use_cache: bool = True,
+        resume: bool = False,
+        max_concurrency: Optional[int] = None,
+        parse_profile: Optional[str] = None,
+        durable: bool = True
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        批量工作流分析，按完成顺序逐条产出结果
+        
+        文档在并发槽位内才读取和解析，避免一次性加载整批文件；
+        文档条目与 parse_and_analyze_document 一样保存解析后的文档、指标和报告：
+        durable 时在产出该条目前直接写入，写入失败记为条目错误；
+        否则放入写缓冲，按批量上限或刷新间隔批量写入数据库
+        
+        Args:
+            materials: 材料文本列表
+            document_files: 文档ID → 上传文件路径（文件不存在时为 None）
+            investor_ids: 投资者 ID 列表
+            additional_context: 额外上下文
+            use_cache: 是否使用 LLM 响应缓存
+            resume: 是否复用已成功节点的检查点
+            max_concurrency: 本批次的并发上限
+            parse_profile: 文档条目的解析档位（text/tables/full）
+            durable: 是否在产出每个条目前确认其结果已写入数据库
+            
+        Yields:
+            事件字典：{"event": "item", ...} 每个条目一条，最后一条为 {"event": "done", ...}
+        """
+        from storage.document_manager import get_document_manager
+        
+        doc_manager = get_document_manager() if document_files else None
+        
+        items = [
+            {"item_id": f"material-{index}", "material": material}
+            for index, material in enumerate(materials)
+        ]
+        for document_id, file_path in document_files.items():
+            items.append({
+                "item_id": document_id,
+                "document_id": document_id,
+                "loader": self._document_loader(
+                    doc_manager, document_id, file_path, parse_profile, durable
+                )
+            })
+        counts = {"total": len(items), "succeeded": 0, "failed": 0, "deduplicated": 0}
+        
+        workflow = self._get_workflow()
+        async for entry in workflow.run_batch(
+            items,
+            investor_ids=investor_ids,
+            additional_context=additional_context,
+            use_cache=use_cache,
+            resume=resume,
+            max_concurrency=max_concurrency
+        ):
+            item = items[entry["index"]]
+            result = entry.pop("result")
+            
+            if result and item.get("document_id") and not entry["error"]:
+                save_error = await self._save_workflow_results(
+                    doc_manager, item["document_id"], result, wait=durable
+                )
+                if save_error and durable:
+                    entry["error"] = save_error
+            
+            counts["failed" if entry["error"] else "succeeded"] += 1
+            counts["deduplicated"] += entry["deduplicated"]
+            
+            yield {
+                "event": "item",
+                **entry,
+                "success": not entry["error"],
+                "final_report": result.get("final_report") if result else None,
+                "calculated_metrics": result.get("calculated_metrics") if result else None,
+                "resumed_nodes": result.get("resumed_nodes") if result else None
+            }
+        
+        yield {"event": "done", **counts}
+    
+    def _document_loader(
+        self,
+        doc_manager,
+        document_id: str,
+        file_path: Optional[str],
+        parse_profile: Optional[str] = None,
+        durable: bool = True
+    ):
+        """
+        构建文档加载函数
+        
+        解析占用文档级解析名额（get_parse_limiter），在有界解析线程池中执行，
+        与上传共用 PARSE_MAX_CONCURRENCY 上限，大批量不会占满默认线程池；
+        解析成功后保存文档，durable 时保存失败作为加载错误抛出
+        """
+        from analysis.document_parser import get_parse_executor, get_parse_limiter, parse_document
+        
+        async def load() -> Dict[str, Any]:
+            if file_path is None:
+                raise FileNotFoundError(f"文档未找到: {document_id}")
+            
+            async with get_parse_limiter():
+                parse_result = await asyncio.get_running_loop().run_in_executor(
+                    get_parse_executor(), parse_document, file_path, parse_profile
+                )
+            if not parse_result.get("success"):
+                raise ValueError(parse_result.get("error", "文档解析失败"))
+            
+            save_error = await self._save_parsed_document(
+                doc_manager, document_id, file_path, parse_result, wait=durable
+            )
+            if save_error and durable:
+                raise RuntimeError(save_error)
+            return {
+                "material": parse_result.get("content", ""),
+                "tables": parse_result.get("tables")
+            }
+        
+        return load
+    
+    @staticmethod
+    async def _save_parsed_document(
+        doc_manager,
+        document_id: str,
+        file_path: str,
+        parse_result: Dict[str, Any],
+        wait: bool = False
+    ) -> Optional[str]:
+        """
+        保存解析后的文档
+        
+        Args:
+            doc_manager: DocumentManager 实例
+            document_id: 文档ID
+            file_path: 文档文件路径
+            parse_result: parse_document 的结果
+            wait: 是否直接写入数据库；为 False 时放入写缓冲（写入失败只记录日志）
+            
+        Returns:
+            保存失败时的错误信息，成功返回 None
+        """
+        from pathlib import Path
+        
+        try:
+            await doc_manager.save_document(
+                document_id=document_id,
+                filename=Path(file_path).name,
+                content=parse_result.get("content", ""),
+                format=parse_result.get("format", "unknown"),
+                markdown_content=parse_result.get("content", ""),  # 原样保存，后续可转换
+                metadata=parse_result.get("metadata", {}),
+                wait=wait
+            )
+        except Exception as e:
+            logger.error(f"保存文档失败: {str(e)}")
+            return f"保存文档失败: {str(e)}"
+        return None
+    
+    async def _save_workflow_results(
+        self,
+        doc_manager,
+        document_id: str,
+        workflow_result: Dict[str, Any],
+        wait: bool = False
+    ) -> Optional[str]:
+        """
+        保存工作流计算的指标和每位投资者的分析报告
+        
+        Args:
+            doc_manager: DocumentManager 实例
+            document_id: 文档ID
+            workflow_result: 工作流结果
+            wait: 是否直接写入数据库；为 False 时放入写缓冲（写入失败只记录日志）
+            
+        Returns:
+            保存失败时的错误信息，成功返回 None
+        """
+        try:
+            if workflow_result.get("calculated_metrics"):
+                await doc_manager.save_metrics(
+                    document_id=document_id,
+                    metrics=workflow_result["calculated_metrics"].get("metrics", {}),
+                    summary=workflow_result["calculated_metrics"].get("summary", {}),
+                    wait=wait
+                )
+            
+            final_report = workflow_result.get("final_report")
+            if final_report:
+                # 每位投资者保存一份报告（多视角时使用各自的单独报告）
+                investor_reports = final_report.get("investor_reports") or {}
+                for analysis in final_report.get("structured_data", {}).get("analyses", []):
+                    investor_info = analysis.get("investor_info") or {}
+                    await doc_manager.save_report(
+                        document_id=document_id,
+                        investor_id=analysis["investor_id"],
+                        investor_name=investor_info.get("name", "未知"),
+                        report_markdown=investor_reports.get(
+                            analysis["investor_id"], final_report.get("markdown", "")
+                        ),
+                        structured_data={
+                            **final_report.get("structured_data", {}),
+                            "investor": investor_info,
+                            "analysis": analysis.get("analysis", ""),
+                            "analyses": [analysis]
+                        },
+                        metadata=final_report.get("metadata", {}),
+                        wait=wait
+                    )
+        except Exception as e:
+            logger.error(f"保存分析结果失败: {str(e)}")
+            return f"保存分析结果失败: {str(e)}"
+        return None
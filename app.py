@@ -20,7 +20,7 @@ try:
 except ImportError:
     print("⚠️  python-dotenv 未安装")
 
-from analysis.perspective_analyzer import PerspectiveAnalyzer
+from analysis.llm_registry import get_analyzer
 from storage.db_manager import AnalysisRecordManager
 from datetime import datetime
 import traceback
@@ -35,7 +35,7 @@ def init_analyzer(provider: str = "siliconflow"):
     """初始化分析器"""
     global analyzer
     try:
-        analyzer = PerspectiveAnalyzer(llm_provider=provider, enable_db=True)
+        analyzer = get_analyzer(llm_provider=provider, enable_db=True)
         return f"✓ 分析器初始化成功 ({provider})"
     except Exception as e:
         return f"✗ 初始化失败: {str(e)}"
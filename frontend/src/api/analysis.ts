@@ -7,6 +7,7 @@ import type {
   AnalysisResponse,
   ComparisonRequest,
   ComparisonResponse,
+  ComparisonStreamEvent,
 } from '@/types/api'
 
 /**
@@ -41,10 +42,12 @@ export function compareMultiple(data: ComparisonRequest): Promise<ComparisonResp
 /**
  * 多视角流式对比分析
  * 注意：由于 POST 请求，需要使用 fetch + SSE 库
+ *
+ * 按到达顺序返回类型化事件：各投资者分析（完成即返回）→ 对比总结片段 → done
  */
 export async function* compareMultipleStream(
   data: ComparisonRequest
-): AsyncGenerator<string, void, unknown> {
+): AsyncGenerator<ComparisonStreamEvent, void, unknown> {
   const response = await fetch('/api/v1/compare/stream', {
     method: 'POST',
     headers: {
@@ -63,22 +66,35 @@ export async function* compareMultipleStream(
   }
 
   const decoder = new TextDecoder()
+  let buffer = ''
 
   try {
     while (true) {
       const { done, value } = await reader.read()
       if (done) break
 
-      const chunk = decoder.decode(value, { stream: true })
-      const lines = chunk.split('\n\n')
+      buffer += decoder.decode(value, { stream: true })
+      // 事件以空行分隔，最后一段可能不完整，留到下次处理
+      const blocks = buffer.split('\n\n')
+      buffer = blocks.pop() ?? ''
 
-      for (const line of lines) {
-        if (line.startsWith('data: ')) {
-          const data = line.slice(6)
-          if (data === '[DONE]') {
-            return
+      for (const block of blocks) {
+        let eventType = 'message'
+        const dataLines: string[] = []
+        for (const line of block.split('\n')) {
+          if (line.startsWith('event: ')) {
+            eventType = line.slice(7)
+          } else if (line.startsWith('data: ')) {
+            dataLines.push(line.slice(6))
           }
-          yield data
+        }
+
+        const payload = dataLines.join('\n')
+        if (payload === '[DONE]') {
+          return
+        }
+        if (eventType !== 'message') {
+          yield { event: eventType, ...JSON.parse(payload) } as ComparisonStreamEvent
         }
       }
     }
@@ -6,14 +6,17 @@ import type { RecordListResponse, StatisticsResponse } from '@/types/api'
 
 /**
  * 获取最近记录
+ * @param cursor - 上一页返回的 next_cursor，为空时获取第一页
  */
 export function getRecentRecords(
   limit: number = 20,
-  investorFilter?: string
+  investorFilter?: string,
+  cursor?: string
 ): Promise<RecordListResponse> {
   return apiClient.get('/records', {
     limit,
     investor_filter: investorFilter,
+    cursor,
   })
 }
 
@@ -38,6 +38,19 @@ export interface ComparisonAnalysis {
   analysis: string
 }
 
+/**
+ * 多视角对比流式事件
+ * - analysis: 单个投资者分析完成（按完成顺序）
+ * - summary: 对比总结文本片段
+ * - done: 全部完成
+ * - error: 出错
+ */
+export type ComparisonStreamEvent =
+  | { event: 'analysis'; investor_id: string; data: ComparisonAnalysis }
+  | { event: 'summary'; data: string }
+  | { event: 'done'; record_id: string | null }
+  | { event: 'error'; data: string }
+
 export interface ComparisonResponse {
   record_id: string
   investor_ids: string[]
@@ -60,6 +73,7 @@ export interface RecordListResponse {
   records: RecordItem[]
   total: number
   page: number
+  next_cursor?: string | null
 }
 
 export interface StatisticsResponse {
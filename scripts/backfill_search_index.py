@@ -0,0 +1,37 @@
+"""
+为历史分析记录和报告补写全文搜索词元并创建文本索引
+
+    python scripts/backfill_search_index.py
+
+新保存的记录在写入时已生成 search_tokens，只需对升级前的数据运行一次
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from storage.db_manager import RECORD_SEARCH_FIELDS, close_mongo_clients
+from storage.document_manager import REPORT_SEARCH_FIELDS, ensure_mongo_indexes, get_document_manager
+from storage.text_search import backfill_search_tokens
+
+
+async def main():
+    doc_manager = get_document_manager()
+
+    try:
+        records = await backfill_search_tokens(doc_manager.db_manager.collection, RECORD_SEARCH_FIELDS)
+        print(f"✓ 分析记录已补写: {records} 条")
+
+        reports = await backfill_search_tokens(doc_manager.reports_collection, REPORT_SEARCH_FIELDS)
+        print(f"✓ 分析报告已补写: {reports} 条")
+
+        await ensure_mongo_indexes()
+    finally:
+        close_mongo_clients()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""
+PDF 解析吞吐基准测试
+对数百页的合成 PDF 比较串行解析与按页并行解析的耗时
+
+    python scripts/benchmark_pdf_parse.py --pages 200 400 800 --workers 4
+
+并行模式首次运行包含进程池启动开销，因此先预热一次再计时；
+同时校验两种模式提取的文本完全一致。
+
+计时前先用表格判断样例（scripts/synthetic_pdf.write_table_fixture_pdf）列出
+tables 档位对每页的判断：页面边框、页眉框等单个矩形的页面应被跳过，
+只有真正的框线网格或数字网格才调用 extract_tables。
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from analysis.document_parser import DocumentParser, _table_settings, shutdown_parse_process_pool
+from scripts.synthetic_pdf import TABLE_FIXTURE_PAGES, write_synthetic_pdf, write_table_fixture_pdf
+
+
+def _time_parse(parser: DocumentParser, pdf_path: Path, repeat: int) -> tuple:
+    """多次解析取最短耗时，返回 (秒, 解析结果)"""
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = parser.parse(pdf_path)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _report_table_pages(pdf_dir: Path) -> bool:
+    """打印表格判断样例每页的结果，返回是否全部符合预期"""
+    import pdfplumber
+
+    fixture = write_table_fixture_pdf(pdf_dir / "table_fixture.pdf")
+    matched = True
+
+    print("📋 tables 档位的表格页判断")
+    with pdfplumber.open(fixture) as pdf:
+        for page, (label, expected) in zip(pdf.pages, TABLE_FIXTURE_PAGES):
+            settings = _table_settings(page, page.extract_text())
+            actual = None if settings is None else ("text" if settings else "lines")
+            matched &= actual == expected
+            decision = "跳过" if actual is None else f"提取表格 ({actual})"
+            print(f"   {'✓' if actual == expected else '✗'} 第 {page.page_number} 页 {label}: {decision}")
+    print()
+    return matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF 串行/并行解析基准测试")
+    parser.add_argument(
+        "--pages", type=int, nargs="+", default=[200, 400, 800], help="合成 PDF 页数"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="并行解析的页范围数")
+    parser.add_argument("--repeat", type=int, default=2, help="每种模式的重复次数")
+    parser.add_argument(
+        "--pdf-dir", type=Path, default=Path("data/benchmarks"), help="合成 PDF 存放目录"
+    )
+    args = parser.parse_args()
+
+    serial = DocumentParser(parallel=False)
+    parallel = DocumentParser(parallel=True, max_workers=args.workers, parallel_min_pages=1)
+
+    print(f"🧪 PDF 解析基准测试（并行 {parallel.max_workers} 个进程）\n")
+    _report_table_pages(args.pdf_dir)
+
+    try:
+        for pages in args.pages:
+            pdf_path = args.pdf_dir / f"synthetic_{pages}p.pdf"
+            if not pdf_path.exists():
+                write_synthetic_pdf(pdf_path, pages=pages)
+
+            # 预热进程池，避免把进程启动时间计入第一个文件
+            parallel.parse(pdf_path)
+
+            serial_seconds, serial_result = _time_parse(serial, pdf_path, args.repeat)
+            parallel_seconds, parallel_result = _time_parse(parallel, pdf_path, args.repeat)
+            identical = serial_result["content"] == parallel_result["content"]
+
+            print(f"📄 {pdf_path.name} ({pages} 页, {pdf_path.stat().st_size / 1024 / 1024:.1f} MB)")
+            print(f"   串行: {serial_seconds:.2f}s ({pages / serial_seconds:.0f} 页/秒)")
+            print(f"   并行: {parallel_seconds:.2f}s ({pages / parallel_seconds:.0f} 页/秒)")
+            print(f"   加速比: {serial_seconds / parallel_seconds:.2f}x  文本一致: {'✓' if identical else '✗'}\n")
+    finally:
+        shutdown_parse_process_pool()
+
+
+if __name__ == "__main__":
+    main()
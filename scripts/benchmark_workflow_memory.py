@@ -0,0 +1,162 @@
+"""
+工作流内存基准测试
+对 50 MB 级 PDF 测量每次工作流执行的峰值 RSS
+
+每个测量在独立子进程中运行，互不影响：
+- parse-only: 只解析 PDF 并持有文本（基线）
+- legacy:     旧的节点实现——解析、计算节点返回 {**state, ...}，
+              parsed_data 携带 raw_text 全文，Send 复制整个状态，结果回传 material
+- workflow:   当前的节点实现（只返回变更字段，全文只保存在 material 中）
+
+后两者都执行解析 + 完整工作流 + 按 API 方式序列化结果，与基线之差即单次工作流的
+额外内存，一次运行即可对比两种节点实现的峰值 RSS。LLM 分析使用离线替身，不产生网络请求：
+
+    python scripts/benchmark_workflow_memory.py --size-mb 50 --files 3
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.synthetic_pdf import write_synthetic_pdf
+
+
+def _peak_rss_mb() -> float:
+    """当前进程的峰值 RSS（MB）"""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+class _OfflineAnalyzer:
+    """离线分析器替身，返回固定的分析结果"""
+
+    def analyze_from_perspective(self, material, investor_id, **kwargs):
+        return {
+            "success": True,
+            "investor_name": investor_id,
+            "investor_title": "benchmark",
+            "investment_philosophy": "benchmark",
+            "analysis": f"离线分析结果（材料长度 {len(material)}）",
+        }
+
+
+def _install_legacy_nodes():
+    """
+    在当前节点外包装旧的状态复制方式（须在构建工作流之前调用）
+
+    旧实现中解析、计算节点返回整个状态的副本，parsed_data 额外保存 raw_text 全文
+    （因此也进入解析检查点和 API 响应），analyze 分支收到整个状态
+    """
+    import analysis.graph_workflow as graph_workflow
+    import analysis.nodes.calculate_node as calculate_node
+    import analysis.nodes.parse_node as parse_node
+
+    Send = graph_workflow.Send
+
+    parse_sync = parse_node.parse_document_node_sync
+    calculate = calculate_node.calculate_metrics_node
+
+    def legacy_parse(state):
+        update = parse_sync(state)
+        parsed_data = {**update["parsed_data"], "raw_text": state.get("material") or ""}
+        return {**state, **update, "parsed_data": parsed_data}
+
+    async def alegacy_parse(state):
+        return legacy_parse(state)
+
+    def legacy_calculate(state):
+        return {**state, **calculate(state)}
+
+    def legacy_fan_out(state):
+        investor_ids = state.get("investor_ids") or [state.get("investor_id", "buffett")]
+        return [Send("analyze", {**state, "investor_id": investor_id}) for investor_id in investor_ids]
+
+    parse_node.parse_document_node_sync = legacy_parse
+    parse_node.parse_document_node = alegacy_parse
+    calculate_node.calculate_metrics_node = legacy_calculate
+    graph_workflow._fan_out_analyses = legacy_fan_out
+
+
+def _measure(mode: str, pdf_path: str, queue):
+    """子进程入口：执行一次测量并回传结果"""
+    from analysis.document_parser import parse_document
+
+    started = time.perf_counter()
+    parsed = parse_document(pdf_path, use_cache=False)
+    material = parsed.get("content", "")
+
+    if mode in ("legacy", "workflow"):
+        import analysis.nodes.analyze_node as analyze_node
+        from analysis.graph_workflow import DataAnalysisWorkflow
+        from analysis.workflow_checkpoint import InMemoryCheckpointer
+
+        analyze_node._get_analyzer = lambda state: _OfflineAnalyzer()
+        if mode == "legacy":
+            _install_legacy_nodes()
+        workflow = DataAnalysisWorkflow(checkpointer=InMemoryCheckpointer())
+        result = workflow.run(material=material, investor_ids=["buffett", "graham"])
+        # 与 API 返回的响应体一致（旧实现回传 material）
+        if mode == "workflow":
+            result.pop("material", None)
+        json.dumps(result, ensure_ascii=False, default=str)
+
+    queue.put({
+        "mode": mode,
+        "chars": len(material),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "seconds": round(time.perf_counter() - started, 2),
+    })
+
+
+def run_in_subprocess(mode: str, pdf_path: Path) -> dict:
+    """在独立子进程中执行测量"""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_measure, args=(mode, str(pdf_path), queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工作流峰值内存基准测试")
+    parser.add_argument("--size-mb", type=float, default=50, help="合成 PDF 大小（MB）")
+    parser.add_argument("--files", type=int, default=1, help="测试文件数量")
+    parser.add_argument(
+        "--pdf-dir", type=Path, default=Path("data/benchmarks"), help="合成 PDF 存放目录"
+    )
+    args = parser.parse_args()
+
+    print(f"🧪 工作流内存基准测试（{args.files} 个 {args.size_mb:.0f} MB PDF）\n")
+
+    for index in range(args.files):
+        pdf_path = args.pdf_dir / f"synthetic_{args.size_mb:.0f}mb_{index}.pdf"
+        if not pdf_path.exists():
+            write_synthetic_pdf(pdf_path, args.size_mb)
+
+        baseline = run_in_subprocess("parse-only", pdf_path)
+        legacy = run_in_subprocess("legacy", pdf_path)
+        workflow = run_in_subprocess("workflow", pdf_path)
+        legacy_overhead = legacy["peak_rss_mb"] - baseline["peak_rss_mb"]
+        overhead = workflow["peak_rss_mb"] - baseline["peak_rss_mb"]
+
+        print(f"📄 {pdf_path.name} ({baseline['chars']:,} 字符)")
+        print(f"   解析基线峰值 RSS:     {baseline['peak_rss_mb']:.1f} MB ({baseline['seconds']}s)")
+        print(f"   旧节点实现峰值 RSS:   {legacy['peak_rss_mb']:.1f} MB ({legacy['seconds']}s)")
+        print(f"   当前节点实现峰值 RSS: {workflow['peak_rss_mb']:.1f} MB ({workflow['seconds']}s)")
+        print(f"   单次工作流额外内存: {legacy_overhead:.1f} MB → {overhead:.1f} MB "
+              f"(减少 {legacy_overhead - overhead:.1f} MB)\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+生成用于基准测试的合成 PDF
+纯 Python 实现（不依赖 reportlab 等库），按目标大小写入多页纯文本 PDF
+"""
+
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+# 每页的财报样例文本（ASCII，使用内置 Helvetica 字体即可渲染）
+PAGE_LINES = [
+    "Annual Report - Page {page}",
+    "PE: {pe} PB: {pb} ROE: {roe}%",
+    "Revenue growth: {growth}% Gross margin: {margin}%",
+    "Dividend yield: {dividend}% Market cap: {cap}",
+]
+FILLER_LINE = "The company maintained stable operating cash flow and a conservative balance sheet. "
+
+
+def _page_stream(page: int, lines_per_page: int) -> bytes:
+    """构建单页的内容流"""
+    values = {
+        "page": page,
+        "pe": 10 + page % 30,
+        "pb": 1 + page % 8,
+        "roe": 5 + page % 25,
+        "growth": page % 40,
+        "margin": 20 + page % 60,
+        "dividend": page % 6,
+        "cap": 1000 + page,
+    }
+    lines = [line.format(**values) for line in PAGE_LINES]
+    lines += [FILLER_LINE] * max(0, lines_per_page - len(lines))
+
+    ops = ["BT", "/F1 9 Tf", "11 TL", "36 806 Td"]
+    for line in lines:
+        ops.append(f"({line}) Tj T*")
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def write_synthetic_pdf(
+    path: Path,
+    target_mb: float = 50,
+    lines_per_page: int = 70,
+    pages: Optional[int] = None
+) -> Path:
+    """
+    写入接近目标大小的合成 PDF
+
+    Args:
+        path: 输出文件路径
+        target_mb: 目标文件大小（MB）
+        lines_per_page: 每页文本行数
+        pages: 指定页数（设置后忽略 target_mb）
+
+    Returns:
+        输出文件路径
+    """
+    page_size = len(_page_stream(1, lines_per_page)) + 200
+    page_count = pages or max(1, int(target_mb * 1024 * 1024 / page_size))
+    return _write_pdf(path, (_page_stream(i + 1, lines_per_page) for i in range(page_count)), page_count)
+
+
+def _write_pdf(path: Path, streams, page_count: int) -> Path:
+    """按顺序写入各页内容流（生成器逐页产出，不在内存中保留整份文件）"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # 对象编号：1 Catalog, 2 Pages, 3 Font, 之后每页占 2 个（Page + Contents）
+    offsets = []
+    with open(path, "wb") as f:
+        def write_obj(body: bytes):
+            offsets.append(f.tell())
+            f.write(f"{len(offsets)} 0 obj\n".encode() + body + b"\nendobj\n")
+
+        f.write(b"%PDF-1.4\n")
+        write_obj(b"<< /Type /Catalog /Pages 2 0 R >>")
+        kids = " ".join(f"{4 + i * 2} 0 R" for i in range(page_count))
+        write_obj(f"<< /Type /Pages /Kids [{kids}] /Count {page_count} >>".encode())
+        write_obj(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+        for i, stream in enumerate(streams):
+            page_id = 4 + i * 2
+            write_obj(
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+            )
+            write_obj(
+                f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream"
+            )
+
+        xref_offset = f.tell()
+        f.write(f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode())
+        for offset in offsets:
+            f.write(f"{offset:010d} 00000 n \n".encode())
+        f.write(
+            f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\n"
+            f"startxref\n{xref_offset}\n%%EOF\n".encode()
+        )
+
+    return path
+
+
+# ==================== 表格判断样例 ====================
+
+def _text_ops(lines, x: int = 48, y: int = 780) -> List[str]:
+    ops = ["BT", "/F1 9 Tf", "11 TL", f"{x} {y} Td"]
+    ops += [f"({line}) Tj T*" for line in lines]
+    ops.append("ET")
+    return ops
+
+
+def _grid_ops(left: int, top: int, columns: int, rows: int, width: int = 120, height: int = 18) -> List[str]:
+    """整条横线和竖线绘制的表格框线"""
+    ops = ["0.5 w"]
+    right, bottom = left + columns * width, top - rows * height
+    for r in range(rows + 1):
+        ops.append(f"{left} {top - r * height} m {right} {top - r * height} l S")
+    for c in range(columns + 1):
+        ops.append(f"{left + c * width} {top} m {left + c * width} {bottom} l S")
+    return ops
+
+
+def _cell_rect_ops(left: int, top: int, columns: int, rows: int, width: int = 120, height: int = 18) -> List[str]:
+    """逐个单元格绘制矩形的表格框线"""
+    ops = ["0.5 w"]
+    for r in range(rows):
+        for c in range(columns):
+            ops.append(f"{left + c * width} {top - (r + 1) * height} {width} {height} re S")
+    return ops
+
+
+def _table_rows(rows: int) -> List[str]:
+    return [f"Item {r}    {1200 + r * 37}    {980 + r * 21}    {12 + r}.5%" for r in range(rows)]
+
+
+# (页面说明, 期望的判断结果：None 跳过 / lines 框线策略 / text 文字对齐策略)
+TABLE_FIXTURE_PAGES = [
+    ("纯文本", None),
+    ("纯文本 + 页面边框", None),
+    ("纯文本 + 页面边框 + 页眉框", None),
+    ("整线框线表格 (4×4)", "lines"),
+    ("逐格矩形表格 (3×3)", "lines"),
+    ("无框线数字表格", "text"),
+]
+
+
+def _table_fixture_stream(index: int) -> bytes:
+    prose = [FILLER_LINE] * 20
+    page_border = ["0.5 w", "30 30 535 782 re S"]
+    header_frame = ["0.5 w", "40 790 515 30 re S"]
+
+    if index == 0:
+        ops = _text_ops(prose)
+    elif index == 1:
+        ops = page_border + _text_ops(prose)
+    elif index == 2:
+        ops = page_border + header_frame + _text_ops(["Annual Report 2023"], y=800) + _text_ops(prose, y=760)
+    elif index == 3:
+        ops = _grid_ops(48, 700, columns=4, rows=4) + _text_ops(_table_rows(4), x=52, y=688)
+    elif index == 4:
+        ops = _cell_rect_ops(48, 700, columns=3, rows=3) + _text_ops(_table_rows(3), x=52, y=688)
+    else:
+        ops = _text_ops(prose[:3] + _table_rows(6))
+    return "\n".join(ops).encode("latin-1")
+
+
+def write_table_fixture_pdf(path: Path) -> Path:
+    """
+    写入表格判断样例 PDF（每页对应 TABLE_FIXTURE_PAGES 中的一项）
+
+    用于检查 tables 档位跳过了哪些页：页框、文本框等单个矩形不应触发表格提取
+    """
+    return _write_pdf(
+        path,
+        (_table_fixture_stream(i) for i in range(len(TABLE_FIXTURE_PAGES))),
+        len(TABLE_FIXTURE_PAGES)
+    )
+
+
+if __name__ == "__main__":
+    output = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("data/benchmarks/synthetic_50mb.pdf")
+    size_mb = float(sys.argv[2]) if len(sys.argv) > 2 else 50
+    write_synthetic_pdf(output, size_mb)
+    print(f"✓ 已生成 {output} ({output.stat().st_size / 1024 / 1024:.1f} MB)")
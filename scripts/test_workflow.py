@@ -113,16 +113,16 @@ def test_metrics_extraction():
     
     from analysis.nodes.calculate_node import calculate_metrics_node
     
-    test_state = {
-        "parsed_data": {
-            "raw_text": """
+    material = """
             PE：25倍
             PB：3.5
             ROE：20%
             营收增长：18%
             毛利率：45%
             """
-        }
+    test_state = {
+        "material": material,
+        "parsed_data": {"format": "text", "metadata": {}, "length": len(material)}
     }
     
     result = calculate_metrics_node(test_state)
@@ -1,4 +1,16 @@
 # storage 模块
-from .db_manager import AnalysisRecordManager
+from .db_manager import (
+    AnalysisRecordManager,
+    close_mongo_clients,
+    get_mongo_client,
+    get_record_manager,
+    get_sync_mongo_client
+)
 
-__all__ = ['AnalysisRecordManager']
+__all__ = [
+    'AnalysisRecordManager',
+    'close_mongo_clients',
+    'get_mongo_client',
+    'get_record_manager',
+    'get_sync_mongo_client'
+]
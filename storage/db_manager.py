@@ -4,19 +4,29 @@ MongoDB 数据库管理模块（异步版本）
 """
 
 import os
+import threading
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from pathlib import Path
 
 try:
     from motor.motor_asyncio import AsyncIOMotorClient
-    from pymongo import ASCENDING, DESCENDING
+    from pymongo import ASCENDING, DESCENDING, MongoClient
     from pymongo.errors import ConnectionFailure, OperationFailure
     MOTOR_AVAILABLE = True
 except ImportError:
     MOTOR_AVAILABLE = False
     print("⚠️  motor 未安装，请运行: pip install motor")
 
+from storage.pagination import KEYSET_SORT, apply_cursor
+from storage.text_search import (
+    SEARCH_EXCLUDE_PROJECTION,
+    SEARCH_TOKENS_FIELD,
+    build_search_tokens,
+    ensure_search_index,
+    text_search
+)
+
 # 加载环境变量
 try:
     from dotenv import load_dotenv
@@ -25,6 +35,142 @@ try:
 except ImportError:
     pass
 
+# 列表预览长度（字符），保存时截取并写入预览字段
+PREVIEW_LENGTH = 200
+
+
+def preview_expression(preview_field: str, source: Any) -> Dict:
+    """
+    预览字段的投影表达式
+
+    优先返回保存时写入的预览字段；没有预览字段的历史记录在服务端截取原文，
+    两种情况都只传输预览长度的文本
+
+    Args:
+        preview_field: 预览字段名
+        source: 原文字段或聚合表达式（如 "$material"）
+
+    Returns:
+        可用于 find 投影的聚合表达式
+    """
+    return {
+        "$ifNull": [
+            f"${preview_field}",
+            {"$substrCP": [{"$ifNull": [source, ""]}, 0, PREVIEW_LENGTH]}
+        ]
+    }
+
+
+# 记录列表只返回摘要字段，不传输材料和分析全文（对比记录的 analyses 只取投资者信息）
+RECORD_SUMMARY_PROJECTION = {
+    "type": 1,
+    "investor_id": 1,
+    "investor_name": 1,
+    "investor_ids": 1,
+    "analyses.investor_id": 1,
+    "analyses.investor_name": 1,
+    "created_at": 1,
+    "material_length": 1,
+    "analysis_length": 1,
+    "material_preview": preview_expression("material_preview", "$material"),
+    "preview": preview_expression(
+        "preview",
+        {"$ifNull": ["$analysis_result", {"$arrayElemAt": ["$analyses.analysis", 0]}]}
+    ),
+}
+
+# 分析记录中参与全文搜索的字段
+RECORD_SEARCH_FIELDS = ["material", "analysis_result", "investor_name", "comparison_summary"]
+
+# 共享连接池默认配置（可通过 MONGODB_MAX_POOL_SIZE / MONGODB_MIN_POOL_SIZE / MONGODB_MAX_IDLE_TIME_MS 覆盖）
+DEFAULT_MAX_POOL_SIZE = 50
+DEFAULT_MIN_POOL_SIZE = 2
+DEFAULT_MAX_IDLE_TIME_MS = 300000
+
+# 进程级共享客户端（按连接字符串区分）
+_clients: Dict[str, "AsyncIOMotorClient"] = {}
+_sync_clients: Dict[str, "MongoClient"] = {}
+_clients_lock = threading.Lock()
+
+
+def _client_options() -> Dict[str, int]:
+    """共享客户端的连接池配置"""
+    return {
+        "serverSelectionTimeoutMS": 5000,
+        "maxPoolSize": int(os.getenv("MONGODB_MAX_POOL_SIZE", DEFAULT_MAX_POOL_SIZE)),
+        "minPoolSize": int(os.getenv("MONGODB_MIN_POOL_SIZE", DEFAULT_MIN_POOL_SIZE)),
+        "maxIdleTimeMS": int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", DEFAULT_MAX_IDLE_TIME_MS))
+    }
+
+
+def get_mongo_client(connection_string: Optional[str] = None) -> "AsyncIOMotorClient":
+    """
+    获取进程级共享的 Motor 客户端（单例模式）
+    
+    每个客户端都有自己的连接池和监控线程，因此同一连接字符串在进程内
+    只创建一个客户端，所有管理器共用
+    
+    Args:
+        connection_string: MongoDB 连接字符串，默认从环境变量 MONGODB_URI 读取
+        
+    Returns:
+        AsyncIOMotorClient 实例
+    """
+    if not MOTOR_AVAILABLE:
+        raise ImportError("需要安装 motor 库")
+    
+    connection_string = connection_string or os.getenv(
+        "MONGODB_URI",
+        "mongodb://localhost:27017/"
+    )
+    with _clients_lock:
+        client = _clients.get(connection_string)
+        if client is None:
+            client = AsyncIOMotorClient(connection_string, **_client_options())
+            _clients[connection_string] = client
+        return client
+
+
+def get_sync_mongo_client(connection_string: Optional[str] = None) -> "MongoClient":
+    """
+    获取进程级共享的同步 pymongo 客户端（单例模式）
+    
+    供在线程池中运行的同步路径（同步分析、同步工作流）使用；
+    首次调用时才创建，只走异步路径的进程不会多出一组连接池和监控线程
+    
+    Args:
+        connection_string: MongoDB 连接字符串，默认从环境变量 MONGODB_URI 读取
+        
+    Returns:
+        MongoClient 实例
+    """
+    if not MOTOR_AVAILABLE:
+        raise ImportError("需要安装 motor 库")
+    
+    connection_string = connection_string or os.getenv(
+        "MONGODB_URI",
+        "mongodb://localhost:27017/"
+    )
+    with _clients_lock:
+        client = _sync_clients.get(connection_string)
+        if client is None:
+            client = MongoClient(connection_string, **_client_options())
+            _sync_clients[connection_string] = client
+        return client
+
+
+def close_mongo_clients():
+    """关闭所有共享的 MongoDB 客户端（应用关闭时调用）"""
+    with _clients_lock:
+        clients = list(_clients.values()) + list(_sync_clients.values())
+        _clients.clear()
+        _sync_clients.clear()
+    
+    for client in clients:
+        client.close()
+    if clients:
+        print("✓ MongoDB 连接已关闭")
+
 
 class AnalysisRecordManager:
     """投资分析记录管理器（异步版本）"""
@@ -33,7 +179,8 @@ class AnalysisRecordManager:
         self,
         connection_string: Optional[str] = None,
         db_name: Optional[str] = None,
-        collection_name: str = "analysis_records"
+        collection_name: str = "analysis_records",
+        cache_collection_name: str = "llm_response_cache"
     ):
         """
         初始化数据库管理器
@@ -42,6 +189,7 @@ class AnalysisRecordManager:
             connection_string: MongoDB 连接字符串，默认从环境变量读取
             db_name: 数据库名称，默认从环境变量读取
             collection_name: 集合名称，默认为 analysis_records
+            cache_collection_name: LLM 响应缓存集合名称
         """
         if not MOTOR_AVAILABLE:
             raise ImportError("需要安装 motor 库")
@@ -56,22 +204,22 @@ class AnalysisRecordManager:
             "muhe_opportunity_radar"
         )
         self.collection_name = collection_name
+        self.cache_collection_name = cache_collection_name
         
         # 连接数据库
         self.client = None
         self.db = None
         self.collection = None
+        self.cache_collection = None
         self._init_connection()
     
     def _init_connection(self):
-        """初始化数据库连接"""
+        """初始化数据库连接（复用进程级共享客户端）"""
         try:
-            self.client = AsyncIOMotorClient(
-                self.connection_string,
-                serverSelectionTimeoutMS=5000
-            )
+            self.client = get_mongo_client(self.connection_string)
             self.db = self.client[self.db_name]
             self.collection = self.db[self.collection_name]
+            self.cache_collection = self.db[self.cache_collection_name]
             
             print(f"✓ 已初始化 MongoDB 连接: {self.db_name}.{self.collection_name}")
             
@@ -79,14 +227,29 @@ class AnalysisRecordManager:
             print(f"✗ MongoDB 初始化出错: {e}")
             self.client = None
     
+    def sync_collection(self, name: str):
+        """
+        获取同名集合的同步 pymongo 版本（使用共享的同步客户端）
+        
+        Args:
+            name: 集合名称
+            
+        Returns:
+            pymongo Collection 实例
+        """
+        return get_sync_mongo_client(self.connection_string)[self.db_name][name]
+    
     async def ensure_indexes(self):
         """创建数据库索引以提高查询性能（异步）"""
         if not self.client:
             return
             
         try:
-            # 时间戳索引（降序，最新的在前）
-            await self.collection.create_index([("created_at", DESCENDING)])
+            # 时间戳索引（降序，最新的在前；带 _id 以支持游标分页）
+            await self.collection.create_index([
+                ("created_at", DESCENDING),
+                ("_id", DESCENDING)
+            ])
             
             # 投资者ID索引
             await self.collection.create_index("investor_id")
@@ -94,9 +257,19 @@ class AnalysisRecordManager:
             # 复合索引：投资者+时间
             await self.collection.create_index([
                 ("investor_id", ASCENDING),
-                ("created_at", DESCENDING)
+                ("created_at", DESCENDING),
+                ("_id", DESCENDING)
             ])
             
+            # 全文搜索：预切分词元数组上的文本索引
+            await ensure_search_index(self.collection)
+            
+            # LLM 响应缓存：键唯一索引 + TTL 索引（到期自动删除）
+            await self.cache_collection.create_index("key", unique=True)
+            await self.cache_collection.create_index(
+                "expires_at", expireAfterSeconds=0
+            )
+            
             print("✓ MongoDB 索引创建成功")
             
         except Exception as e:
@@ -131,18 +304,10 @@ class AnalysisRecordManager:
             return None
         
         try:
-            record = {
-                "material": material,
-                "investor_id": investor_id,
-                "investor_name": investor_name,
-                "analysis_result": analysis_result,
-                "additional_context": additional_context,
-                "metadata": metadata or {},
-                "created_at": datetime.utcnow(),
-                "material_length": len(material),
-                "analysis_length": len(analysis_result)
-            }
-            
+            record = self._analysis_record(
+                material, investor_id, investor_name,
+                analysis_result, additional_context, metadata
+            )
             result = await self.collection.insert_one(record)
             print(f"✓ 已保存分析记录: {result.inserted_id}")
             return str(result.inserted_id)
@@ -151,6 +316,57 @@ class AnalysisRecordManager:
             print(f"✗ 保存分析记录失败: {e}")
             return None
     
+    def save_analysis_sync(
+        self,
+        material: str,
+        investor_id: str,
+        investor_name: str,
+        analysis_result: str,
+        additional_context: Optional[str] = None,
+        metadata: Optional[Dict] = None
+    ) -> Optional[str]:
+        """保存单次分析记录（同步，参数和返回值同 save_analysis）"""
+        if not self.client:
+            print("⚠️  MongoDB 未连接，跳过保存")
+            return None
+        
+        try:
+            record = self._analysis_record(
+                material, investor_id, investor_name,
+                analysis_result, additional_context, metadata
+            )
+            result = self.sync_collection(self.collection_name).insert_one(record)
+            print(f"✓ 已保存分析记录: {result.inserted_id}")
+            return str(result.inserted_id)
+            
+        except Exception as e:
+            print(f"✗ 保存分析记录失败: {e}")
+            return None
+    
+    @staticmethod
+    def _analysis_record(
+        material: str,
+        investor_id: str,
+        investor_name: str,
+        analysis_result: str,
+        additional_context: Optional[str],
+        metadata: Optional[Dict]
+    ) -> Dict:
+        return {
+            "material": material,
+            "investor_id": investor_id,
+            "investor_name": investor_name,
+            "analysis_result": analysis_result,
+            "additional_context": additional_context,
+            "metadata": metadata or {},
+            "created_at": datetime.utcnow(),
+            "material_length": len(material),
+            "analysis_length": len(analysis_result),
+            "material_preview": material[:PREVIEW_LENGTH],
+            "preview": analysis_result[:PREVIEW_LENGTH],
+            SEARCH_TOKENS_FIELD: build_search_tokens(material, analysis_result, investor_name)
+        }
+    
     async def save_comparison(
         self,
         material: str,
@@ -186,7 +402,10 @@ class AnalysisRecordManager:
                 "comparison_summary": comparison_summary,
                 "additional_context": additional_context,
                 "created_at": datetime.utcnow(),
-                "material_length": len(material)
+                "material_length": len(material),
+                "material_preview": material[:PREVIEW_LENGTH],
+                "preview": (analyses[0].get("analysis") or "")[:PREVIEW_LENGTH] if analyses else "",
+                SEARCH_TOKENS_FIELD: build_search_tokens(material, comparison_summary)
             }
             
             result = await self.collection.insert_one(record)
@@ -200,7 +419,9 @@ class AnalysisRecordManager:
     async def get_recent_analyses(
         self,
         limit: int = 10,
-        investor_id: Optional[str] = None
+        investor_id: Optional[str] = None,
+        summary: bool = False,
+        cursor: Optional[str] = None
     ) -> List[Dict]:
         """
         获取最近的分析记录（异步）
@@ -208,23 +429,28 @@ class AnalysisRecordManager:
         Args:
             limit: 返回记录数量
             investor_id: 可选的投资者ID筛选
+            summary: 只返回摘要字段（RECORD_SUMMARY_PROJECTION），不加载材料和分析全文
+            cursor: 分页游标（上一页最后一条记录生成），为空时从最新记录开始
             
         Returns:
-            分析记录列表
+            分析记录列表（按 created_at、_id 倒序）
+            
+        Raises:
+            InvalidCursorError: 游标无法解析
         """
         if not self.client:
             return []
         
+        query = {}
+        if investor_id:
+            query["investor_id"] = investor_id
+        query = apply_cursor(query, cursor)
+        
         try:
-            query = {}
-            if investor_id:
-                query["investor_id"] = investor_id
+            projection = RECORD_SUMMARY_PROJECTION if summary else SEARCH_EXCLUDE_PROJECTION
+            results = self.collection.find(query, projection).sort(KEYSET_SORT).limit(limit)
             
-            cursor = self.collection.find(query).sort(
-                "created_at", DESCENDING
-            ).limit(limit)
-            
-            return await cursor.to_list(length=limit)
+            return await results.to_list(length=limit)
             
         except Exception as e:
             print(f"✗ 查询分析记录失败: {e}")
@@ -245,7 +471,9 @@ class AnalysisRecordManager:
         
         try:
             from bson.objectid import ObjectId
-            return await self.collection.find_one({"_id": ObjectId(record_id)})
+            return await self.collection.find_one(
+                {"_id": ObjectId(record_id)}, SEARCH_EXCLUDE_PROJECTION
+            )
         except Exception as e:
             print(f"✗ 查询分析记录失败: {e}")
             return None
@@ -253,14 +481,18 @@ class AnalysisRecordManager:
     async def search_analyses(
         self,
         keyword: str,
-        limit: int = 20
+        limit: int = 20,
+        summary: bool = False
     ) -> List[Dict]:
         """
         搜索分析记录（异步）
         
+        使用预切分词元的文本索引，结果按相关度排序
+        
         Args:
-            keyword: 搜索关键词
+            keyword: 搜索关键词（按字面匹配）
             limit: 返回记录数量
+            summary: 只返回摘要字段，不加载材料和分析全文
             
         Returns:
             匹配的分析记录列表
@@ -269,21 +501,10 @@ class AnalysisRecordManager:
             return []
         
         try:
-            # 使用正则表达式搜索
-            query = {
-                "$or": [
-                    {"material": {"$regex": keyword, "$options": "i"}},
-                    {"analysis_result": {"$regex": keyword, "$options": "i"}},
-                    {"investor_name": {"$regex": keyword, "$options": "i"}}
-                ]
-            }
-            
-            cursor = self.collection.find(query).sort(
-                "created_at", DESCENDING
-            ).limit(limit)
-            
-            return await cursor.to_list(length=limit)
-            
+            projection = RECORD_SUMMARY_PROJECTION if summary else None
+            return await text_search(
+                self.collection, keyword, RECORD_SEARCH_FIELDS, limit, projection
+            )
         except Exception as e:
             print(f"✗ 搜索分析记录失败: {e}")
             return []
@@ -329,11 +550,131 @@ class AnalysisRecordManager:
             print(f"✗ 获取统计信息失败: {e}")
             return {}
     
+    # ==================== LLM 响应缓存 ====================
+    
+    async def get_cached_response(self, key: str) -> Optional[str]:
+        """
+        读取缓存的 LLM 响应（异步）
+        
+        Args:
+            key: 缓存键
+            
+        Returns:
+            缓存的响应文本，未命中或已过期返回None
+        """
+        if not self.client:
+            return None
+        
+        try:
+            entry = await self.cache_collection.find_one(
+                {"key": key, "expires_at": {"$gt": datetime.utcnow()}}
+            )
+            return entry["response"] if entry else None
+        except Exception as e:
+            print(f"✗ 读取缓存失败: {e}")
+            return None
+    
+    async def save_cached_response(
+        self,
+        key: str,
+        response: str,
+        expires_at: datetime
+    ) -> bool:
+        """
+        保存 LLM 响应到缓存（异步）
+        
+        Args:
+            key: 缓存键
+            response: 响应文本
+            expires_at: 过期时间（TTL 索引据此自动清理）
+            
+        Returns:
+            是否保存成功
+        """
+        if not self.client:
+            return False
+        
+        try:
+            await self.cache_collection.update_one(
+                {"key": key},
+                {"$set": self._cache_entry(key, response, expires_at)},
+                upsert=True
+            )
+            return True
+        except Exception as e:
+            print(f"✗ 保存缓存失败: {e}")
+            return False
+    
+    def get_cached_response_sync(self, key: str) -> Optional[str]:
+        """读取缓存的 LLM 响应（同步，使用共享的 pymongo 客户端）"""
+        if not self.client:
+            return None
+        
+        try:
+            entry = self.sync_collection(self.cache_collection_name).find_one(
+                {"key": key, "expires_at": {"$gt": datetime.utcnow()}}
+            )
+            return entry["response"] if entry else None
+        except Exception as e:
+            print(f"✗ 读取缓存失败: {e}")
+            return None
+    
+    def save_cached_response_sync(
+        self,
+        key: str,
+        response: str,
+        expires_at: datetime
+    ) -> bool:
+        """保存 LLM 响应到缓存（同步）"""
+        if not self.client:
+            return False
+        
+        try:
+            self.sync_collection(self.cache_collection_name).update_one(
+                {"key": key},
+                {"$set": self._cache_entry(key, response, expires_at)},
+                upsert=True
+            )
+            return True
+        except Exception as e:
+            print(f"✗ 保存缓存失败: {e}")
+            return False
+    
+    @staticmethod
+    def _cache_entry(key: str, response: str, expires_at: datetime) -> Dict:
+        return {
+            "key": key,
+            "response": response,
+            "created_at": datetime.utcnow(),
+            "expires_at": expires_at
+        }
+    
     def close(self):
-        """关闭数据库连接"""
-        if self.client:
-            self.client.close()
-            print("✓ MongoDB 连接已关闭")
+        """
+        释放对共享客户端的引用
+        
+        客户端由所有管理器共用，不在此关闭；进程退出前调用 close_mongo_clients
+        """
+        self.client = None
+
+
+# 全局记录管理器实例
+_record_manager: Optional[AnalysisRecordManager] = None
+_record_manager_lock = threading.Lock()
+
+
+def get_record_manager() -> AnalysisRecordManager:
+    """
+    获取全局分析记录管理器（单例模式）
+    
+    Returns:
+        AnalysisRecordManager 实例
+    """
+    global _record_manager
+    with _record_manager_lock:
+        if _record_manager is None:
+            _record_manager = AnalysisRecordManager()
+        return _record_manager
 
 
 if __name__ == '__main__':
@@ -3,22 +3,138 @@ MongoDB 文档和报告管理扩展
 用于保存和查询文档解析、财务指标、分析报告
 """
 
+import os
+import threading
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from bson import ObjectId
 
-from storage.db_manager import AnalysisRecordManager
+from storage.db_manager import (
+    PREVIEW_LENGTH,
+    AnalysisRecordManager,
+    get_record_manager,
+    preview_expression
+)
+from storage.pagination import KEYSET_SORT, apply_cursor
+from storage.text_search import (
+    SEARCH_EXCLUDE_PROJECTION,
+    SEARCH_TOKENS_FIELD,
+    build_search_tokens,
+    ensure_search_index,
+    text_search
+)
+from storage.write_buffer import (
+    DEFAULT_WRITE_BATCH_SIZE,
+    DEFAULT_WRITE_FLUSH_INTERVAL,
+    WriteBehindBuffer
+)
+
+# 分析报告中参与全文搜索的字段
+REPORT_SEARCH_FIELDS = ["report_markdown", "investor_name"]
+
+# 列表查询的摘要投影：不传输文档正文、指标明细和报告全文
+DOCUMENT_SUMMARY_PROJECTION = {
+    "document_id": 1,
+    "filename": 1,
+    "format": 1,
+    "metadata": 1,
+    "status": 1,
+    "content_length": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "content_preview": preview_expression("content_preview", "$content"),
+}
+
+METRICS_SUMMARY_PROJECTION = {
+    "document_id": 1,
+    "summary": 1,
+    "metrics_count": 1,
+    "created_at": 1,
+}
+
+REPORT_SUMMARY_PROJECTION = {
+    "document_id": 1,
+    "investor_id": 1,
+    "investor_name": 1,
+    "metadata": 1,
+    "report_length": 1,
+    "created_at": 1,
+    "report_preview": preview_expression("report_preview", "$report_markdown"),
+}
 
 
 class DocumentManager:
     """文档管理器 - 扩展 AnalysisRecordManager"""
     
-    def __init__(self):
-        """初始化管理器"""
-        self.db_manager = AnalysisRecordManager()
+    def __init__(self, db_manager: Optional[AnalysisRecordManager] = None):
+        """
+        初始化管理器
+        
+        Args:
+            db_manager: 分析记录管理器，默认使用全局实例（共享 MongoDB 客户端）
+        """
+        self.db_manager = db_manager or get_record_manager()
         self.documents_collection = self.db_manager.db["documents"]
         self.metrics_collection = self.db_manager.db["financial_metrics"]
         self.reports_collection = self.db_manager.db["analysis_reports"]
+        self.checkpoints_collection = self.db_manager.db["workflow_checkpoints"]
+        self.upload_jobs_collection = self.db_manager.db["upload_jobs"]
+        
+        # 文档、指标和报告的写缓冲（save_* 传入 wait=False 时使用）
+        self.write_buffer = WriteBehindBuffer(
+            max_batch_size=int(os.getenv("DOCUMENT_WRITE_BATCH_SIZE", DEFAULT_WRITE_BATCH_SIZE)),
+            flush_interval=float(os.getenv("DOCUMENT_WRITE_FLUSH_SECONDS", DEFAULT_WRITE_FLUSH_INTERVAL))
+        )
+    
+    async def _insert(self, collection, document: Dict, wait: bool) -> str:
+        """插入一条记录：wait=True 时立即写入，否则放入写缓冲批量写入"""
+        if wait:
+            result = await collection.insert_one(document)
+            return str(result.inserted_id)
+        return str(await self.write_buffer.insert(collection, document))
+    
+    async def flush_writes(self) -> int:
+        """
+        立即写入写缓冲中的全部记录
+        
+        Returns:
+            写入的记录数
+        """
+        return await self.write_buffer.flush()
+    
+    async def ensure_indexes(self):
+        """创建文档相关集合的索引（异步）"""
+        try:
+            # 文档：按 document_id 查询，列表按时间倒序
+            await self.documents_collection.create_index("document_id")
+            await self.documents_collection.create_index([("created_at", -1), ("_id", -1)])
+            
+            # 财务指标和报告：取某文档最新的记录；列表按 (created_at, _id) 游标分页
+            await self.metrics_collection.create_index([("document_id", 1), ("created_at", -1)])
+            await self.metrics_collection.create_index([("created_at", -1), ("_id", -1)])
+            await self.reports_collection.create_index([("document_id", 1), ("created_at", -1), ("_id", -1)])
+            await self.reports_collection.create_index([("investor_id", 1), ("created_at", -1), ("_id", -1)])
+            await self.reports_collection.create_index([("created_at", -1), ("_id", -1)])
+            await ensure_search_index(self.reports_collection)
+            
+            # 工作流检查点：(材料哈希, 节点, 变体) 唯一 + TTL 索引（到期自动删除）
+            await self.checkpoints_collection.create_index(
+                [("material_hash", 1), ("node", 1), ("variant", 1)],
+                unique=True
+            )
+            await self.checkpoints_collection.create_index(
+                "expires_at", expireAfterSeconds=0
+            )
+            
+            # 后台上传任务：按 job_id 查询，到期自动删除
+            await self.upload_jobs_collection.create_index("job_id", unique=True)
+            await self.upload_jobs_collection.create_index(
+                "expires_at", expireAfterSeconds=0
+            )
+            
+            print("✓ 文档集合索引创建成功")
+        except Exception as e:
+            print(f"⚠️  创建索引时出错: {e}")
     
     # ==================== 文档相关 ====================
     
@@ -29,7 +145,8 @@ class DocumentManager:
         content: str,
         format: str,
         markdown_content: Optional[str] = None,
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        wait: bool = True
     ) -> str:
         """
         保存解析后的文档
@@ -41,6 +158,8 @@ class DocumentManager:
             format: 文档格式（pdf/word/markdown）
             markdown_content: 转换后的 Markdown 内容
             metadata: 元数据
+            wait: 是否等待写入完成；为 False 时放入写缓冲，
+                  记录在下次批量刷新（或 flush_writes）后才能查询到
             
         Returns:
             MongoDB 记录ID
@@ -54,11 +173,11 @@ class DocumentManager:
             "metadata": metadata or {},
             "created_at": datetime.utcnow(),
             "content_length": len(content),
+            "content_preview": content[:PREVIEW_LENGTH],
             "status": "parsed"
         }
         
-        result = await self.documents_collection.insert_one(document)
-        return str(result.inserted_id)
+        return await self._insert(self.documents_collection, document, wait)
     
     async def get_document(self, document_id: str) -> Optional[Dict]:
         """获取文档详情"""
@@ -78,15 +197,27 @@ class DocumentManager:
         self,
         limit: int = 50,
         skip: int = 0,
-        format_filter: Optional[str] = None
+        format_filter: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> List[Dict]:
-        """列出所有文档"""
+        """
+        列出所有文档（只返回摘要字段和 content_preview，不加载正文）
+        
+        Args:
+            limit: 每页数量
+            skip: 跳过的记录数（提供 cursor 时忽略）
+            format_filter: 按格式筛选
+            cursor: 分页游标（见 storage.pagination），为空时从最新文档开始；
+                    深翻页时应使用游标而不是 skip
+        """
         query = {}
         if format_filter:
             query["format"] = format_filter
         
-        cursor = self.documents_collection.find(query).sort("created_at", -1).skip(skip).limit(limit)
-        documents = await cursor.to_list(length=limit)
+        results = self.documents_collection.find(
+            apply_cursor(query, cursor), DOCUMENT_SUMMARY_PROJECTION
+        ).sort(KEYSET_SORT).skip(0 if cursor else skip).limit(limit)
+        documents = await results.to_list(length=limit)
         
         for doc in documents:
             doc["_id"] = str(doc["_id"])
@@ -107,9 +238,10 @@ class DocumentManager:
         self,
         document_id: str,
         metrics: Dict[str, Any],
-        summary: Optional[Dict] = None
+        summary: Optional[Dict] = None,
+        wait: bool = True
     ) -> str:
-        """保存计算的财务指标"""
+        """保存计算的财务指标（wait=False 时放入写缓冲）"""
         metrics_record = {
             "document_id": document_id,
             "metrics": metrics,
@@ -118,8 +250,7 @@ class DocumentManager:
             "metrics_count": sum(1 for v in metrics.values() if v is not None)
         }
         
-        result = await self.metrics_collection.insert_one(metrics_record)
-        return str(result.inserted_id)
+        return await self._insert(self.metrics_collection, metrics_record, wait)
     
     async def get_metrics(self, document_id: str) -> Optional[Dict]:
         """获取文档的财务指标"""
@@ -136,11 +267,14 @@ class DocumentManager:
     async def list_metrics(
         self,
         limit: int = 50,
-        skip: int = 0
+        skip: int = 0,
+        cursor: Optional[str] = None
     ) -> List[Dict]:
-        """列出所有财务指标记录"""
-        cursor = self.metrics_collection.find().sort("created_at", -1).skip(skip).limit(limit)
-        metrics_list = await cursor.to_list(length=limit)
+        """列出所有财务指标记录（只返回摘要，指标明细通过 get_metrics 获取；提供 cursor 时按游标分页并忽略 skip）"""
+        results = self.metrics_collection.find(
+            apply_cursor({}, cursor), METRICS_SUMMARY_PROJECTION
+        ).sort(KEYSET_SORT).skip(0 if cursor else skip).limit(limit)
+        metrics_list = await results.to_list(length=limit)
         
         for metrics in metrics_list:
             metrics["_id"] = str(metrics["_id"])
@@ -156,9 +290,10 @@ class DocumentManager:
         investor_name: str,
         report_markdown: str,
         structured_data: Optional[Dict] = None,
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        wait: bool = True
     ) -> str:
-        """保存分析报告"""
+        """保存分析报告（wait=False 时放入写缓冲）"""
         report = {
             "document_id": document_id,
             "investor_id": investor_id,
@@ -167,16 +302,19 @@ class DocumentManager:
             "structured_data": structured_data or {},
             "metadata": metadata or {},
             "created_at": datetime.utcnow(),
-            "report_length": len(report_markdown)
+            "report_length": len(report_markdown),
+            "report_preview": report_markdown[:PREVIEW_LENGTH],
+            SEARCH_TOKENS_FIELD: build_search_tokens(report_markdown, investor_name)
         }
         
-        result = await self.reports_collection.insert_one(report)
-        return str(result.inserted_id)
+        return await self._insert(self.reports_collection, report, wait)
     
     async def get_report(self, report_id: str) -> Optional[Dict]:
         """获取报告详情（通过报告ID）"""
         try:
-            report = await self.reports_collection.find_one({"_id": ObjectId(report_id)})
+            report = await self.reports_collection.find_one(
+                {"_id": ObjectId(report_id)}, SEARCH_EXCLUDE_PROJECTION
+            )
             if report:
                 report["_id"] = str(report["_id"])
                 return report
@@ -196,6 +334,7 @@ class DocumentManager:
         
         report = await self.reports_collection.find_one(
             query,
+            SEARCH_EXCLUDE_PROJECTION,
             sort=[("created_at", -1)]
         )
         
@@ -209,17 +348,22 @@ class DocumentManager:
         limit: int = 50,
         skip: int = 0,
         investor_filter: Optional[str] = None,
-        document_filter: Optional[str] = None
+        document_filter: Optional[str] = None,
+        summary: bool = False,
+        cursor: Optional[str] = None
     ) -> List[Dict]:
-        """列出所有报告"""
+        """列出所有报告（summary=True 时只返回摘要和 report_preview，不加载报告全文；提供 cursor 时按游标分页并忽略 skip）"""
         query = {}
         if investor_filter:
             query["investor_id"] = investor_filter
         if document_filter:
             query["document_id"] = document_filter
         
-        cursor = self.reports_collection.find(query).sort("created_at", -1).skip(skip).limit(limit)
-        reports = await cursor.to_list(length=limit)
+        projection = REPORT_SUMMARY_PROJECTION if summary else SEARCH_EXCLUDE_PROJECTION
+        results = self.reports_collection.find(
+            apply_cursor(query, cursor), projection
+        ).sort(KEYSET_SORT).skip(0 if cursor else skip).limit(limit)
+        reports = await results.to_list(length=limit)
         
         for report in reports:
             report["_id"] = str(report["_id"])
@@ -231,22 +375,148 @@ class DocumentManager:
         keyword: str,
         limit: int = 20
     ) -> List[Dict]:
-        """搜索报告（全文搜索）"""
-        query = {
-            "$or": [
-                {"report_markdown": {"$regex": keyword, "$options": "i"}},
-                {"investor_name": {"$regex": keyword, "$options": "i"}}
-            ]
-        }
-        
-        cursor = self.reports_collection.find(query).sort("created_at", -1).limit(limit)
-        reports = await cursor.to_list(length=limit)
+        """搜索报告（全文搜索，按相关度排序）"""
+        reports = await text_search(self.reports_collection, keyword, REPORT_SEARCH_FIELDS, limit)
         
         for report in reports:
             report["_id"] = str(report["_id"])
         
         return reports
     
+    # ==================== 工作流检查点 ====================
+    
+    async def get_checkpoint(
+        self,
+        material_hash: str,
+        node: str,
+        variant: str = ""
+    ) -> Optional[Dict]:
+        """
+        读取工作流节点的检查点（异步）
+        
+        Args:
+            material_hash: 材料内容的 SHA-256 哈希
+            node: 节点名称
+            variant: 节点变体（如分析节点的投资者/提供商组合）
+            
+        Returns:
+            节点输出，不存在返回 None
+        """
+        try:
+            checkpoint = await self.checkpoints_collection.find_one(
+                {"material_hash": material_hash, "node": node, "variant": variant}
+            )
+            return checkpoint["output"] if checkpoint else None
+        except Exception as e:
+            print(f"✗ 读取检查点失败: {e}")
+            return None
+    
+    async def save_checkpoint(
+        self,
+        material_hash: str,
+        node: str,
+        variant: str,
+        output: Dict,
+        expires_at: Optional[datetime] = None
+    ) -> bool:
+        """
+        保存工作流节点的检查点（异步），同一键重复保存时覆盖
+        
+        Args:
+            material_hash: 材料内容的 SHA-256 哈希
+            node: 节点名称
+            variant: 节点变体
+            output: 节点输出
+            expires_at: 过期时间，到期后由 TTL 索引删除；为空时不过期
+        """
+        try:
+            await self.checkpoints_collection.update_one(
+                {"material_hash": material_hash, "node": node, "variant": variant},
+                {"$set": {"output": output, "updated_at": datetime.utcnow(), "expires_at": expires_at}},
+                upsert=True
+            )
+            return True
+        except Exception as e:
+            print(f"✗ 保存检查点失败: {e}")
+            return False
+    
+    def get_checkpoint_sync(
+        self,
+        material_hash: str,
+        node: str,
+        variant: str = ""
+    ) -> Optional[Dict]:
+        """读取工作流节点的检查点（同步，使用共享的 pymongo 客户端）"""
+        try:
+            checkpoint = self.db_manager.sync_collection("workflow_checkpoints").find_one(
+                {"material_hash": material_hash, "node": node, "variant": variant}
+            )
+            return checkpoint["output"] if checkpoint else None
+        except Exception as e:
+            print(f"✗ 读取检查点失败: {e}")
+            return None
+    
+    def save_checkpoint_sync(
+        self,
+        material_hash: str,
+        node: str,
+        variant: str,
+        output: Dict,
+        expires_at: Optional[datetime] = None
+    ) -> bool:
+        """保存工作流节点的检查点（同步）"""
+        try:
+            self.db_manager.sync_collection("workflow_checkpoints").update_one(
+                {"material_hash": material_hash, "node": node, "variant": variant},
+                {"$set": {"output": output, "updated_at": datetime.utcnow(), "expires_at": expires_at}},
+                upsert=True
+            )
+            return True
+        except Exception as e:
+            print(f"✗ 保存检查点失败: {e}")
+            return False
+    
+    async def clear_checkpoints(self, material_hash: str) -> int:
+        """删除某份材料的全部检查点，返回删除数量"""
+        result = await self.checkpoints_collection.delete_many(
+            {"material_hash": material_hash}
+        )
+        return result.deleted_count
+    
+    # ==================== 上传任务 ====================
+    
+    async def save_upload_job(self, job: Dict, expires_at: datetime) -> bool:
+        """
+        保存后台上传任务的状态（同一 job_id 覆盖），供所有工作进程查询
+        
+        Args:
+            job: 任务记录（须可序列化为 BSON）
+            expires_at: 过期时间，到期后由 TTL 索引删除
+            
+        Returns:
+            是否保存成功
+        """
+        try:
+            await self.upload_jobs_collection.replace_one(
+                {"job_id": job["job_id"]},
+                {**job, "expires_at": expires_at},
+                upsert=True
+            )
+            return True
+        except Exception as e:
+            print(f"✗ 保存上传任务失败: {e}")
+            return False
+    
+    async def get_upload_job(self, job_id: str) -> Optional[Dict]:
+        """读取后台上传任务的状态，不存在返回 None"""
+        try:
+            return await self.upload_jobs_collection.find_one(
+                {"job_id": job_id}, {"_id": 0, "expires_at": 0}
+            )
+        except Exception as e:
+            print(f"✗ 读取上传任务失败: {e}")
+            return None
+    
     # ==================== 综合查询 ====================
     
     async def get_document_full_info(self, document_id: str) -> Optional[Dict]:
@@ -290,3 +560,52 @@ class DocumentManager:
             "by_investor": {item["_id"]: item["count"] for item in by_investor},
             "by_format": {item["_id"]: item["count"] for item in by_format}
         }
+
+
+# 全局文档管理器实例
+_document_manager: Optional[DocumentManager] = None
+_document_manager_lock = threading.Lock()
+
+
+def get_document_manager() -> DocumentManager:
+    """
+    获取全局文档管理器（单例模式）
+    
+    Returns:
+        DocumentManager 实例
+    """
+    global _document_manager
+    with _document_manager_lock:
+        if _document_manager is None:
+            _document_manager = DocumentManager()
+        return _document_manager
+
+
+async def flush_document_writes():
+    """写入全局文档管理器写缓冲中的剩余记录（应用关闭时调用，未创建管理器时跳过）"""
+    if _document_manager is not None:
+        await _document_manager.write_buffer.close()
+
+
+async def ensure_mongo_indexes() -> bool:
+    """
+    创建所有集合的索引（应用启动时调用一次）
+    
+    先探测一次连接，MongoDB 不可用时直接跳过，避免每个集合各等一次超时
+    
+    Returns:
+        是否已创建索引
+    """
+    record_manager = get_record_manager()
+    if not record_manager.client:
+        return False
+    
+    try:
+        await record_manager.client.admin.command("ping")
+    except Exception as e:
+        print(f"⚠️  MongoDB 不可用，跳过索引创建: {e}")
+        return False
+    
+    await record_manager.ensure_indexes()
+    await get_document_manager().ensure_indexes()
+    return True
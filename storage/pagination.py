@@ -0,0 +1,104 @@
+"""
+游标分页模块
+按 (created_at, _id) 倒序做键集分页：游标记录上一页最后一条的时间和 ID，
+下一页从该位置之后继续，借助 (created_at, _id) 索引直接定位，
+翻到多深都不需要像 skip 那样逐条跳过前面的记录
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# 分页排序：时间倒序，同一时间按 _id 倒序保证顺序稳定
+KEYSET_SORT = [("created_at", -1), ("_id", -1)]
+
+
+class InvalidCursorError(ValueError):
+    """分页游标无法解析"""
+
+
+def encode_cursor(created_at: datetime, record_id: Any) -> str:
+    """
+    将排序键编码为不透明的游标
+
+    Args:
+        created_at: 记录的创建时间
+        record_id: 记录的 _id（ObjectId 或其字符串形式）
+
+    Returns:
+        URL 安全的 base64 字符串
+    """
+    payload = json.dumps([created_at.isoformat(), str(record_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, Any]:
+    """
+    解析游标
+
+    Args:
+        cursor: encode_cursor 生成的游标
+
+    Returns:
+        (创建时间, _id)
+
+    Raises:
+        InvalidCursorError: 游标格式不正确
+    """
+    from bson.errors import InvalidId
+    from bson.objectid import ObjectId
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), ObjectId(record_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError, InvalidId) as e:
+        raise InvalidCursorError(f"无效的分页游标: {cursor}") from e
+
+
+def apply_cursor(query: Dict[str, Any], cursor: Optional[str]) -> Dict[str, Any]:
+    """
+    在查询条件上追加游标位置（只取排在游标之后的记录）
+
+    Args:
+        query: 原查询条件
+        cursor: 上一页返回的游标，为空时返回原查询
+
+    Returns:
+        新的查询条件
+    """
+    if not cursor:
+        return query
+
+    created_at, record_id = decode_cursor(cursor)
+    after = {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": record_id}},
+        ]
+    }
+    return {"$and": [query, after]} if query else after
+
+
+def next_page_cursor(
+    items: List[Dict[str, Any]],
+    limit: int,
+    id_field: str = "_id"
+) -> Optional[str]:
+    """
+    根据本页结果生成下一页游标
+
+    Args:
+        items: 按 KEYSET_SORT 排序的本页记录
+        limit: 每页数量
+        id_field: 记录 ID 所在字段（格式化后的记录可能改名，如 record_id）
+
+    Returns:
+        下一页游标；本页不满时说明已到末尾，返回 None
+    """
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(last["created_at"], last[id_field])
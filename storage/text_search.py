@@ -0,0 +1,205 @@
+"""
+全文搜索模块
+MongoDB 文本索引按空白和标点切词，无法切分连续的中文。
+保存记录时把正文预先切分为词元数组（中文取单字和相邻二字组，英文和数字按词小写），
+写入 search_tokens 字段并建立文本索引；查询时用同样的规则切分关键词，
+以 $text 召回候选、$all 要求包含全部词元，并按 textScore 排序
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+# 词元数组字段名与文本索引名
+SEARCH_TOKENS_FIELD = "search_tokens"
+SEARCH_INDEX_NAME = "search_tokens_text"
+
+# 读取记录时排除词元数组（只用于检索，不返回给调用方）
+SEARCH_EXCLUDE_PROJECTION = {SEARCH_TOKENS_FIELD: 0}
+
+# 单条记录的词元上限，超长材料只索引前面出现的词元
+MAX_DOCUMENT_TOKENS = 50000
+
+# 关键词长度上限（字符），超出部分忽略
+MAX_KEYWORD_LENGTH = 100
+
+# 连续的中日韩字符，或连续的英文字母/数字
+_TOKEN_RUN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+|[0-9a-zA-Z]+")
+_CJK_CHAR = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+
+
+def _run_tokens(run: str, unigrams: bool) -> Iterable[str]:
+    """切分一个连续片段：英文/数字整体小写，中文取二字组（以及单字）"""
+    if not _CJK_CHAR.match(run):
+        yield run.lower()
+        return
+
+    if unigrams or len(run) == 1:
+        yield from run
+    for i in range(len(run) - 1):
+        yield run[i:i + 2]
+
+
+def build_search_tokens(*texts: Optional[str]) -> List[str]:
+    """
+    将文本切分为去重后的词元数组（保存记录时调用）
+
+    Args:
+        texts: 需要被检索的文本字段
+
+    Returns:
+        按首次出现顺序排列的词元，最多 MAX_DOCUMENT_TOKENS 个
+    """
+    tokens: Dict[str, None] = {}
+    for text in texts:
+        if not text:
+            continue
+        for match in _TOKEN_RUN.finditer(text):
+            for token in _run_tokens(match.group(), unigrams=True):
+                tokens[token] = None
+                if len(tokens) >= MAX_DOCUMENT_TOKENS:
+                    return list(tokens)
+    return list(tokens)
+
+
+def build_query_tokens(keyword: str) -> List[str]:
+    """
+    切分搜索关键词
+
+    中文片段只取二字组（单字片段取单字），避免单字带来的大量误召回
+
+    Args:
+        keyword: 用户输入的关键词
+
+    Returns:
+        去重后的词元，关键词中没有可检索字符时为空列表
+    """
+    tokens: Dict[str, None] = {}
+    for match in _TOKEN_RUN.finditer(keyword[:MAX_KEYWORD_LENGTH]):
+        for token in _run_tokens(match.group(), unigrams=False):
+            tokens[token] = None
+    return list(tokens)
+
+
+def build_text_query(keyword: str) -> Optional[Dict[str, Any]]:
+    """
+    构建文本索引查询
+
+    Args:
+        keyword: 用户输入的关键词
+
+    Returns:
+        MongoDB 查询条件，关键词无可检索字符时返回 None
+    """
+    tokens = build_query_tokens(keyword)
+    if not tokens:
+        return None
+
+    # 词元本身只含字母、数字和中文，不会被 $search 解析为短语或排除符号
+    return {
+        "$text": {"$search": " ".join(tokens)},
+        SEARCH_TOKENS_FIELD: {"$all": tokens},
+    }
+
+
+def build_regex_query(keyword: str, fields: List[str]) -> Dict[str, Any]:
+    """
+    构建转义后的正则查询（文本索引不可用时的回退）
+
+    Args:
+        keyword: 用户输入的关键词（按字面匹配，不解释为正则）
+        fields: 需要匹配的字段
+
+    Returns:
+        MongoDB 查询条件
+    """
+    pattern = re.escape(keyword[:MAX_KEYWORD_LENGTH])
+    return {"$or": [{field: {"$regex": pattern, "$options": "i"}} for field in fields]}
+
+
+async def ensure_search_index(collection):
+    """为集合的词元数组创建文本索引（不做词干化和停用词过滤）"""
+    await collection.create_index(
+        [(SEARCH_TOKENS_FIELD, "text")],
+        name=SEARCH_INDEX_NAME,
+        default_language="none"
+    )
+
+
+async def text_search(
+    collection,
+    keyword: str,
+    regex_fields: List[str],
+    limit: int = 20,
+    projection: Optional[Dict[str, Any]] = None
+) -> List[Dict]:
+    """
+    按相关度搜索集合
+
+    Args:
+        collection: Motor 集合（需已建立 search_tokens 文本索引）
+        keyword: 搜索关键词
+        regex_fields: 文本索引查询失败时回退匹配的字段
+        limit: 返回记录数量
+        projection: 返回字段（默认为除词元数组外的全部字段）
+
+    Returns:
+        按相关度（相同时按时间倒序）排列的记录，不含词元数组
+    """
+    query = build_text_query(keyword)
+    if query is None:
+        return []
+
+    projection = projection or SEARCH_EXCLUDE_PROJECTION
+    try:
+        cursor = collection.find(
+            query,
+            {**projection, "score": {"$meta": "textScore"}}
+        ).sort([("score", {"$meta": "textScore"}), ("created_at", -1)]).limit(limit)
+        return await cursor.to_list(length=limit)
+    except Exception as e:
+        # 文本索引尚未创建时 $text 查询会失败，回退到转义后的正则扫描
+        print(f"⚠️  文本索引查询失败，回退到正则搜索: {e}")
+
+    cursor = collection.find(
+        build_regex_query(keyword, regex_fields),
+        projection
+    ).sort("created_at", -1).limit(limit)
+    return await cursor.to_list(length=limit)
+
+
+async def backfill_search_tokens(
+    collection,
+    fields: List[str],
+    batch_size: int = 500
+) -> int:
+    """
+    为缺少词元数组的历史记录补写 search_tokens
+
+    Args:
+        collection: Motor 集合
+        fields: 参与检索的字段（与保存时一致）
+        batch_size: 每批更新的记录数
+
+    Returns:
+        更新的记录数
+    """
+    from pymongo import UpdateOne
+
+    updated = 0
+    batch = []
+    cursor = collection.find(
+        {SEARCH_TOKENS_FIELD: {"$exists": False}},
+        {field: 1 for field in fields}
+    )
+    async for record in cursor:
+        tokens = build_search_tokens(*(record.get(field) for field in fields))
+        batch.append(UpdateOne({"_id": record["_id"]}, {"$set": {SEARCH_TOKENS_FIELD: tokens}}))
+        if len(batch) >= batch_size:
+            await collection.bulk_write(batch, ordered=False)
+            updated += len(batch)
+            batch = []
+
+    if batch:
+        await collection.bulk_write(batch, ordered=False)
+        updated += len(batch)
+    return updated
@@ -0,0 +1,121 @@
+"""
+写缓冲模块
+把文档、指标和报告的插入先放入内存队列，按集合分组后以
+insert_many(ordered=False) 批量写入；队列达到批量上限、距首次入队超过
+刷新间隔或应用关闭时刷新，一次往返写入多条记录
+
+写缓冲中的写入失败只能记录日志，调用方无从得知；
+需要确认写入结果的调用方应直接写入（DocumentManager.save_* 传入 wait=True）
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# 默认批量上限（条）和刷新间隔（秒）
+DEFAULT_WRITE_BATCH_SIZE = 100
+DEFAULT_WRITE_FLUSH_INTERVAL = 1.0
+
+
+class WriteBehindBuffer:
+    """
+    按集合分组的异步写缓冲
+
+    入队时即分配 _id，调用方无需等待写入即可拿到记录 ID；
+    写入失败只记录日志，不影响已入队的其他记录（ordered=False）
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+        flush_interval: float = DEFAULT_WRITE_FLUSH_INTERVAL
+    ):
+        """
+        Args:
+            max_batch_size: 队列中的记录数达到该值时立即刷新
+            flush_interval: 首条记录入队后最多等待的秒数
+        """
+        self.max_batch_size = max(1, max_batch_size)
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.failed = 0
+        self._pending: Dict[str, Tuple[object, List[Dict]]] = {}
+        self._size = 0
+        self._timer: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> int:
+        """待写入的记录数"""
+        return self._size
+
+    async def insert(self, collection, document: Dict) -> ObjectId:
+        """
+        记录入队
+
+        Args:
+            collection: Motor 集合
+            document: 待插入的记录（未设置 _id 时在此分配）
+
+        Returns:
+            记录的 _id
+        """
+        document.setdefault("_id", ObjectId())
+        self._pending.setdefault(collection.name, (collection, []))[1].append(document)
+        self._size += 1
+
+        if self._size >= self.max_batch_size:
+            await self.flush()
+        elif self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later())
+        return document["_id"]
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        # 已开始的写入不随定时任务取消而中断（队列已被取出，中断会丢失记录）
+        await asyncio.shield(self.flush())
+
+    async def flush(self) -> int:
+        """
+        写入队列中的全部记录
+
+        失败的记录写入日志并计入 failed，不抛出异常（刷新可能由定时任务
+        或其他调用方的入队触发，异常无法交给记录的所有者）
+
+        Returns:
+            本次成功写入的记录数
+        """
+        async with self._lock:
+            pending, self._pending, self._size = self._pending, {}, 0
+            written = 0
+
+            for collection, documents in pending.values():
+                try:
+                    result = await collection.insert_many(documents, ordered=False)
+                    written += len(result.inserted_ids)
+                except BulkWriteError as e:
+                    inserted = e.details.get("nInserted", 0)
+                    written += inserted
+                    self.failed += len(documents) - inserted
+                    logger.error(
+                        f"✗ 批量写入 {collection.name} 部分失败: "
+                        f"{len(documents) - inserted}/{len(documents)} 条, {e.details.get('writeErrors', [])[:3]}"
+                    )
+                except Exception as e:
+                    self.failed += len(documents)
+                    logger.error(f"✗ 批量写入 {collection.name} 失败: {len(documents)} 条, {e}")
+
+            self.written += written
+            return written
+
+    async def close(self):
+        """取消定时刷新并写入剩余记录（应用关闭时调用）"""
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
+        await self.flush()